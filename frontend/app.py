@@ -3,21 +3,27 @@
 from flask import Flask, render_template, request, jsonify
 import yaml
 import os
+import sys
 import json
 
+# Make the podcastfy package importable when running from the frontend directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from podcastfy.utils.prompt_registry import get_prompt_registry
+
 app = Flask(__name__)
 
 def load_madlib_form():
     """Load madlib form configuration."""
     form_path = os.path.join('..', 'data', 'prompts', 'madlib_form.yaml')
-    with open(form_path, 'r') as f:
-        return yaml.safe_load(f)
+    return get_prompt_registry().get_yaml(form_path)
 
 def load_madlib_template():
     """Load madlib template."""
     template_path = os.path.join('..', 'data', 'prompts', 'madlib_template.txt')
-    with open(template_path, 'r') as f:
-        return f.read()
+    registry = get_prompt_registry()
+    # Validates placeholders once per template version
+    registry.get_template_fields(template_path)
+    return registry.get_text(template_path)
 
 @app.route('/')
 def index():
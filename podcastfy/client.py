@@ -10,8 +10,10 @@ import asyncio
 from moviepy.editor import AudioFileClip
 from podcastfy.content_parser.content_extractor import ContentExtractor
 from podcastfy.content_generator import ContentGenerator
+from podcastfy.content_condenser import ContentCondenser
 from podcastfy.text_to_speech import TextToSpeech
 from podcastfy.utils.config import Config, load_config
+from podcastfy.utils.dialogue import Dialogue
 from podcastfy.utils.config_conversation import (
     ConversationConfig,
     load_conversation_config,
@@ -21,7 +23,6 @@ from podcastfy.utils.image_generator import ImageGenerator
 from podcastfy.utils.video_generator import VideoGenerator
 from typing import List, Optional, Dict, Any
 import copy
-import re
 
 logger = setup_logger(__name__)
 logger.setLevel('DEBUG')
@@ -33,20 +34,17 @@ def extract_audio_segments(qa_content: str) -> List[Dict[str, float]]:
         segments = []
         current_time = 0.0
         
-        # Split content into speaker segments
-        pattern = r'<(.*?)>(.*?)</\1>'
-        matches = re.findall(pattern, qa_content, re.DOTALL)
-        
-        for speaker, text in matches:
+        # Reuse the parsed speaker segments shared with validation and TTS
+        for line in Dialogue.parse(qa_content):
             # Estimate duration based on word count (rough approximation)
-            words = len(text.split())
+            words = len(line.raw_text.split())
             duration = (words * 0.4)  # Average speaking rate
             
             segments.append({
                 "start": current_time,
                 "end": current_time + duration,
-                "speaker": speaker,
-                "text": text.strip()
+                "speaker": line.speaker,
+                "text": line.raw_text.strip()
             })
             current_time += duration
         
@@ -67,8 +65,14 @@ async def process_content(
     custom_prompt: Optional[str] = None,
     generate_images: bool = False,
     generate_video: bool = False,
+    series_id: Optional[str] = None,
+    crawl_urls: Optional[List[str]] = None,
 ):
-    """Process content with optional custom prompt."""
+    """Process content with optional custom prompt.
+
+    ``crawl_urls`` are start URLs of multi-page sources; each is crawled and
+    its pages are used as additional sources.
+    """
     try:
         logger.debug("Starting process_content")
         if config is None:
@@ -78,6 +82,9 @@ async def process_content(
         if conversation_config:
             conv_config.configure(conversation_config)
 
+        dialog_stream = None
+        background = ""
+
         if transcript_file:
             logger.info(f"Using transcript file: {transcript_file}")
             with open(transcript_file, "r") as file:
@@ -89,18 +96,35 @@ async def process_content(
                 custom_prompt_path=custom_prompt
             )
 
-            if custom_prompt and not urls and not image_paths:
+            if custom_prompt and not urls and not crawl_urls and not image_paths:
                 logger.debug(f"Loading custom prompt from {custom_prompt}")
                 with open(custom_prompt, 'r') as f:
                     custom_config = yaml.safe_load(f)
                     combined_content = custom_config.get('topic', '')
-                    if custom_config.get('background'):
-                        combined_content += "\n\n" + custom_config['background']
-            elif urls:
-                logger.info(f"Processing {len(urls)} links")
+                    background = custom_config.get('background', '')
+                    # In series mode the background only seeds the story state
+                    if background and not series_id:
+                        combined_content += "\n\n" + background
+            elif urls or crawl_urls:
                 content_extractor = ContentExtractor()
-                contents = [content_extractor.extract_content(link) for link in urls]
-                combined_content = "\n\n".join(contents)
+                results = []
+                if urls:
+                    logger.info(f"Processing {len(urls)} links")
+                    results = await content_extractor.aextract_batch(urls)
+                for start_url in crawl_urls or []:
+                    logger.info(f"Crawling {start_url}")
+                    results.extend(await content_extractor.website_extractor.acrawl(start_url))
+                contents = [result["content"] for result in results if result["status"] == "success"]
+                if not contents:
+                    raise ValueError("No content could be extracted from the provided links")
+                contents, dedup_stats = content_extractor.deduplicate(contents)
+                if dedup_stats["removed_chars"]:
+                    logger.info(
+                        f"Deduplication removed {dedup_stats['removed_chars']} of "
+                        f"{dedup_stats['total_chars']} characters across sources"
+                    )
+                content_condenser = ContentCondenser(config=config, is_local=is_local)
+                combined_content = await content_condenser.condense(contents)
             else:
                 combined_content = ""
 
@@ -108,19 +132,33 @@ async def process_content(
             transcript_filepath = os.path.join(
                 config.get("output_directories")["transcripts"], random_filename
             )
-            qa_content = content_generator.generate_qa_content(
-                combined_content,
-                image_file_paths=image_paths or [],
-                output_filepath=transcript_filepath,
-                is_local=is_local,
-            )
+            if series_id:
+                qa_content = await content_generator.agenerate_series_episode(
+                    series_id,
+                    combined_content,
+                    background=background,
+                    image_file_paths=image_paths or [],
+                    output_filepath=transcript_filepath,
+                    is_local=is_local,
+                )
+            elif generate_audio and config.get("content_generator", {}).get("streaming", False):
+                # Hand completed speaker blocks to TTS while the dialog is still generating
+                dialog_stream = content_generator.stream_qa_content(
+                    combined_content,
+                    image_file_paths=image_paths or [],
+                    output_filepath=transcript_filepath,
+                    is_local=is_local,
+                )
+            else:
+                qa_content = await content_generator.agenerate_qa_content(
+                    combined_content,
+                    image_file_paths=image_paths or [],
+                    output_filepath=transcript_filepath,
+                    is_local=is_local,
+                )
 
         output_file = None
         if generate_audio:
-            # Extract audio segments before TTS
-            audio_segments = extract_audio_segments(qa_content)
-            logger.info(f"Extracted {len(audio_segments)} audio segments")
-
             api_key = None
             if tts_model != "edge":
                 api_key = getattr(config, f"{tts_model.upper()}_API_KEY")
@@ -130,10 +168,17 @@ async def process_content(
             audio_file = os.path.join(
                 config.get("output_directories")["audio"], random_filename
             )
-            text_to_speech.convert_to_speech(qa_content, audio_file)
+            if dialog_stream is not None:
+                text_to_speech.convert_stream_to_speech(dialog_stream, audio_file)
+                qa_content = dialog_stream.result
+            else:
+                text_to_speech.convert_to_speech(qa_content, audio_file)
             logger.info(f"Podcast generated successfully using {tts_model} TTS model")
             output_file = audio_file
 
+            audio_segments = extract_audio_segments(qa_content)
+            logger.info(f"Extracted {len(audio_segments)} audio segments")
+
             # Generate images if requested
             if generate_images:
                 logger.info("Generating images from transcript")
@@ -164,6 +209,9 @@ def main(
     file: typer.FileText = typer.Option(
         None, "--file", "-f", help="File containing URLs, one per line"
     ),
+    crawl_urls: list[str] = typer.Option(
+        None, "--crawl", "-c", help="Start URLs of multi-page sites to crawl"
+    ),
     transcript: typer.FileText = typer.Option(
         None, "--transcript", "-t", help="Path to a transcript file"
     ),
@@ -209,6 +257,12 @@ def main(
         "-gv",
         help="Generate video slideshow from images and audio",
     ),
+    series_id: str = typer.Option(
+        None,
+        "--series",
+        "-s",
+        help="Series ID; generate the next episode from the series' persisted story state",
+    ),
 ):
     """Generate a podcast or transcript with optional image and video generation."""
     try:
@@ -243,9 +297,9 @@ def main(
             if file:
                 urls_list.extend([line.strip() for line in file if line.strip()])
 
-            if not urls_list and not image_paths and not custom_prompt:
+            if not urls_list and not crawl_urls and not image_paths and not custom_prompt:
                 raise typer.BadParameter(
-                    "No input provided. Use --url to specify URLs, --file to specify a file containing URLs, --transcript for a transcript file, --image for image files, or --custom-prompt for a custom prompt."
+                    "No input provided. Use --url to specify URLs, --file to specify a file containing URLs, --crawl to crawl a site, --transcript for a transcript file, --image for image files, or --custom-prompt for a custom prompt."
                 )
 
             final_output = asyncio.run(process_content(
@@ -259,6 +313,8 @@ def main(
                 custom_prompt=custom_prompt,
                 generate_images=generate_images,
                 generate_video=generate_video,
+                series_id=series_id,
+                crawl_urls=crawl_urls,
             ))
 
         if transcript_only:
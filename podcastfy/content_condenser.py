@@ -0,0 +1,241 @@
+"""
+Content Condenser Module
+
+This module condenses large multi-source inputs before dialog generation. Sources
+are split into token-bounded chunks which are summarized concurrently with a
+cheaper model (map), then the summaries are merged hierarchically until they
+fit the configured token budget (reduce). Every intermediate summary is cached
+on disk by the hash of its input so repeated runs only pay for new chunks.
+"""
+
+import os
+import re
+import json
+import asyncio
+import hashlib
+import logging
+from typing import Any, List, Optional
+from langchain_core.messages import SystemMessage, HumanMessage
+from podcastfy.utils.config import load_config
+from podcastfy.utils.token_budget import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Bump when the summarization prompts change so stale cache entries are ignored
+CONDENSER_VERSION = "1"
+
+MAP_SYSTEM_PROMPT = """You condense source material for a noir dialog writer.
+Keep every name, place, date, number, quote and plot-relevant event.
+Drop boilerplate, navigation text, repetition and filler.
+Return ONLY the condensed text."""
+
+REDUCE_SYSTEM_PROMPT = """You merge condensed notes from several sources into one brief.
+Keep every name, place, date, number, quote and plot-relevant event.
+Remove repetition across notes and keep chronological order where possible.
+Return ONLY the merged brief."""
+
+
+class ContentCondenser:
+    def __init__(self, config: Optional[Any] = None, is_local: bool = False):
+        """
+        Initialize the ContentCondenser.
+
+        Args:
+            config (Optional[Any]): Loaded Config instance. Loaded when omitted.
+            is_local (bool): Use the local LLM backend for summaries.
+        """
+        self.config = config or load_config()
+        content_generator_config = self.config.get("content_generator", {})
+        self.condensation_config = content_generator_config.get("condensation", {})
+        self.enabled = self.condensation_config.get("enabled", True)
+        self.model_name = self.condensation_config.get("model", "gemini-1.5-flash-latest")
+        self.chunk_tokens = self.condensation_config.get("chunk_tokens", 8000)
+        self.target_tokens = self.condensation_config.get("target_tokens", 30000)
+        self.summary_tokens = self.condensation_config.get("summary_tokens", 1024)
+        self.fan_in = max(2, self.condensation_config.get("fan_in", 4))
+        self.max_concurrency = self.condensation_config.get("max_concurrency", 4)
+        self.cache_dir = self.condensation_config.get("cache_dir", "./data/cache/condensation")
+        self.is_local = is_local
+        self._llm = None
+
+    @property
+    def llm(self):
+        """Lazily create the summarization LLM so cache hits never build a client."""
+        if self._llm is None:
+            from podcastfy.content_generator import LLMBackend
+
+            self._llm = LLMBackend(
+                is_local=self.is_local,
+                temperature=0.2,
+                max_output_tokens=self.summary_tokens,
+                model_name=self.model_name,
+            ).llm
+        return self._llm
+
+    def chunk_text(self, text: str) -> List[str]:
+        """
+        Split text into chunks of at most ``chunk_tokens`` estimated tokens.
+
+        Paragraph boundaries are preferred; paragraphs larger than a chunk are
+        split on sentence boundaries and, failing that, on whitespace.
+
+        Args:
+            text (str): Text to split.
+
+        Returns:
+            List[str]: Ordered list of chunks.
+        """
+        chunks: List[str] = []
+        current: List[str] = []
+        current_tokens = 0
+
+        def flush():
+            nonlocal current, current_tokens
+            if current:
+                chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+
+        for piece in self._split_pieces(text):
+            piece_tokens = count_tokens(piece)
+            if current_tokens + piece_tokens > self.chunk_tokens:
+                flush()
+            current.append(piece)
+            current_tokens += piece_tokens
+        flush()
+        return chunks
+
+    def _split_pieces(self, text: str) -> List[str]:
+        """Break text into pieces no larger than a chunk, coarsest boundary first."""
+        pieces = []
+        for paragraph in re.split(r"\n\s*\n", text):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            if count_tokens(paragraph) <= self.chunk_tokens:
+                pieces.append(paragraph)
+                continue
+            for unit in self._split_oversized(paragraph):
+                pieces.append(unit)
+        return pieces
+
+    def _split_oversized(self, paragraph: str) -> List[str]:
+        """Split a single oversized paragraph into chunk-sized runs."""
+        units = re.split(r"(?<=[.!?])\s+", paragraph)
+        if any(count_tokens(unit) > self.chunk_tokens for unit in units):
+            units = paragraph.split()
+        runs, current, current_tokens = [], [], 0
+        for unit in units:
+            unit_tokens = count_tokens(unit)
+            if current and current_tokens + unit_tokens > self.chunk_tokens:
+                runs.append(" ".join(current))
+                current, current_tokens = [], 0
+            current.append(unit)
+            current_tokens += unit_tokens
+        if current:
+            runs.append(" ".join(current))
+        return runs
+
+    def _cache_path(self, kind: str, text: str) -> str:
+        """Return the cache file path for a summary of ``text``."""
+        key = hashlib.sha256(
+            f"{CONDENSER_VERSION}\0{self.model_name}\0{kind}\0{text}".encode("utf-8")
+        ).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _read_cache(self, path: str) -> Optional[str]:
+        """Read a cached summary, ignoring unreadable entries."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)["summary"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_cache(self, path: str, summary: str) -> None:
+        """Atomically write a summary to the cache."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary}, f)
+        os.replace(tmp_path, path)
+
+    async def _summarize(self, kind: str, text: str, semaphore: asyncio.Semaphore) -> str:
+        """Summarize one chunk or group of summaries, going through the cache."""
+        path = self._cache_path(kind, text)
+        cached = await asyncio.to_thread(self._read_cache, path)
+        if cached is not None:
+            logger.debug(f"Condensation cache hit for {kind} chunk {os.path.basename(path)[:12]}")
+            return cached
+
+        system_prompt = MAP_SYSTEM_PROMPT if kind == "map" else REDUCE_SYSTEM_PROMPT
+        messages = [SystemMessage(content=system_prompt), HumanMessage(content=text)]
+        async with semaphore:
+            response = await self.llm.ainvoke(messages)
+        summary = getattr(response, "content", response).strip()
+
+        await asyncio.to_thread(self._write_cache, path, summary)
+        return summary
+
+    async def _reduce(self, group: List[str], semaphore: asyncio.Semaphore) -> str:
+        """Merge a group of summaries; a lone summary is passed through without an LLM call."""
+        if len(group) == 1:
+            return group[0]
+        return await self._summarize("reduce", "\n\n".join(group), semaphore)
+
+    async def condense(self, sources: List[str]) -> str:
+        """
+        Condense extracted sources so they fit within ``target_tokens``.
+
+        Args:
+            sources (List[str]): Extracted text for each source, in order.
+
+        Returns:
+            str: The combined sources, or their condensed brief if they exceed the budget.
+        """
+        combined = "\n\n".join(source for source in sources if source)
+        total_tokens = count_tokens(combined)
+        if not self.enabled or total_tokens <= self.target_tokens:
+            logger.debug(f"Skipping condensation ({total_tokens} estimated tokens)")
+            return combined
+
+        logger.info(
+            f"Condensing {len(sources)} sources (~{total_tokens} tokens) "
+            f"to fit {self.target_tokens} tokens"
+        )
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        # Map: summarize each chunk of each source, keeping source order
+        chunks = [chunk for source in sources if source for chunk in self.chunk_text(source)]
+        summaries = await asyncio.gather(
+            *(self._summarize("map", chunk, semaphore) for chunk in chunks)
+        )
+        logger.debug(f"Map stage produced {len(summaries)} summaries from {len(chunks)} chunks")
+
+        # Reduce: merge groups of summaries until the brief fits the budget
+        level = 0
+        while len(summaries) > 1 and count_tokens("\n\n".join(summaries)) > self.target_tokens:
+            groups = [summaries[i:i + self.fan_in] for i in range(0, len(summaries), self.fan_in)]
+            summaries = await asyncio.gather(*(self._reduce(group, semaphore) for group in groups))
+            level += 1
+            logger.debug(f"Reduce level {level} produced {len(summaries)} summaries")
+
+        condensed = "\n\n".join(summaries)
+        logger.info(
+            f"Condensed input from ~{total_tokens} to ~{count_tokens(condensed)} tokens"
+        )
+        return condensed
+
+
+def main(seed: int = 42) -> None:
+    """
+    Test the ContentCondenser chunking on a synthetic input.
+    """
+    logging.basicConfig(level=logging.INFO)
+    condenser = ContentCondenser()
+    text = "\n\n".join(f"Paragraph {i}. " + "The detective waits. " * 50 for i in range(200))
+    chunks = condenser.chunk_text(text)
+    print(f"Estimated tokens: {count_tokens(text)}")
+    print(f"Chunks: {len(chunks)} (max {max(count_tokens(c) for c in chunks)} tokens)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,25 @@
 """Content Generator Module"""
 
 import os
-from typing import Optional, Dict, Any, List
+import uuid
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Coroutine, List, Tuple, Iterable, Iterator, Callable, Union
 from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_community.llms.llamafile import Llamafile
 from langchain_core.messages import SystemMessage, HumanMessage
 from langchain_core.output_parsers import StrOutputParser
 from podcastfy.utils.config_conversation import load_conversation_config
 from podcastfy.utils.config import load_config
 from podcastfy.utils.prompt_handler import PromptHandler, load_custom_prompt
+from podcastfy.utils.prompt_registry import get_prompt_registry
+from podcastfy.utils.token_budget import TokenBudget, count_message_tokens
+from podcastfy.utils.context_cache import create_context_cache
+from podcastfy.utils.dialogue import Dialogue, DialogueTokenizer, Line, normalize_block
+from podcastfy.utils.image_inputs import ImageInputProcessor
+from podcastfy.utils.local_llm import get_local_llm_pool
+from podcastfy.story_state import StoryStateStore
 import logging
-import re
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +30,61 @@ load_dotenv(env_path)
 # Valid speaker tags
 VALID_SPEAKERS = {"DetectiveSarah", "OfficerMike", "EmmaLawson", "Maria"}
 
+# Fallback lines for speakers missing from a generated dialog
+DEFAULT_LINES = {
+    "Maria": "*professional tone* The investigation continues.",
+    "DetectiveSarah": "*determined* We'll get to the bottom of this.",
+    "OfficerMike": "*supportive* I'll check the records right away.",
+    "EmmaLawson": "*cryptic* Some mysteries are better left unsolved.",
+}
+
+
+def default_blocks(speakers: set) -> List[Tuple[str, str]]:
+    """
+    Return the fallback blocks for valid speakers missing from a dialog.
+
+    They go after the dialog, so a streamed dialog can be spoken before it is known to be incomplete.
+
+    Args:
+        speakers (set): Speakers with at least one block in the dialog.
+
+    Returns:
+        List[Tuple[str, str]]: (speaker, body) blocks, in DEFAULT_LINES order.
+    """
+    return [(speaker, body) for speaker, body in DEFAULT_LINES.items() if speaker not in speakers]
+
+DIALOG_SYSTEM_PROMPT = """You are a noir dialog writer creating character interactions.
+CRITICAL: Use ONLY these tags: <DetectiveSarah>, <OfficerMike>, <EmmaLawson>, <Maria>
+Start IMMEDIATELY with character dialog - NO structural tags or metadata.
+Each character must speak at least twice.
+Total dialog should be 3-5 minutes when spoken."""
+
+DIALOG_MODEL = "gemini-1.5-pro-latest"
+# Context caching requires a pinned model version; "-latest" aliases cannot be cached
+CACHED_DIALOG_MODEL = "gemini-1.5-pro-002"
+
+def run_sync(coroutine: Coroutine[Any, Any, Any]) -> Any:
+    """
+    Run a coroutine to completion from synchronous code.
+
+    Inside a running event loop (Jupyter, or an async caller) asyncio.run is not
+    allowed, so the coroutine runs on its own loop in a worker thread while the
+    caller waits; async callers should await the ``a*`` method instead.
+
+    Args:
+        coroutine (Coroutine[Any, Any, Any]): Coroutine to run.
+
+    Returns:
+        Any: The coroutine's result.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
 class LLMBackend:
     def __init__(
         self,
@@ -29,21 +92,33 @@ class LLMBackend:
         temperature: float,
         max_output_tokens: int,
         model_name: str,
+        cached_content: Optional[str] = None,
+        api_key: Optional[str] = None,
     ):
-        """Initialize the LLMBackend."""
+        """
+        Initialize the LLMBackend.
+
+        Local calls go through the shared LocalLLMPool configured under
+        ``local_llm`` in config.yaml; ``model_name`` and ``cached_content``
+        only apply to Gemini.
+        """
         self.is_local = is_local
         self.temperature = temperature
         self.max_output_tokens = max_output_tokens
         self.model_name = model_name
 
         if is_local:
-            self.llm = Llamafile()
+            self.llm = get_local_llm_pool().chat_model(
+                temperature=temperature,
+                max_output_tokens=max_output_tokens
+            )
         else:
             self.llm = ChatGoogleGenerativeAI(
                 model=model_name,
                 temperature=temperature,
                 max_output_tokens=max_output_tokens,
-                google_api_key=os.getenv('GEMINI_API_KEY')
+                google_api_key=api_key or os.getenv('GEMINI_API_KEY'),
+                cached_content=cached_content
             )
 
 class ContentGenerator:
@@ -59,6 +134,10 @@ class ContentGenerator:
         os.environ["GOOGLE_API_KEY"] = self.api_key
         self.config = load_config()
         self.content_generator_config = self.config.get("content_generator", {})
+        self.token_budget = TokenBudget.from_config(self.config, "dialog")
+        self.image_processor = ImageInputProcessor(self.config)
+        # One context cache per backend kind, shared by every batch of this generator
+        self._context_caches: Dict[bool, Any] = {}
         
         logger.debug("Loading conversation config")
         self.config_conversation = load_conversation_config()
@@ -68,130 +147,427 @@ class ContentGenerator:
 
         # Load base prompt
         self.base_prompt_path = os.path.join('C:\\', 'appz', 'podcastfy', 'data', 'prompts', 'prompt_v1.txt')
-        if not os.path.exists(self.base_prompt_path):
+        try:
+            # Served from the process-wide registry; the file is only re-read when it changes
+            self.base_prompt = get_prompt_registry().get_text(self.base_prompt_path)
+        except FileNotFoundError:
             raise FileNotFoundError(f"Base prompt file not found at {self.base_prompt_path}")
-            
-        with open(self.base_prompt_path, 'r', encoding='utf-8') as f:
-            self.base_prompt = f.read()
         logger.debug("Loaded base prompt")
 
     def validate_dialog(self, text: str) -> str:
         """Validate and clean dialog content."""
         try:
-            # Find all speaker tags
-            pattern = r'<(\w+)>'
-            speakers = set(re.findall(pattern, text))
+            dialogue = Dialogue.parse(text)
+            speakers = dialogue.speakers
             
             # Check for invalid speakers
             invalid_speakers = speakers - VALID_SPEAKERS
             if invalid_speakers:
                 logger.warning(f"Found invalid speakers: {invalid_speakers}")
-                # Remove any structural tags completely
-                for invalid in invalid_speakers:
-                    text = re.sub(f'<{invalid}>.*?</{invalid}>', '', text, flags=re.DOTALL)
-                # Clean up extra newlines
-                text = re.sub(r'\n\s*\n', '\n', text)
+
+            # Drop invalid speakers and normalize the remaining blocks
+            blocks = []
+            for line in dialogue:
+                if line.speaker in VALID_SPEAKERS:
+                    body = normalize_block(line.raw_text)
+                    if body:
+                        blocks.append((line.speaker, body))
             
             # Ensure all required speakers are present
             missing_speakers = VALID_SPEAKERS - speakers
             if missing_speakers:
                 logger.warning(f"Missing required speakers: {missing_speakers}")
-                # Add default lines for missing speakers
-                for speaker in missing_speakers:
-                    if speaker == "Maria":
-                        text = f"<Maria>\n*professional tone* The investigation continues.\n</Maria>\n\n{text}"
-                    elif speaker == "DetectiveSarah":
-                        text += f"\n\n<DetectiveSarah>\n*determined* We'll get to the bottom of this.\n</DetectiveSarah>"
-                    elif speaker == "OfficerMike":
-                        text += f"\n\n<OfficerMike>\n*supportive* I'll check the records right away.\n</OfficerMike>"
-                    elif speaker == "EmmaLawson":
-                        text += f"\n\n<EmmaLawson>\n*cryptic* Some mysteries are better left unsolved.\n</EmmaLawson>"
-            
-            # Ensure proper XML structure
-            lines = text.split('\n')
-            current_tag = None
-            fixed_lines = []
-            
-            for line in lines:
-                if line.strip():
-                    # Check for opening tag
-                    open_match = re.match(r'<(\w+)>', line)
-                    if open_match:
-                        if current_tag:  # Close any open tag
-                            fixed_lines.append(f"</{current_tag}>")
-                        current_tag = open_match.group(1)
-                        fixed_lines.append(line)
-                    # Check for closing tag
-                    elif re.match(f'</({"|".join(VALID_SPEAKERS)})>', line):
-                        current_tag = None
-                        fixed_lines.append(line)
-                    # Content line
-                    else:
-                        if current_tag and not line.startswith('*'):
-                            line = f"*neutral* {line}"
-                        fixed_lines.append(line)
-            
-            # Close any remaining open tag
-            if current_tag:
-                fixed_lines.append(f"</{current_tag}>")
-            
-            return '\n'.join(fixed_lines).strip()
+            # Add default lines for missing speakers
+            return Dialogue.from_blocks(blocks + default_blocks(speakers)).source
         except Exception as e:
             logger.error(f"Error validating dialog: {str(e)}")
             raise
 
+    def _build_messages(
+        self,
+        input_texts: Union[str, List[str]],
+        image_parts: Optional[List[Dict[str, Any]]] = None,
+        story_state: str = "",
+    ) -> List[Any]:
+        """
+        Build the dialog generation messages for the given input.
+
+        ``input_texts`` may be a single string or a list of sources; sources are
+        trimmed to the ``dialog`` token budget before being joined. Prepared
+        ``image_parts`` are attached after the text of the user message, and a
+        series ``story_state`` is always kept in full ahead of the input.
+        """
+        image_parts = image_parts or []
+        sources = [input_texts] if isinstance(input_texts, str) else list(input_texts)
+        prompt_prefix = f"{self.base_prompt}\n\n"
+        if story_state:
+            prompt_prefix += f"Story so far:\n{story_state}\n\n"
+        prompt_prefix += "Story to adapt:\n"
+        sources = self.token_budget.fit(
+            [DIALOG_SYSTEM_PROMPT, prompt_prefix], sources,
+            reserved_tokens=sum(self.image_processor.part_tokens(part) for part in image_parts)
+        )
+
+        # Format prompt with input text
+        dialog_prompt = prompt_prefix + "\n\n".join(sources)
+        content = dialog_prompt
+        if image_parts:
+            content = [{"type": "text", "text": dialog_prompt}, *image_parts]
+
+        return [
+            SystemMessage(content=DIALOG_SYSTEM_PROMPT),
+            HumanMessage(content=content)
+        ]
+
+    def _prepare_images(self, image_file_paths: Optional[List[str]], is_local: bool) -> List[Dict[str, Any]]:
+        """Downscale, deduplicate and cache image inputs as message content parts."""
+        if not image_file_paths:
+            return []
+        if is_local:
+            logger.warning("Local LLM backend is text-only; ignoring image inputs")
+            return []
+        return self.image_processor.prepare(image_file_paths)
+
+    def _create_backend(self, is_local: bool, model_name: str = DIALOG_MODEL, **backend_kwargs) -> LLMBackend:
+        """Create the LLM backend used for dialog generation."""
+        return LLMBackend(
+            is_local=is_local,
+            temperature=0.7,
+            max_output_tokens=8192,
+            model_name=model_name,
+            **backend_kwargs
+        )
+
+    def _save_result(self, result: str, output_filepath: Optional[str]) -> None:
+        """Save generated dialog content to a file if a path is given."""
+        if output_filepath:
+            logger.debug(f"Saving content to {output_filepath}")
+            with open(output_filepath, "w", encoding='utf-8') as file:
+                file.write(result)
+            logger.info(f"Response content saved to {output_filepath}")
+
     def generate_qa_content(
         self,
-        input_texts: str = "",
+        input_texts: Union[str, List[str]] = "",
         image_file_paths: List[str] = None,
         output_filepath: Optional[str] = None,
         is_local: bool = False,
     ) -> str:
-        """Generate dialog content based on input text."""
-        try:
-            logger.debug("Starting content generation")
-            if image_file_paths is None:
-                image_file_paths = []
-                
-            llmbackend = LLMBackend(
+        """
+        Generate dialog content based on input text.
+
+        Synchronous wrapper around agenerate_qa_content. From async code (e.g. the
+        FastAPI server) await agenerate_qa_content instead.
+        """
+        return run_sync(
+            self.agenerate_qa_content(
+                input_texts,
+                image_file_paths=image_file_paths,
+                output_filepath=output_filepath,
                 is_local=is_local,
-                temperature=0.7,
-                max_output_tokens=8192,
-                model_name="gemini-1.5-pro-latest"
             )
+        )
 
-            # Format prompt with input text
-            dialog_prompt = f"{self.base_prompt}\n\nStory to adapt:\n{input_texts}"
+    async def agenerate_qa_content(
+        self,
+        input_texts: Union[str, List[str]] = "",
+        image_file_paths: List[str] = None,
+        output_filepath: Optional[str] = None,
+        is_local: bool = False,
+        story_state: str = "",
+    ) -> str:
+        """Generate dialog content based on input text without blocking the event loop."""
+        try:
+            logger.debug("Starting content generation")
+            image_parts = await asyncio.to_thread(self._prepare_images, image_file_paths, is_local)
+
+            llmbackend = self._create_backend(is_local)
 
             # Generate dialog
-            messages = [
-                SystemMessage(content="""You are a noir dialog writer creating character interactions.
-CRITICAL: Use ONLY these tags: <DetectiveSarah>, <OfficerMike>, <EmmaLawson>, <Maria>
-Start IMMEDIATELY with character dialog - NO structural tags or metadata.
-Each character must speak at least twice.
-Total dialog should be 3-5 minutes when spoken."""),
-                HumanMessage(content=dialog_prompt)
-            ]
+            messages = self._build_messages(input_texts, image_parts, story_state)
 
             logger.debug("Generating dialog")
-            response = llmbackend.llm.invoke(messages)
+            predicted_tokens = count_message_tokens(messages, self.image_processor.part_tokens)
+            response = await llmbackend.llm.ainvoke(messages)
+            self.token_budget.log_usage(predicted_tokens, response)
             
             # Validate and clean dialog
             result = self.validate_dialog(response.content)
             
             logger.info("Content generated successfully")
 
-            if output_filepath:
-                logger.debug(f"Saving content to {output_filepath}")
-                with open(output_filepath, "w", encoding='utf-8') as file:
-                    file.write(result)
-                logger.info(f"Response content saved to {output_filepath}")
+            await asyncio.to_thread(self._save_result, result, output_filepath)
 
             return result
         except Exception as e:
             logger.error(f"Error generating content: {str(e)}")
             raise
 
+    def generate_series_episode(
+        self,
+        series_id: str,
+        input_texts: Union[str, List[str]] = "",
+        background: str = "",
+        image_file_paths: List[str] = None,
+        output_filepath: Optional[str] = None,
+        is_local: bool = False,
+    ) -> str:
+        """Synchronous wrapper around agenerate_series_episode."""
+        return run_sync(
+            self.agenerate_series_episode(
+                series_id,
+                input_texts,
+                background=background,
+                image_file_paths=image_file_paths,
+                output_filepath=output_filepath,
+                is_local=is_local,
+            )
+        )
+
+    async def agenerate_series_episode(
+        self,
+        series_id: str,
+        input_texts: Union[str, List[str]] = "",
+        background: str = "",
+        image_file_paths: List[str] = None,
+        output_filepath: Optional[str] = None,
+        is_local: bool = False,
+        story_store: Optional[StoryStateStore] = None,
+    ) -> str:
+        """
+        Generate the next episode of a series from its story state and the new input.
+
+        The series background is only used to seed the story state of a new
+        series; later episodes send the compact state summary instead of the
+        background and prior episodes. The state is updated from the new
+        episode once it has been generated.
+
+        Args:
+            series_id (str): Series identifier; state is persisted per series.
+            input_texts (Union[str, List[str]]): Input for the new episode.
+            background (str): Series background, used when the series is new.
+            image_file_paths (List[str]): Image inputs for the new episode.
+            output_filepath (Optional[str]): Where to save the transcript.
+            is_local (bool): Use the local LLM backend.
+            story_store (Optional[StoryStateStore]): State store; defaults to
+                the one configured under ``content_generator.series``.
+
+        Returns:
+            str: The validated dialog of the new episode.
+        """
+        if story_store is None:
+            story_store = StoryStateStore(self.config, is_local=is_local)
+        state = await asyncio.to_thread(story_store.load, series_id, background)
+        logger.info(f"Generating episode {state['episode_count'] + 1} of series '{series_id}'")
+
+        result = await self.agenerate_qa_content(
+            input_texts,
+            image_file_paths=image_file_paths,
+            output_filepath=output_filepath,
+            is_local=is_local,
+            story_state=state["summary"],
+        )
+        await story_store.aupdate(state, result)
+        return result
+
+    def generate_batch(
+        self,
+        inputs: List[str],
+        shared_context: str = "",
+        output_dir: Optional[str] = None,
+        is_local: bool = False,
+        max_concurrency: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Synchronous wrapper around agenerate_batch."""
+        return run_sync(
+            self.agenerate_batch(
+                inputs,
+                shared_context=shared_context,
+                output_dir=output_dir,
+                is_local=is_local,
+                max_concurrency=max_concurrency,
+            )
+        )
+
+    async def agenerate_batch(
+        self,
+        inputs: List[str],
+        shared_context: str = "",
+        output_dir: Optional[str] = None,
+        is_local: bool = False,
+        max_concurrency: Optional[int] = None,
+        context_cache: Optional[Any] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate one dialog per input, sending the shared prompt prefix only once.
+
+        The system message, base prompt and ``shared_context`` are registered once
+        with the provider's context cache; each episode then sends only its own
+        input. Failures are reported per item instead of aborting the batch.
+
+        Args:
+            inputs (List[str]): Episode inputs.
+            shared_context (str): Background material common to every episode.
+            output_dir (Optional[str]): Directory to save each transcript in, as
+                ``episode_<batch id>_<index>.txt``.
+            is_local (bool): Use the local LLM backend.
+            max_concurrency (Optional[int]): Maximum concurrent generations;
+                defaults to ``content_generator.batch.max_concurrency``.
+            context_cache (Optional[Any]): Cache to register the prefix with;
+                defaults to this generator's cache configured in config.yaml, which
+                later batches with the same prefix reuse until ``close``.
+
+        Returns:
+            List[Dict[str, Any]]: One result per input, in input order, with keys
+            ``index``, ``status`` ("success" or "error"), ``content``,
+            ``output_filepath`` and ``error``.
+        """
+        batch_config = self.content_generator_config.get("batch", {})
+        if max_concurrency is None:
+            max_concurrency = batch_config.get("max_concurrency", 4)
+        if context_cache is None:
+            if is_local not in self._context_caches:
+                self._context_caches[is_local] = create_context_cache(self.config, is_local=is_local)
+            context_cache = self._context_caches[is_local]
+
+        prefix = f"{self.base_prompt}\n\n"
+        if shared_context:
+            prefix += f"Background:\n{shared_context}\n\n"
+        prefix += "Story to adapt:\n"
+        # Registering with the provider is a blocking API call
+        handle = await asyncio.to_thread(context_cache.register, CACHED_DIALOG_MODEL, DIALOG_SYSTEM_PROMPT, prefix)
+        backend_kwargs = context_cache.backend_kwargs(handle)
+        # Calls that reference a provider cache must use the model it was created for
+        model_name = CACHED_DIALOG_MODEL if backend_kwargs else DIALOG_MODEL
+        llm = self._create_backend(is_local, model_name=model_name, **backend_kwargs).llm
+        # Distinguishes the transcripts of batches saved to the same directory
+        batch_id = uuid.uuid4().hex[:8]
+        semaphore = asyncio.Semaphore(max_concurrency)
+        logger.info(f"Generating batch of {len(inputs)} episodes (concurrency {max_concurrency})")
+
+        async def generate_one(index: int, input_text: str) -> Dict[str, Any]:
+            result = {"index": index, "status": "success", "content": None, "output_filepath": None, "error": None}
+            try:
+                delta = self.token_budget.fit([DIALOG_SYSTEM_PROMPT, prefix], [input_text])[0]
+                messages = context_cache.messages_for(handle, delta)
+                predicted_tokens = count_message_tokens(messages)
+                async with semaphore:
+                    response = await llm.ainvoke(messages)
+                self.token_budget.log_usage(predicted_tokens, response)
+                result["content"] = self.validate_dialog(response.content)
+                if output_dir:
+                    result["output_filepath"] = os.path.join(output_dir, f"episode_{batch_id}_{index:03d}.txt")
+                    await asyncio.to_thread(self._save_result, result["content"], result["output_filepath"])
+            except Exception as e:
+                logger.error(f"Error generating episode {index}: {str(e)}")
+                result["status"] = "error"
+                result["error"] = str(e)
+            return result
+
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        results = await asyncio.gather(*(generate_one(i, text) for i, text in enumerate(inputs)))
+        failed = sum(1 for result in results if result["status"] == "error")
+        logger.info(f"Batch finished: {len(results) - failed} succeeded, {failed} failed")
+        return list(results)
+
+    def close(self) -> None:
+        """Delete the provider context caches registered by this generator's batches."""
+        for context_cache in self._context_caches.values():
+            context_cache.close()
+        self._context_caches.clear()
+
+    def stream_qa_content(
+        self,
+        input_texts: Union[str, List[str]] = "",
+        image_file_paths: List[str] = None,
+        output_filepath: Optional[str] = None,
+        is_local: bool = False,
+    ) -> "DialogStream":
+        """
+        Generate dialog content as a stream of completed speaker blocks.
+
+        Iterating the returned DialogStream yields ``(speaker, text)`` tuples as soon
+        as each ``</Speaker>`` tag is received, so TTS can start before the model
+        finishes. Once exhausted, ``DialogStream.result`` holds the same validated
+        dialog that generate_qa_content would have returned for the same response.
+        """
+        logger.debug("Starting streaming content generation")
+        llmbackend = self._create_backend(is_local)
+        messages = self._build_messages(input_texts, self._prepare_images(image_file_paths, is_local))
+        return DialogStream(
+            llmbackend.llm.stream(messages),
+            finalize=lambda text: self._finalize_stream(text, output_filepath),
+        )
+
+    def _finalize_stream(self, text: str, output_filepath: Optional[str]) -> str:
+        """Validate and save the full text of a finished dialog stream."""
+        result = self.validate_dialog(text)
+        logger.info("Content generated successfully")
+        self._save_result(result, output_filepath)
+        return result
+
+class DialogStreamParser:
+    """Incremental parser that emits speaker blocks as soon as they are closed."""
+
+    def __init__(self):
+        self._tokenizer = DialogueTokenizer()
+        # Every speaker tag seen so far, valid or not, as counted by validate_dialog
+        self.speakers: set = set()
+
+    def feed(self, text: str) -> List[Tuple[str, str]]:
+        """
+        Add streamed text and return the speaker blocks completed by it.
+
+        Blocks for speakers outside VALID_SPEAKERS are dropped, mirroring
+        ContentGenerator.validate_dialog. A new opening tag implicitly closes an
+        unterminated block, as validate_dialog does.
+        """
+        return self._validate(self._tokenizer.feed(text))
+
+    def close(self) -> List[Tuple[str, str]]:
+        """Flush an unterminated final block and add fallback blocks for missing speakers, as validate_dialog does."""
+        return self._validate(self._tokenizer.close()) + default_blocks(self.speakers)
+
+    def _validate(self, lines: List[Line]) -> List[Tuple[str, str]]:
+        """Keep valid, non-empty blocks as (speaker, normalized body) tuples."""
+        blocks = []
+        for line in lines:
+            self.speakers.add(line.speaker)
+            if line.speaker not in VALID_SPEAKERS:
+                logger.warning(f"Dropping streamed block for invalid speaker: {line.speaker}")
+                continue
+            body = normalize_block(line.raw_text)
+            if body:
+                blocks.append((line.speaker, body))
+        return blocks
+
+class DialogStream:
+    """
+    Iterable of completed speaker blocks produced from an LLM token stream.
+
+    The blocks are those of the validated dialog, fallback lines for missing
+    speakers included, so audio built from them matches ``result``. Each block
+    is yielded as soon as it is closed; fallback lines follow the last one.
+    """
+
+    def __init__(self, chunks: Iterable[Any], finalize: Callable[[str], str]):
+        self._chunks = chunks
+        self._finalize = finalize
+        self.result: Optional[str] = None
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        parser = DialogStreamParser()
+        parts = []
+        for chunk in self._chunks:
+            text = getattr(chunk, "content", chunk)
+            if not text:
+                continue
+            parts.append(text)
+            yield from parser.feed(text)
+        yield from parser.close()
+        self.result = self._finalize("".join(parts))
+
 def main(seed: int = 42, is_local: bool = False) -> None:
     """Main function to test the ContentGenerator."""
     try:
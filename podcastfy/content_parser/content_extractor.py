@@ -6,17 +6,47 @@ websites, YouTube videos, and PDF files. It serves as a central hub for content
 extraction, delegating to specialized extractors based on the source type.
 """
 
+import os
+import asyncio
+import functools
 import logging
+import multiprocessing
 import re
-from typing import List, Union
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from urllib.parse import urlparse
 from .youtube_transcriber import YouTubeTranscriber
-from .website_extractor import WebsiteExtractor
+from .website_extractor import WebsiteExtractor, parse_html
 from .pdf_extractor import PDFExtractor
+from .text_file_extractor import TextFileExtractor
+from .extraction_cache import ExtractionCache
+from .deduplicator import NearDuplicateRemover
 from podcastfy.utils.config import load_config
 
 logger = logging.getLogger(__name__)
 
+class ContentChunk:
+	"""
+	A piece of a source's extracted text.
+
+	``offset`` is the character offset of ``text`` in the text extract_content
+	returns for the source; the chunks of a source concatenate to that text.
+	``location`` is the 1-based PDF page, the transcript start time in
+	seconds or the byte offset in a local text file where the chunk begins,
+	and None for websites, HTML files and cached text.
+	"""
+
+	__slots__ = ("source", "offset", "text", "location")
+
+	def __init__(self, source: str, offset: int, text: str, location: Optional[float] = None):
+		self.source = source
+		self.offset = offset
+		self.text = text
+		self.location = location
+
+	def __repr__(self) -> str:
+		return f"ContentChunk(source={self.source!r}, offset={self.offset}, location={self.location!r}, chars={len(self.text)})"
+
 class ContentExtractor:
 	def __init__(self):
 		"""
@@ -25,8 +55,13 @@ class ContentExtractor:
 		self.youtube_transcriber = YouTubeTranscriber()
 		self.website_extractor = WebsiteExtractor()
 		self.pdf_extractor = PDFExtractor()
+		self.text_file_extractor = TextFileExtractor()
 		self.config = load_config()
 		self.content_extractor_config = self.config.get('content_extractor', {})
+		self.batch_config = self.content_extractor_config.get('batch', {})
+		self.chunk_chars = self.content_extractor_config.get('chunk_chars', 8192)
+		self.extraction_cache = ExtractionCache.from_config(self.content_extractor_config)
+		self.deduplicator = NearDuplicateRemover.from_config(self.config)
 
 	def is_url(self, source: str) -> bool:
 		"""
@@ -48,6 +83,32 @@ class ContentExtractor:
 		except ValueError:
 			return False
 
+	def source_type(self, source: str) -> str:
+		"""
+		Classify a source by the extractor that handles it.
+
+		Args:
+			source (str): URL or file path of the content source.
+
+		Returns:
+			str: "youtube", "website", "pdf", or "text" / "html" for local text,
+			Markdown and HTML files.
+
+		Raises:
+			ValueError: If the source type is unsupported.
+		"""
+		# Relative paths such as ./data/file.pdf would otherwise parse as URLs
+		if self.is_url(source) and not os.path.exists(source):
+			if any(pattern in source for pattern in self.content_extractor_config.get('youtube_url_patterns', [])):
+				return "youtube"
+			return "website"
+		elif source.lower().endswith('.pdf'):
+			return "pdf"
+		file_type = self.text_file_extractor.file_type(source)
+		if file_type:
+			return file_type
+		raise ValueError("Unsupported source type")
+
 	def extract_content(self, source: str) -> str:
 		"""
 		Extract content from various sources.
@@ -62,19 +123,273 @@ class ContentExtractor:
 			ValueError: If the source type is unsupported.
 		"""
 		try:
-			if self.is_url(source):
-				if any(pattern in source for pattern in self.content_extractor_config.get('youtube_url_patterns', [])):
-					return self.youtube_transcriber.extract_transcript(source)
-				else:
-					return self.website_extractor.extract_content(source)
-			elif source.lower().endswith('.pdf'):
-				return self.pdf_extractor.extract_content(source)
+			source_type = self.source_type(source)
+			if source_type == "youtube":
+				return self.youtube_transcriber.extract_transcript(source)
+			elif source_type == "website":
+				return self.website_extractor.extract_content(source)
+			cached = self.cached_file_content(source)
+			if cached is not None:
+				return cached
+			if source_type == "pdf":
+				content = self.pdf_extractor.extract_content(source)
 			else:
-				raise ValueError("Unsupported source type")
+				content = self.text_file_extractor.extract_content(source)
+			self.cache_file_content(source, content)
+			return content
 		except Exception as e:
 			logger.error(f"Error extracting content from {source}: {str(e)}")
 			raise
 
+	def iter_content(self, source: str, chunk_chars: Optional[int] = None) -> Iterator[ContentChunk]:
+		"""
+		Extract content from a source as a stream of chunks.
+
+		PDFs are read page by page, local text files piece by piece through a
+		memory map, and transcripts entry by entry, so only the current pieces
+		are held in memory. Cached file text is served from the extraction
+		cache, but a streamed file is not added to it.
+
+		Args:
+			source (str): URL or file path of the content source.
+			chunk_chars (Optional[int]): Target chunk size in characters; defaults
+				to ``content_extractor.chunk_chars``.
+
+		Yields:
+			ContentChunk: Chunks in source order, at most ``chunk_chars`` long.
+
+		Raises:
+			ValueError: If the source type is unsupported.
+		"""
+		chunk_chars = chunk_chars or self.chunk_chars
+		source_type = self.source_type(source)
+		if source_type == "youtube":
+			pieces = self.youtube_transcriber.iter_content(source)
+		elif source_type == "website":
+			pieces = [(None, self.website_extractor.extract_content(source))]
+		else:
+			cached = self.cached_file_content(source)
+			if cached is not None:
+				pieces = [(None, cached)]
+			elif source_type == "pdf":
+				pieces = self.pdf_extractor.iter_content(source)
+			else:
+				pieces = self.text_file_extractor.iter_content(source)
+		yield from chunk_pieces(source, pieces, chunk_chars)
+
+	def deduplicate(self, contents: List[str]) -> Tuple[List[str], Dict[str, int]]:
+		"""
+		Remove passages that nearly duplicate a passage of an earlier source.
+
+		Args:
+			contents (List[str]): Extracted texts, in source order.
+
+		Returns:
+			Tuple[List[str], Dict[str, int]]: The deduplicated texts, and counts
+			``passages``, ``removed_passages``, ``removed_chars`` and ``total_chars``.
+		"""
+		if not self.deduplicator or len(contents) < 2:
+			return contents, {
+				"passages": 0, "removed_passages": 0, "removed_chars": 0, "total_chars": sum(map(len, contents))
+			}
+		return self.deduplicator.deduplicate(contents)
+
+	def _file_cache_key(self, source: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+		"""Return the extractor name and settings keying a local file's cached text, or None if it is not cached."""
+		if not self.extraction_cache:
+			return None
+		source_type = self.source_type(source)
+		if source_type == "pdf":
+			return "pdf", self.pdf_extractor.cache_settings()
+		# Small text files are cheaper to read than to look up
+		if os.path.getsize(source) < self.text_file_extractor.cache_min_bytes:
+			return None
+		return source_type, self.text_file_extractor.cache_settings(source_type)
+
+	def cached_file_content(self, source: str) -> Optional[str]:
+		"""
+		Return the cached text of a local file, if it was extracted before with the current settings.
+
+		Args:
+			source (str): Path to a PDF, text, Markdown or HTML file.
+
+		Returns:
+			Optional[str]: The text, or None on a miss or with the cache disabled.
+		"""
+		key = self._file_cache_key(source)
+		if key is None:
+			return None
+		content = self.extraction_cache.get(source, *key)
+		if content is not None:
+			logger.debug(f"Serving {source} from the extraction cache")
+		return content
+
+	def cache_file_content(self, source: str, content: str) -> None:
+		"""
+		Save the text extracted from a local file to the extraction cache.
+
+		Args:
+			source (str): Path to a PDF, text, Markdown or HTML file.
+			content (str): Extracted text.
+		"""
+		key = self._file_cache_key(source)
+		if key is not None:
+			self.extraction_cache.put(source, key[0], key[1], content)
+
+	def extract_batch(self, sources: List[str], **kwargs) -> List[Dict[str, Any]]:
+		"""
+		Synchronous wrapper around aextract_batch.
+		"""
+		return asyncio.run(self.aextract_batch(sources, **kwargs))
+
+	async def aextract_batch(
+		self,
+		sources: List[str],
+		max_concurrency: Optional[int] = None,
+		per_host_concurrency: Optional[int] = None,
+		parse_workers: Optional[int] = None,
+	) -> List[Dict[str, Any]]:
+		"""
+		Extract many sources concurrently.
+
+		Downloads run on threads, bounded globally and per host; HTML parsing and
+		local file extraction run in a worker process pool. A failing source is reported
+		in its result instead of aborting the batch.
+
+		Args:
+			sources (List[str]): URLs or file paths.
+			max_concurrency (Optional[int]): Maximum concurrent downloads; defaults
+				to ``content_extractor.batch.max_concurrency``.
+			per_host_concurrency (Optional[int]): Maximum concurrent downloads per
+				host; defaults to ``content_extractor.batch.per_host_concurrency``.
+			parse_workers (Optional[int]): Worker processes for parsing; 0 parses
+				on threads instead. Defaults to ``content_extractor.batch.parse_workers``.
+
+		Returns:
+			List[Dict[str, Any]]: One result per source, in input order, with keys
+			``index``, ``source``, ``status`` ("success" or "error"), ``content`` and ``error``.
+		"""
+		if max_concurrency is None:
+			max_concurrency = self.batch_config.get('max_concurrency', 8)
+		if per_host_concurrency is None:
+			per_host_concurrency = self.batch_config.get('per_host_concurrency', 2)
+		if parse_workers is None:
+			parse_workers = self.batch_config.get('parse_workers', min(4, os.cpu_count() or 1))
+
+		loop = asyncio.get_running_loop()
+		semaphore = asyncio.Semaphore(max_concurrency)
+		host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+		def host_semaphore(source: str) -> asyncio.Semaphore:
+			host = urlparse(self.website_extractor.normalize_url(source)).netloc.lower()
+			if host not in host_semaphores:
+				host_semaphores[host] = asyncio.Semaphore(per_host_concurrency)
+			return host_semaphores[host]
+
+		async def extract_one(index: int, source: str, executor: Optional[Executor]) -> Dict[str, Any]:
+			result = {"index": index, "source": source, "status": "success", "content": None, "error": None}
+			try:
+				source_type = self.source_type(source)
+				if source_type in ("pdf", "text", "html"):
+					result["content"] = await asyncio.to_thread(self.cached_file_content, source)
+					if result["content"] is None:
+						if source_type == "pdf":
+							# Inside the batch pool each PDF is extracted by one process; alone, it shards its pages
+							pdf_workers = 1 if executor is not None else None
+							extract = functools.partial(self.pdf_extractor.extract_content, source, workers=pdf_workers)
+						else:
+							extract = functools.partial(self.text_file_extractor.extract_content, source)
+						result["content"] = await loop.run_in_executor(executor, extract)
+						await asyncio.to_thread(self.cache_file_content, source, result["content"])
+					return result
+
+				if source_type == "youtube":
+					# The transcriber bounds its own requests, whichever YouTube host the URL names
+					result["content"] = await asyncio.to_thread(self.youtube_transcriber.extract_transcript, source)
+					return result
+
+				async with semaphore, host_semaphore(source):
+					page = await asyncio.to_thread(self.website_extractor.fetch, source)
+				if page.text is None:
+					# Parse outside the download limits so slow parsing never holds a connection slot
+					page.text = await loop.run_in_executor(
+						executor, parse_html, page.html,
+						self.website_extractor.unwanted_tags, self.website_extractor.remove_patterns,
+						self.website_extractor.parser_backend, self.website_extractor.strip_invisible,
+						self.website_extractor.main_content, page.url
+					)
+					await asyncio.to_thread(self.website_extractor.store, page)
+				elif page.status == "revalidated":
+					await asyncio.to_thread(self.website_extractor.store, page)
+				result["content"] = page.text
+			except Exception as e:
+				logger.error(f"Error extracting content from {source}: {str(e)}")
+				result["status"] = "error"
+				result["error"] = str(e)
+			return result
+
+		logger.info(
+			f"Extracting {len(sources)} sources (concurrency {max_concurrency}, "
+			f"{per_host_concurrency} per host, {parse_workers} parse workers)"
+		)
+		if parse_workers > 0 and len(sources) > 1:
+			# Downloads already run on threads, so workers must not be forked from this process
+			with ProcessPoolExecutor(max_workers=parse_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+				results = await asyncio.gather(*(extract_one(i, s, executor) for i, s in enumerate(sources)))
+		else:
+			# None runs parsing on the loop's default thread pool
+			results = await asyncio.gather(*(extract_one(i, s, None) for i, s in enumerate(sources)))
+
+		failed = sum(1 for result in results if result["status"] == "error")
+		logger.info(f"Extraction finished: {len(results) - failed} succeeded, {failed} failed")
+		return list(results)
+
+def chunk_pieces(
+	source: str, pieces: Iterable[Tuple[Optional[float], str]], chunk_chars: int
+) -> Iterator[ContentChunk]:
+	"""
+	Regroup located text pieces into chunks of at most ``chunk_chars`` characters.
+
+	Small pieces are merged; large ones are split, preferably at a space. The
+	chunks concatenate to the concatenated pieces.
+
+	Args:
+		source (str): Source the pieces come from.
+		pieces (Iterable[Tuple[Optional[float], str]]): Location and text of each piece.
+		chunk_chars (int): Maximum chunk size in characters.
+
+	Yields:
+		ContentChunk: Chunks with their offset and the location of their first piece.
+	"""
+	offset = 0
+	buffer: List[str] = []
+	buffered = 0
+	location = None
+	for piece_location, text in pieces:
+		while text:
+			if not buffer:
+				location = piece_location
+			room = chunk_chars - buffered
+			if len(text) <= room:
+				buffer.append(text)
+				buffered += len(text)
+				break
+			cut = text.rfind(" ", 0, room) if not buffer else -1
+			# Split an oversized piece at a space; otherwise start a new chunk with it
+			if cut <= 0:
+				cut = room if not buffer else 0
+			if cut:
+				buffer.append(text[:cut])
+				buffered += cut
+				text = text[cut:]
+			chunk = "".join(buffer)
+			yield ContentChunk(source, offset, chunk, location)
+			offset += len(chunk)
+			buffer, buffered = [], 0
+			location = piece_location
+	if buffer:
+		yield ContentChunk(source, offset, "".join(buffer), location)
+
 def main(seed: int = 42) -> None:
 	"""
 	Main function to test the ContentExtractor class.
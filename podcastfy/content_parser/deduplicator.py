@@ -0,0 +1,232 @@
+"""
+Deduplicator Module
+
+This module removes near-duplicate passages across extracted sources, such as
+syndicated paragraphs repeated by several news articles on the same story.
+Sources are split into passages: paragraphs where the text has blank lines,
+and otherwise runs of sentences cut at content-defined boundaries so that the
+same text yields the same passages in every source. Each passage gets a
+MinHash signature of its word shingles; locality-sensitive hashing over
+signature bands finds candidate pairs, which are confirmed by the exact
+Jaccard similarity of their shingle sets. The first occurrence is kept.
+"""
+
+import re
+import zlib
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from podcastfy.utils.config import load_config
+
+logger = logging.getLogger(__name__)
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_WORD = re.compile(r"\w+")
+
+# Multiply-shift hash family; fixed so signatures are stable across runs
+_SEED = 42
+
+
+class NearDuplicateRemover:
+	def __init__(
+		self,
+		threshold: float = 0.8,
+		shingle_size: int = 5,
+		num_perm: int = 64,
+		bands: int = 16,
+		min_chars: int = 80,
+		max_passage_chars: int = 1200,
+	):
+		"""
+		Initialize the NearDuplicateRemover.
+
+		Args:
+			threshold (float): Jaccard similarity of word shingles above which a
+				passage is a near-duplicate of an earlier one.
+			shingle_size (int): Words per shingle.
+			num_perm (int): MinHash signature length.
+			bands (int): LSH bands; must divide ``num_perm``.
+			min_chars (int): Shorter passages, such as headings, are always kept.
+			max_passage_chars (int): Paragraphs longer than this are split into sentence runs.
+
+		Raises:
+			ValueError: If ``bands`` does not divide ``num_perm``.
+		"""
+		if num_perm % bands:
+			raise ValueError(f"bands ({bands}) must divide num_perm ({num_perm})")
+		self.threshold = threshold
+		self.shingle_size = shingle_size
+		self.num_perm = num_perm
+		self.bands = bands
+		self.rows = num_perm // bands
+		self.min_chars = min_chars
+		self.max_passage_chars = max_passage_chars
+		rng = np.random.default_rng(_SEED)
+		# Odd multipliers keep the multiply-shift hashes universal
+		self._a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+		self._b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+
+	@classmethod
+	def from_config(cls, config: Optional[Any] = None) -> Optional["NearDuplicateRemover"]:
+		"""
+		Build a remover from the ``content_extractor.deduplication`` config section.
+
+		Args:
+			config (Optional[Any]): Loaded config; loaded if omitted.
+
+		Returns:
+			Optional[NearDuplicateRemover]: The remover, or None if deduplication is disabled.
+		"""
+		config = config or load_config()
+		dedup_config = config.get('content_extractor', {}).get('deduplication', {})
+		if not dedup_config.get('enabled', True):
+			return None
+		return cls(
+			threshold=dedup_config.get('threshold', 0.8),
+			shingle_size=dedup_config.get('shingle_size', 5),
+			num_perm=dedup_config.get('num_perm', 64),
+			bands=dedup_config.get('bands', 16),
+			min_chars=dedup_config.get('min_chars', 80),
+			max_passage_chars=dedup_config.get('max_passage_chars', 1200),
+		)
+
+	def split_passages(self, text: str) -> List[Tuple[int, int]]:
+		"""
+		Split a text into passages.
+
+		Args:
+			text (str): Source text.
+
+		Returns:
+			List[Tuple[int, int]]: Passage spans covering the whole text, each
+			including the separator that follows it.
+		"""
+		paragraph_starts = [0] + [match.end() for match in _PARAGRAPH_BREAK.finditer(text)]
+		spans = []
+		for start, end in zip(paragraph_starts, paragraph_starts[1:] + [len(text)]):
+			if end - start <= self.max_passage_chars:
+				spans.append((start, end))
+			else:
+				spans.extend(self._split_sentences(text, start, end))
+		return [span for span in spans if span[1] > span[0]]
+
+	def _split_sentences(self, text: str, start: int, end: int) -> List[Tuple[int, int]]:
+		"""Cut a long paragraph into sentence runs at boundaries chosen by sentence content."""
+		sentence_starts = [start] + [match.end() for match in _SENTENCE_END.finditer(text, start, end)]
+		spans = []
+		passage_start = start
+		for sentence_start, sentence_end in zip(sentence_starts, sentence_starts[1:] + [end]):
+			length = sentence_end - passage_start
+			sentence = " ".join(_WORD.findall(text[sentence_start:sentence_end].lower()))
+			# The same sentence ends a passage in every source, so copies split identically
+			content_boundary = zlib.crc32(sentence.encode("utf-8")) % 3 == 0
+			if (length >= self.min_chars and content_boundary) or length >= self.max_passage_chars:
+				spans.append((passage_start, sentence_end))
+				passage_start = sentence_end
+		if passage_start < end:
+			spans.append((passage_start, end))
+		return spans
+
+	def shingles(self, passage: str) -> np.ndarray:
+		"""
+		Return the distinct 32-bit hashes of a passage's lowercased word shingles.
+
+		Args:
+			passage (str): Passage text.
+
+		Returns:
+			np.ndarray: Sorted unique shingle hashes as uint64.
+		"""
+		words = _WORD.findall(passage.lower())
+		size = min(self.shingle_size, len(words)) or 1
+		hashes = {
+			zlib.crc32(" ".join(words[i:i + size]).encode("utf-8"))
+			for i in range(max(1, len(words) - size + 1))
+		}
+		return np.array(sorted(hashes), dtype=np.uint64)
+
+	def signature(self, shingles: np.ndarray) -> np.ndarray:
+		"""
+		Return the MinHash signature of a shingle set.
+
+		Args:
+			shingles (np.ndarray): Shingle hashes.
+
+		Returns:
+			np.ndarray: ``num_perm`` minimum hash values.
+		"""
+		hashed = (self._a[:, None] * shingles[None, :] + self._b[:, None]) >> np.uint64(32)
+		return hashed.min(axis=1)
+
+	def deduplicate(self, sources: List[str]) -> Tuple[List[str], Dict[str, int]]:
+		"""
+		Drop passages that nearly duplicate a passage of an earlier source.
+
+		Args:
+			sources (List[str]): Extracted texts, in priority order.
+
+		Returns:
+			Tuple[List[str], Dict[str, int]]: The texts without near-duplicate
+			passages, and counts ``passages``, ``removed_passages``,
+			``removed_chars`` and ``total_chars``.
+		"""
+		buckets: Dict[Tuple[int, bytes], List[int]] = {}
+		kept_shingles: List[set] = []
+		kept_sources: List[int] = []
+		stats = {"passages": 0, "removed_passages": 0, "removed_chars": 0, "total_chars": sum(map(len, sources))}
+		results = []
+		with np.errstate(over="ignore"):
+			for source_index, text in enumerate(sources):
+				kept_parts = []
+				removed = False
+				for start, end in self.split_passages(text):
+					passage = text[start:end]
+					stats["passages"] += 1
+					if len(passage.strip()) < self.min_chars:
+						kept_parts.append(passage)
+						continue
+					shingles = self.shingles(passage)
+					shingle_set = set(shingles.tolist())
+					signature = self.signature(shingles)
+					band_keys = [
+						(band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+						for band in range(self.bands)
+					]
+					if self._is_duplicate(source_index, shingle_set, band_keys, buckets, kept_shingles, kept_sources):
+						removed = True
+						stats["removed_passages"] += 1
+						stats["removed_chars"] += len(passage)
+						continue
+					kept_parts.append(passage)
+					for key in band_keys:
+						buckets.setdefault(key, []).append(len(kept_shingles))
+					kept_shingles.append(shingle_set)
+					kept_sources.append(source_index)
+				results.append("".join(kept_parts).strip() if removed else text)
+
+		if stats["removed_passages"]:
+			logger.info(
+				f"Removed {stats['removed_passages']} near-duplicate passages "
+				f"({stats['removed_chars']} of {stats['total_chars']} characters)"
+			)
+		return results, stats
+
+	def _is_duplicate(
+		self,
+		source_index: int,
+		shingles: set,
+		band_keys: List[Tuple[int, bytes]],
+		buckets: Dict[Tuple[int, bytes], List[int]],
+		kept_shingles: List[set],
+		kept_sources: List[int],
+	) -> bool:
+		"""Whether a passage is similar enough to a kept passage of another source."""
+		candidates = {candidate for key in band_keys for candidate in buckets.get(key, ())}
+		for candidate in candidates:
+			if kept_sources[candidate] == source_index:
+				continue
+			other = kept_shingles[candidate]
+			if len(shingles & other) / len(shingles | other) >= self.threshold:
+				return True
+		return False
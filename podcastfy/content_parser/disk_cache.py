@@ -0,0 +1,120 @@
+"""
+Disk Cache Module
+
+This module provides the base of the on-disk caches of the content parsers
+(HTTP pages, extracted file text, YouTube transcripts). Files are written
+atomically through per-thread temp files, the total size of the cache is kept
+as a running count taken by one directory walk, and the least recently
+written entries are evicted only once that count exceeds ``max_total_bytes``.
+Subclasses define the file layout of their entries.
+"""
+
+import os
+import logging
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+class DiskCache:
+	def __init__(self, cache_dir: str, max_total_bytes: int):
+		"""
+		Initialize the DiskCache.
+
+		Args:
+			cache_dir (str): Directory holding the cache entries.
+			max_total_bytes (int): Oldest entries are evicted beyond this size.
+		"""
+		self.cache_dir = cache_dir
+		self.max_total_bytes = max_total_bytes
+		# Running size of the entries, taken by the first prune and kept up to date by writes
+		self._total_bytes: Optional[int] = None
+		self._size_lock = threading.Lock()
+
+	def _entries(self) -> Iterator[Tuple[float, int, List[str]]]:
+		"""
+		List the entries that count towards ``max_total_bytes``.
+
+		Every file of the cache directory is one entry; subclasses with another layout override this.
+
+		Yields:
+			Tuple[float, int, List[str]]: Last write time, size and files of each entry.
+		"""
+		yield from self._walk_files(self.cache_dir)
+
+	@staticmethod
+	def _walk_files(root: str) -> Iterator[Tuple[float, int, List[str]]]:
+		"""Yield every file below ``root`` as its own entry, skipping temp files of writes in progress."""
+		for directory, _, files in os.walk(root):
+			for name in files:
+				if name.endswith(".tmp"):
+					continue
+				path = os.path.join(directory, name)
+				try:
+					yield os.path.getmtime(path), os.path.getsize(path), [path]
+				except OSError:
+					continue
+
+	def _store(self, files: Dict[str, Union[str, bytes]]) -> None:
+		"""
+		Atomically write the files of one entry and add them to the running size.
+
+		Args:
+			files (Dict[str, Union[str, bytes]]): Content per file path; text is written as UTF-8.
+		"""
+		old_size = self._stored_size(files)
+		for path, data in files.items():
+			self._write(path, data)
+		self._track(self._stored_size(files) - old_size)
+
+	@staticmethod
+	def _stored_size(paths: Iterable[str]) -> int:
+		"""Return the bytes on disk of the given files."""
+		size = 0
+		for path in paths:
+			try:
+				size += os.path.getsize(path)
+			except OSError:
+				pass
+		return size
+
+	def _track(self, delta: int) -> None:
+		"""Add a write to the running size, pruning only once the cache outgrows ``max_total_bytes``."""
+		with self._size_lock:
+			if self._total_bytes is not None:
+				self._total_bytes += delta
+				if self._total_bytes <= self.max_total_bytes:
+					return
+		self.prune()
+
+	def prune(self) -> None:
+		"""Evict the least recently written entries until the cache fits ``max_total_bytes``."""
+		entries = list(self._entries())
+		total = sum(size for _, size, _ in entries)
+		if total > self.max_total_bytes:
+			for _, size, paths in sorted(entries):
+				for path in paths:
+					try:
+						os.remove(path)
+					except OSError:
+						pass
+				total -= size
+				if total <= self.max_total_bytes:
+					break
+			logger.debug(f"Pruned {self.cache_dir} to {total} bytes")
+		with self._size_lock:
+			self._total_bytes = total
+
+	@staticmethod
+	def _write(path: str, data: Union[str, bytes]) -> None:
+		"""Atomically write a cache file through a temp file private to this process and thread."""
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+		tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+		if isinstance(data, bytes):
+			with open(tmp_path, "wb") as f:
+				f.write(data)
+		else:
+			with open(tmp_path, "w", encoding="utf-8") as f:
+				f.write(data)
+		os.replace(tmp_path, path)
@@ -0,0 +1,140 @@
+"""
+Extraction Cache Module
+
+This module provides a persistent cache of text extracted from local files,
+so the same PDF feeding several episodes is only extracted once. Entries are
+keyed by the file's content hash, the extractor and its settings (version,
+normalization, limits), and hold the text zlib-compressed. Content hashes are
+remembered per path with the file's size and mtime, so an unchanged file is
+looked up without being read again.
+"""
+
+import os
+import json
+import zlib
+import hashlib
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from .disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+_HASH_CHUNK_BYTES = 1024 * 1024
+
+
+class ExtractionCache(DiskCache):
+	def __init__(
+		self,
+		cache_dir: str = "./data/cache/extraction",
+		max_total_bytes: int = 1024 * 1024 * 1024,
+		compression_level: int = 6,
+	):
+		"""
+		Initialize the ExtractionCache.
+
+		Args:
+			cache_dir (str): Directory holding the cache entries.
+			max_total_bytes (int): Oldest entries are evicted beyond this size.
+			compression_level (int): zlib compression level of stored text.
+		"""
+		super().__init__(cache_dir, max_total_bytes)
+		self.compression_level = compression_level
+
+	@classmethod
+	def from_config(cls, content_extractor_config: Dict[str, Any]) -> Optional["ExtractionCache"]:
+		"""
+		Build the cache from the ``content_extractor.extraction_cache`` config section.
+
+		Args:
+			content_extractor_config (Dict[str, Any]): The ``content_extractor`` section.
+
+		Returns:
+			Optional[ExtractionCache]: The cache, or None if it is disabled.
+		"""
+		cache_config = content_extractor_config.get('extraction_cache', {})
+		if not cache_config.get('enabled', True):
+			return None
+		return cls(
+			cache_dir=cache_config.get('cache_dir', "./data/cache/extraction"),
+			max_total_bytes=cache_config.get('max_total_bytes', 1024 * 1024 * 1024),
+			compression_level=cache_config.get('compression_level', 6),
+		)
+
+	def file_hash(self, path: str) -> str:
+		"""
+		Return the sha256 of a file's content, reusing the last hash if its size and mtime are unchanged.
+
+		Args:
+			path (str): Path to the file.
+
+		Returns:
+			str: Hex digest of the file content.
+		"""
+		stat = os.stat(path)
+		path_key = hashlib.sha256(os.path.abspath(path).encode("utf-8")).hexdigest()
+		stat_path = os.path.join(self.cache_dir, "stat", f"{path_key}.json")
+		try:
+			with open(stat_path, "r", encoding="utf-8") as f:
+				known = json.load(f)
+			if known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+				return known["sha256"]
+		except (OSError, ValueError, KeyError):
+			pass
+
+		digest = hashlib.sha256()
+		with open(path, "rb") as f:
+			for chunk in iter(lambda: f.read(_HASH_CHUNK_BYTES), b""):
+				digest.update(chunk)
+		content_hash = digest.hexdigest()
+		try:
+			self._write(stat_path, json.dumps({
+				"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": content_hash
+			}).encode("utf-8"))
+		except OSError as e:
+			logger.warning(f"Could not record the hash of {path}: {str(e)}")
+		return content_hash
+
+	def _entry_path(self, path: str, extractor: str, settings: Dict[str, Any]) -> str:
+		"""Return the entry file of a file's text for an extractor and its settings."""
+		key = hashlib.sha256(
+			json.dumps([self.file_hash(path), extractor, settings], sort_keys=True).encode("utf-8")
+		).hexdigest()
+		return os.path.join(self.cache_dir, "text", key[:2], f"{key}.txt.z")
+
+	def get(self, path: str, extractor: str, settings: Dict[str, Any]) -> Optional[str]:
+		"""
+		Return the cached text of a file.
+
+		Args:
+			path (str): Path to the file.
+			extractor (str): Name of the extractor, e.g. "pdf".
+			settings (Dict[str, Any]): Extractor version and every setting that affects the text.
+
+		Returns:
+			Optional[str]: The text, or None on a miss.
+		"""
+		try:
+			with open(self._entry_path(path, extractor, settings), "rb") as f:
+				return zlib.decompress(f.read()).decode("utf-8")
+		except (OSError, zlib.error, UnicodeDecodeError):
+			return None
+
+	def put(self, path: str, extractor: str, settings: Dict[str, Any], text: str) -> None:
+		"""
+		Store the text extracted from a file.
+
+		Args:
+			path (str): Path to the file.
+			extractor (str): Name of the extractor, e.g. "pdf".
+			settings (Dict[str, Any]): Extractor version and every setting that affects the text.
+			text (str): Extracted text.
+		"""
+		try:
+			data = zlib.compress(text.encode("utf-8"), self.compression_level)
+			self._store({self._entry_path(path, extractor, settings): data})
+		except OSError as e:
+			logger.warning(f"Could not cache the text of {path}: {str(e)}")
+
+	def _entries(self) -> Iterator[Tuple[float, int, List[str]]]:
+		"""List the text entries; the small per-path hash records do not count towards the size."""
+		yield from self._walk_files(os.path.join(self.cache_dir, "text"))
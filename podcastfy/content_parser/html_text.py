@@ -0,0 +1,246 @@
+"""
+HTML Text Module
+
+This module pulls the visible text out of HTML while dropping unwanted
+subtrees (scripts, navigation, footers, ...). Three interchangeable backends
+are provided:
+
+- "stream": a single pass over the standard library tokenizer that skips
+  unwanted subtrees as it goes, without building a tree. It uses the same
+  tokenizer and tag-closing rules as BeautifulSoup's "html.parser" builder, so
+  it yields the same text as the "bs4" backend, several times faster.
+- "lxml": a single iterative walk over an lxml tree that skips unwanted
+  subtrees. Fastest, but libxml2 repairs malformed markup differently, so text
+  can differ on broken pages. Requires the optional lxml package.
+- "bs4": the original BeautifulSoup implementation, one find_all per
+  unwanted tag followed by get_text.
+"""
+
+import html
+import logging
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List
+from bs4 import BeautifulSoup
+from bs4.dammit import EntitySubstitution
+
+logger = logging.getLogger(__name__)
+
+# Elements BeautifulSoup's HTML builder closes immediately
+VOID_ELEMENTS = frozenset({
+	"area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link",
+	"menuitem", "meta", "param", "source", "track", "wbr", "basefont", "bgsound",
+	"command", "frame", "image", "isindex", "nextid", "spacer",
+})
+
+# Elements whose strings BeautifulSoup's get_text leaves out
+NON_TEXT_ELEMENTS = frozenset({"script", "style", "template", "rt", "rp"})
+
+# Elements inside which BeautifulSoup keeps whitespace-only strings as they are
+PRESERVE_WHITESPACE_ELEMENTS = frozenset({"pre", "textarea"})
+
+_ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+
+BACKENDS = ("stream", "lxml", "bs4")
+
+
+class _TextCollector(HTMLParser):
+	"""Collects text nodes outside unwanted and non-text elements in one pass."""
+
+	def __init__(self, unwanted_tags: Iterable[str]):
+		# Character references are resolved here, the way BeautifulSoup does
+		super().__init__(convert_charrefs=False)
+		self.unwanted = frozenset(unwanted_tags)
+		self.stack: List[str] = []
+		# Open unwanted elements drop everything; open non-text elements drop plain text only
+		self.unwanted_depth = 0
+		self.non_text_depth = 0
+		self.preserve_depth = 0
+		# Void elements opened as <br> whose redundant </br> is still to be ignored
+		self.already_closed: Dict[str, int] = {}
+		self.parts: List[str] = []
+		self.buffer: List[str] = []
+
+	def flush(self) -> None:
+		"""Emit buffered data as one text node, as BeautifulSoup merges adjacent data."""
+		if self.buffer:
+			if not self.unwanted_depth and not self.non_text_depth:
+				data = "".join(self.buffer)
+				if not self.preserve_depth and not data.strip(_ASCII_SPACES):
+					data = "\n" if "\n" in data else " "
+				self.parts.append(data)
+			self.buffer.clear()
+
+	def handle_starttag(self, tag, attrs):
+		self.flush()
+		if tag in VOID_ELEMENTS:
+			self.already_closed[tag] = self.already_closed.get(tag, 0) + 1
+			return
+		self._open(tag)
+
+	def handle_startendtag(self, tag, attrs):
+		self.flush()
+		if tag not in VOID_ELEMENTS:
+			self._open(tag)
+		self._close(tag)
+
+	def handle_endtag(self, tag):
+		if self.already_closed.get(tag):
+			self.already_closed[tag] -= 1
+			return
+		self._close(tag)
+
+	def _open(self, tag: str) -> None:
+		self.stack.append(tag)
+		self._count(tag, 1)
+
+	def _close(self, tag: str) -> None:
+		self.flush()
+		if tag not in self.stack:
+			return
+		# Closing a tag implicitly closes everything opened inside it
+		while self.stack:
+			closed = self.stack.pop()
+			self._count(closed, -1)
+			if closed == tag:
+				break
+
+	def _count(self, tag: str, step: int) -> None:
+		if tag in self.unwanted:
+			self.unwanted_depth += step
+		if tag in NON_TEXT_ELEMENTS:
+			self.non_text_depth += step
+		if tag in PRESERVE_WHITESPACE_ELEMENTS:
+			self.preserve_depth += step
+
+	def handle_data(self, data):
+		self.buffer.append(data)
+
+	def handle_charref(self, name):
+		self.buffer.append(html.unescape(f"&#{name};"))
+
+	def handle_entityref(self, name):
+		# Unknown entities are kept as literal text, without the semicolon
+		self.buffer.append(EntitySubstitution.HTML_ENTITY_TO_CHARACTER.get(name, f"&{name}"))
+
+	def handle_comment(self, data):
+		self.flush()
+
+	def handle_decl(self, decl):
+		self.flush()
+
+	def handle_pi(self, data):
+		self.flush()
+
+	def unknown_decl(self, data):
+		self.flush()
+		# get_text keeps CDATA even inside non-text elements
+		if data.upper().startswith("CDATA["):
+			if not self.unwanted_depth:
+				self.parts.append(data[len("CDATA["):])
+
+
+def _stream_text(html_text: str, unwanted_tags: Iterable[str]) -> str:
+	"""Extract text with the single-pass standard library backend."""
+	collector = _TextCollector(unwanted_tags)
+	collector.feed(html_text)
+	collector.close()
+	collector.flush()
+	return "\n".join(collector.parts)
+
+
+def _stream_text_chunks(chunks: Iterable[str], unwanted_tags: Iterable[str]) -> str:
+	"""Extract text with the standard library backend, feeding the document piece by piece."""
+	collector = _TextCollector(unwanted_tags)
+	for chunk in chunks:
+		collector.feed(chunk)
+	collector.close()
+	collector.flush()
+	return "\n".join(collector.parts)
+
+
+def _lxml_text(html_text: str, unwanted_tags: Iterable[str]) -> str:
+	"""Extract text with a single iterative walk over an lxml tree."""
+	from lxml import etree, html as lxml_html
+
+	if not html_text.strip():
+		return ""
+	parser = lxml_html.HTMLParser(encoding="utf-8")
+	root = lxml_html.document_fromstring(html_text.encode("utf-8"), parser=parser)
+	skipped = frozenset(unwanted_tags) | NON_TEXT_ELEMENTS
+	parts: List[str] = []
+	walker = etree.iterwalk(root, events=("start", "end"))
+	for event, element in walker:
+		if event == "start":
+			if not isinstance(element.tag, str):
+				# Comments and processing instructions: only their tail is text
+				walker.skip_subtree()
+			elif element.tag in skipped:
+				walker.skip_subtree()
+			elif element.text:
+				parts.append(element.text)
+		elif element.tail and element is not root:
+			parts.append(element.tail)
+	return "\n".join(parts)
+
+
+def _bs4_text(html_text: str, unwanted_tags: Iterable[str]) -> str:
+	"""Extract text with the original BeautifulSoup implementation."""
+	soup = BeautifulSoup(html_text, 'html.parser')
+	for tag in unwanted_tags:
+		for element in soup.find_all(tag):
+			element.decompose()
+	return soup.get_text(separator="\n")
+
+
+def extract_text(html_text: str, unwanted_tags: Iterable[str], backend: str = "stream") -> str:
+	"""
+	Extract the text of an HTML document without its unwanted subtrees.
+
+	Text nodes are separated by newlines; callers normalize whitespace.
+
+	Args:
+		html_text (str): HTML document.
+		unwanted_tags (Iterable[str]): Tags whose whole subtree is dropped.
+		backend (str): "stream", "lxml" or "bs4". "lxml" falls back to
+			"stream" when lxml is not installed.
+
+	Returns:
+		str: Newline-separated text nodes.
+
+	Raises:
+		ValueError: If the backend is unknown.
+	"""
+	if backend == "stream":
+		return _stream_text(html_text, unwanted_tags)
+	if backend == "lxml":
+		try:
+			return _lxml_text(html_text, unwanted_tags)
+		except ImportError:
+			logger.warning("lxml is not installed; using the 'stream' HTML parser backend")
+			return _stream_text(html_text, unwanted_tags)
+	if backend == "bs4":
+		return _bs4_text(html_text, unwanted_tags)
+	raise ValueError(f"Unknown HTML parser backend: {backend}. Use one of {', '.join(BACKENDS)}")
+
+
+def extract_text_chunks(chunks: Iterable[str], unwanted_tags: Iterable[str], backend: str = "stream") -> str:
+	"""
+	Extract the text of an HTML document that arrives in pieces.
+
+	The "stream" backend parses each piece as it arrives, so the document is
+	never held whole; the other backends join the pieces first.
+
+	Args:
+		chunks (Iterable[str]): Consecutive pieces of the HTML document.
+		unwanted_tags (Iterable[str]): Tags whose whole subtree is dropped.
+		backend (str): "stream", "lxml" or "bs4".
+
+	Returns:
+		str: Newline-separated text nodes.
+
+	Raises:
+		ValueError: If the backend is unknown.
+	"""
+	if backend == "stream":
+		return _stream_text_chunks(chunks, unwanted_tags)
+	return extract_text("".join(chunks), unwanted_tags, backend)
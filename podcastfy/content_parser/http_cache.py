@@ -0,0 +1,187 @@
+"""
+HTTP Cache Module
+
+This module provides an on-disk cache of downloaded webpages for the
+WebsiteExtractor. Each entry keeps the response body, its ETag and
+Last-Modified validators and the extracted clean text, so a fresh entry is
+served without any request, and a stale one is revalidated with
+If-None-Match / If-Modified-Since and served from disk on 304 without
+re-parsing. The extracted text is keyed by the parser settings that produced
+it; changing them re-parses the cached body instead of re-downloading it.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from .disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+
+class Page:
+	"""
+	A downloaded or cached webpage.
+
+	``status`` is "downloaded", "revalidated" (304), "fresh" (served from the
+	cache without a request), "no-store" (downloaded, must not be cached) or
+	"partial" (cut short by a download limit, not cached).
+	``text`` is the cached clean text, or None if the page still needs parsing.
+	``final_url`` is the URL the page was served from after redirects.
+	"""
+
+	__slots__ = ("url", "html", "etag", "last_modified", "text", "status", "final_url")
+
+	def __init__(
+		self,
+		url: str,
+		html: str,
+		etag: Optional[str] = None,
+		last_modified: Optional[str] = None,
+		text: Optional[str] = None,
+		status: str = "downloaded",
+		final_url: Optional[str] = None,
+	):
+		self.url = url
+		self.html = html
+		self.etag = etag
+		self.last_modified = last_modified
+		self.text = text
+		self.status = status
+		self.final_url = final_url or url
+
+
+class HTTPCache(DiskCache):
+	def __init__(
+		self,
+		cache_dir: str = "./data/cache/http",
+		max_age: float = 900,
+		max_entry_bytes: int = 5 * 1024 * 1024,
+		max_total_bytes: int = 500 * 1024 * 1024,
+	):
+		"""
+		Initialize the HTTPCache.
+
+		Args:
+			cache_dir (str): Directory holding the cache entries.
+			max_age (float): Seconds an entry is served without revalidation.
+			max_entry_bytes (int): Larger responses are not cached.
+			max_total_bytes (int): Oldest entries are evicted beyond this size.
+		"""
+		super().__init__(cache_dir, max_total_bytes)
+		self.max_age = max_age
+		self.max_entry_bytes = max_entry_bytes
+
+	@classmethod
+	def from_config(cls, website_extractor_config: Dict[str, Any]) -> Optional["HTTPCache"]:
+		"""
+		Build the cache from the ``website_extractor.cache`` config section.
+
+		Args:
+			website_extractor_config (Dict[str, Any]): The ``website_extractor`` section.
+
+		Returns:
+			Optional[HTTPCache]: The cache, or None if it is disabled.
+		"""
+		cache_config = website_extractor_config.get('cache', {})
+		if not cache_config.get('enabled', True):
+			return None
+		return cls(
+			cache_dir=cache_config.get('cache_dir', "./data/cache/http"),
+			max_age=cache_config.get('max_age_seconds', 900),
+			max_entry_bytes=cache_config.get('max_entry_bytes', 5 * 1024 * 1024),
+			max_total_bytes=cache_config.get('max_total_bytes', 500 * 1024 * 1024),
+		)
+
+	def _paths(self, url: str) -> Dict[str, str]:
+		"""Return the metadata and body file paths of an entry."""
+		key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+		base = os.path.join(self.cache_dir, key[:2], key)
+		return {"meta": f"{base}.json", "body": f"{base}.html"}
+
+	def get(self, url: str) -> Optional[Dict[str, Any]]:
+		"""
+		Return the cached entry of a URL.
+
+		Args:
+			url (str): Normalized URL.
+
+		Returns:
+			Optional[Dict[str, Any]]: Entry with ``url``, ``final_url``, ``etag``, ``last_modified``,
+			``fetched_at``, ``texts`` (clean text per parser key) and ``html``, or None.
+		"""
+		paths = self._paths(url)
+		try:
+			with open(paths["meta"], "r", encoding="utf-8") as f:
+				entry = json.load(f)
+			with open(paths["body"], "r", encoding="utf-8") as f:
+				entry["html"] = f.read()
+			return entry
+		except (OSError, ValueError):
+			return None
+
+	def is_fresh(self, entry: Dict[str, Any]) -> bool:
+		"""Whether an entry can be served without revalidation."""
+		return time.time() - entry.get("fetched_at", 0) < self.max_age
+
+	def put(self, page: Page, parser_key: str) -> None:
+		"""
+		Store a downloaded page and its extracted text.
+
+		Args:
+			page (Page): Page with ``html`` and ``text`` set.
+			parser_key (str): Identifies the parser settings that produced ``text``.
+		"""
+		size = len(page.html.encode("utf-8"))
+		if size > self.max_entry_bytes:
+			logger.debug(f"Not caching {page.url}: {size} bytes exceeds the entry limit")
+			return
+		entry = {
+			"url": page.url,
+			"final_url": page.final_url,
+			"etag": page.etag,
+			"last_modified": page.last_modified,
+			"fetched_at": time.time(),
+			"texts": {parser_key: page.text},
+		}
+		paths = self._paths(page.url)
+		self._store({paths["body"]: page.html, paths["meta"]: json.dumps(entry)})
+
+	def update(self, url: str, parser_key: str, text: str, revalidated: bool = False) -> None:
+		"""
+		Record the text of a cached entry for ``parser_key``, without touching its body.
+
+		Args:
+			url (str): Normalized URL.
+			parser_key (str): Identifies the parser settings that produced ``text``.
+			text (str): Extracted clean text.
+			revalidated (bool): The server confirmed the entry (304); restart its freshness.
+		"""
+		meta_path = self._paths(url)["meta"]
+		try:
+			with open(meta_path, "r", encoding="utf-8") as f:
+				entry = json.load(f)
+		except (OSError, ValueError):
+			return
+		if revalidated:
+			entry["fetched_at"] = time.time()
+		# Only the current parser's text is kept; older settings are not asked for again
+		entry["texts"] = {parser_key: text}
+		self._store({meta_path: json.dumps(entry)})
+
+	def _entries(self) -> Iterator[Tuple[float, int, List[str]]]:
+		"""List each page as its metadata and body files, aged by the metadata's last write."""
+		for root, _, files in os.walk(self.cache_dir):
+			for name in files:
+				if not name.endswith(".json"):
+					continue
+				meta_path = os.path.join(root, name)
+				body_path = meta_path[:-len(".json")] + ".html"
+				try:
+					size = os.path.getsize(meta_path) + os.path.getsize(body_path)
+					mtime = os.path.getmtime(meta_path)
+				except OSError:
+					continue
+				yield mtime, size, [meta_path, body_path]
@@ -0,0 +1,263 @@
+"""
+Main Content Module
+
+This module extracts the main content of a web page, readability-style, so that
+menus nested in plain divs, cookie banners, comment threads and related-article
+rails do not reach the LLM. The page is parsed into a lightweight element tree
+with the standard library tokenizer, dropping unwanted and non-text subtrees.
+Every paragraph-like block scores its parent and grandparent by its length and
+commas; candidates are weighted by their class and id names and penalized by
+their link density. The best candidate is kept together with siblings that
+score close to it, and link-heavy or negatively named blocks inside it are
+dropped. Pages without a clear article body keep all of their text.
+"""
+
+import re
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from .html_text import NON_TEXT_ELEMENTS, VOID_ELEMENTS
+
+# Class and id names that mark article bodies and page clutter
+_POSITIVE_NAMES = re.compile(r"article|body|content|entry|h-?entry|main|page|post|text|blog|story", re.I)
+_NEGATIVE_NAMES = re.compile(
+	r"-ad-|^ad$|advert|banner|breadcrumb|combx|comment|com-|consent|contact|cookie|disqus|foot|gdpr|"
+	r"masthead|menu|meta|modal|nav|newsletter|outbrain|popup|promo|related|recommend|share|shoutbox|"
+	r"sidebar|skyscraper|social|sponsor|shopping|subscribe|tags|taboola|tool|widget",
+	re.I,
+)
+
+# Blocks whose text is scored as a paragraph
+PARAGRAPH_TAGS = frozenset({"p", "pre", "td", "blockquote"})
+
+# Elements that make a div a container rather than a paragraph
+BLOCK_TAGS = frozenset({
+	"address", "article", "aside", "blockquote", "dl", "div", "fieldset", "figure", "footer", "form",
+	"h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "nav", "ol", "p", "pre",
+	"section", "table", "ul",
+})
+
+# Containers dropped from the kept content when they are mostly links
+LINK_LIST_TAGS = frozenset({"div", "section", "ul", "ol", "dl", "table", "form", "aside", "nav", "menu"})
+
+_TAG_SCORES = {
+	"div": 5, "article": 5, "main": 5, "section": 3, "pre": 3, "td": 3, "blockquote": 3,
+	"address": -3, "ol": -3, "ul": -3, "dl": -3, "dd": -3, "dt": -3, "li": -3, "form": -3,
+	"h1": -5, "h2": -5, "h3": -5, "h4": -5, "h5": -5, "h6": -5, "th": -5,
+}
+
+# Paragraphs shorter than this do not score their ancestors
+_MIN_PARAGRAPH_CHARS = 25
+
+
+class _Node:
+	"""An element of the page with the text statistics used for scoring."""
+
+	__slots__ = (
+		"tag", "weight", "parent", "children", "skipped",
+		"text_chars", "link_chars", "commas", "contains_block", "score", "is_candidate",
+	)
+
+	def __init__(self, tag: str, weight: int, parent: Optional["_Node"], skipped: bool = False):
+		self.tag = tag
+		self.weight = weight
+		self.parent = parent
+		self.children: List[Union["_Node", str]] = []
+		self.skipped = skipped
+		self.text_chars = 0
+		self.link_chars = 0
+		self.commas = 0
+		self.contains_block = False
+		self.score = 0.0
+		self.is_candidate = False
+
+	def link_density(self) -> float:
+		return self.link_chars / self.text_chars if self.text_chars else 0.0
+
+
+def class_weight(attrs: Iterable[Tuple[str, Optional[str]]]) -> int:
+	"""
+	Weigh an element by its class and id names.
+
+	Args:
+		attrs (Iterable[Tuple[str, Optional[str]]]): Element attributes.
+
+	Returns:
+		int: +25 per name attribute that looks like content, -25 per one that looks like clutter.
+	"""
+	weight = 0
+	for name, value in attrs:
+		if name in ("class", "id") and value:
+			if _NEGATIVE_NAMES.search(value):
+				weight -= 25
+			if _POSITIVE_NAMES.search(value):
+				weight += 25
+	return weight
+
+
+class _TreeBuilder(HTMLParser):
+	"""Builds the element tree, keeping unwanted and non-text subtrees only as skipped leaves."""
+
+	def __init__(self, unwanted_tags: Iterable[str]):
+		super().__init__(convert_charrefs=True)
+		self.skipped_tags = frozenset(unwanted_tags) | NON_TEXT_ELEMENTS
+		self.root = _Node("[document]", 0, None)
+		self.current = self.root
+		# Open elements by tag, to ignore end tags of elements that are not open
+		self.open_tags: Dict[str, int] = {}
+		self.skip_depth = 0
+
+	def handle_starttag(self, tag, attrs):
+		if tag in VOID_ELEMENTS:
+			return
+		skipped = tag in self.skipped_tags
+		node = _Node(tag, 0 if skipped else class_weight(attrs), self.current, skipped)
+		self.current.children.append(node)
+		self.current = node
+		self.open_tags[tag] = self.open_tags.get(tag, 0) + 1
+		self.skip_depth += skipped
+
+	def handle_startendtag(self, tag, attrs):
+		pass
+
+	def handle_endtag(self, tag):
+		if not self.open_tags.get(tag):
+			return
+		# Closing a tag implicitly closes everything opened inside it
+		while self.current is not self.root:
+			closed = self.current
+			self.current = closed.parent
+			self.open_tags[closed.tag] -= 1
+			self.skip_depth -= closed.skipped
+			if closed.tag == tag:
+				break
+
+	def handle_data(self, data):
+		if not self.skip_depth:
+			self.current.children.append(data)
+
+
+def _score(root: _Node) -> List[_Node]:
+	"""Compute text statistics bottom-up and score candidates; return the candidates."""
+	order = []
+	stack = [root]
+	while stack:
+		node = stack.pop()
+		order.append(node)
+		stack.extend(child for child in node.children if isinstance(child, _Node) and not child.skipped)
+
+	for node in reversed(order):
+		for child in node.children:
+			if isinstance(child, str):
+				node.text_chars += len(child.strip())
+				node.commas += child.count(",")
+			elif not child.skipped:
+				node.text_chars += child.text_chars
+				node.link_chars += child.link_chars
+				node.commas += child.commas
+				node.contains_block = node.contains_block or child.contains_block or child.tag in BLOCK_TAGS
+		if node.tag == "a":
+			node.link_chars = node.text_chars
+
+	candidates = []
+	for node in order:
+		is_paragraph = node.tag in PARAGRAPH_TAGS or (node.tag in ("div", "section") and not node.contains_block)
+		if not is_paragraph or node.text_chars < _MIN_PARAGRAPH_CHARS:
+			continue
+		content_score = 1 + node.commas + min(node.text_chars // 100, 3)
+		ancestor = node.parent
+		for level in range(3):
+			if ancestor is None or ancestor is root:
+				break
+			if not ancestor.is_candidate:
+				ancestor.is_candidate = True
+				ancestor.score = _TAG_SCORES.get(ancestor.tag, 0) + ancestor.weight
+				candidates.append(ancestor)
+			ancestor.score += content_score / (1 if level == 0 else 2 if level == 1 else level * 3)
+			ancestor = ancestor.parent
+
+	for candidate in candidates:
+		candidate.score *= 1 - candidate.link_density()
+	return candidates
+
+
+def _collect_text(node: _Node, parts: List[str], max_link_density: Optional[float] = None) -> None:
+	"""Append the text nodes under a node, dropping clutter blocks when ``max_link_density`` is set."""
+	stack: List[Union[_Node, str]] = [node]
+	while stack:
+		item = stack.pop()
+		if isinstance(item, str):
+			parts.append(item)
+			continue
+		if item.skipped:
+			continue
+		if max_link_density is not None and item is not node and (
+			item.weight < 0 or (item.tag in LINK_LIST_TAGS and item.link_density() > max_link_density)
+		):
+			continue
+		stack.extend(reversed(item.children))
+
+
+def _node_text(node: _Node) -> str:
+	parts: List[str] = []
+	_collect_text(node, parts)
+	return " ".join("".join(parts).split())
+
+
+def extract_main_text(
+	html_text: str,
+	unwanted_tags: Iterable[str],
+	min_chars: int = 250,
+	max_link_density: float = 0.5,
+) -> Tuple[Optional[str], str]:
+	"""
+	Extract the text of a page's main content and of the whole page.
+
+	Text nodes are separated by newlines, as by html_text.extract_text;
+	callers normalize whitespace.
+
+	Args:
+		html_text (str): HTML document.
+		unwanted_tags (Iterable[str]): Tags whose whole subtree is dropped.
+		min_chars (int): Main content shorter than this is not trusted, and None is returned for it.
+		max_link_density (float): Share of link text above which a list or container
+			inside the main content is dropped as navigation.
+
+	Returns:
+		Tuple[Optional[str], str]: The main content text, or None if no article body
+		was found, and the text of the whole page.
+	"""
+	builder = _TreeBuilder(unwanted_tags)
+	builder.feed(html_text)
+	builder.close()
+	root = builder.root
+	candidates = _score(root)
+
+	full_parts: List[str] = []
+	_collect_text(root, full_parts)
+	full_text = "\n".join(full_parts)
+	if not candidates:
+		return None, full_text
+	top = max(candidates, key=lambda candidate: candidate.score)
+
+	# Keep siblings that score close to the best block, like the parts of an article split by ads
+	threshold = max(10.0, top.score * 0.2)
+	selected = []
+	for sibling in top.parent.children:
+		if not isinstance(sibling, _Node) or sibling.skipped:
+			continue
+		if sibling is top or (sibling.is_candidate and sibling.score >= threshold):
+			selected.append(sibling)
+		elif sibling.tag == "p" and sibling.weight >= 0:
+			link_density = sibling.link_density()
+			if sibling.text_chars > 80 and link_density < 0.25:
+				selected.append(sibling)
+			elif sibling.text_chars and link_density == 0 and _node_text(sibling).endswith("."):
+				selected.append(sibling)
+
+	main_parts: List[str] = []
+	for node in selected:
+		_collect_text(node, main_parts, max_link_density)
+	main_text = "\n".join(main_parts)
+	if len(main_text.strip()) < min_chars:
+		return None, full_text
+	return main_text, full_text
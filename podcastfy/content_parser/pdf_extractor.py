@@ -4,40 +4,443 @@ PDF Extractor Module
 This module provides functionality to extract text content from PDF files.
 It handles the reading of PDF files, text extraction, and normalization of
 the extracted content, including handling of special characters and accents.
+Large documents are split into page ranges that are extracted in parallel by a
+process pool, each worker opening the document itself; page text is yielded
+in order as soon as it is ready.
+
+In layout mode, pages are read as PyMuPDF text blocks with font metadata:
+running headers, footers and page numbers repeated in the page margins,
+rotated margin stamps and first-page affiliations are dropped, headings are
+recognized by font size and weight, and configured sections such as the
+references are skipped before any text is emitted.
 """
 
 import pymupdf
+import re
+import math
 import logging
+import multiprocessing
 import os
-import unicodedata
+import functools
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from podcastfy.utils.config import load_config
+from .text_normalizer import get_normalizer, normalizer_settings
 
 logger = logging.getLogger(__name__)
 
+# Bump when extraction or normalization changes so cached text is re-extracted
+EXTRACTOR_VERSION = "3"
+
+# Margin lines that are only a page number, e.g. "7", "- 7 -", "Page 7 of 22", "7/22"
+_PAGE_NUMBER_PATTERN = re.compile(r"^\W*(page\s*)?\d+(\s*(of|/)\s*\d+)?\W*$", re.I)
+_AFFILIATION_PATTERN = re.compile(
+	r"@|e-?mail|universit|institut|department|laborator|school of|college|cent(er|re) for|faculty", re.I
+)
+_HEADING_NUMBER_PATTERN = re.compile(r"^(\d+(\.\d+)*|[ivxlc]+)\.?\s+")
+# Headings contain a word; large figure labels and formulas such as "G(t)" or "b(v) = ∑" do not count
+_HEADING_WORD_PATTERN = re.compile(r"[^\W\d_]{3}")
+
+# Span flag of bold text
+_BOLD = 16
+
+# Segment of a page in layout mode: heading text (or None), font size, text
+Segment = Tuple[Optional[str], float, str]
+
 class PDFExtractor:
-	def extract_content(self, file_path: str) -> str:
+	def __init__(self):
+		"""
+		Initialize the PDFExtractor.
+		"""
+		self.config = load_config()
+		self.pdf_extractor_config = self.config.get('pdf_extractor', {})
+		self.workers = self.pdf_extractor_config.get('workers', min(4, os.cpu_count() or 1))
+		self.pages_per_shard = self.pdf_extractor_config.get('pages_per_shard', 16)
+		self.parallel_min_pages = self.pdf_extractor_config.get('parallel_min_pages', 64)
+		self.max_pages = self.pdf_extractor_config.get('max_pages')
+		self.max_chars = self.pdf_extractor_config.get('max_chars')
+		self.normalization = normalizer_settings("pdf", self.config)
+		layout_config = self.pdf_extractor_config.get('layout', {})
+		self.layout: Optional[Dict[str, Any]] = {
+			"margin_fraction": layout_config.get('margin_fraction', 0.08),
+			"sample_pages": layout_config.get('sample_pages', 12),
+			"drop_sections": [section.lower() for section in layout_config.get('drop_sections', [])],
+		} if layout_config.get('enabled', False) else None
+
+	def cache_settings(self) -> Dict[str, Any]:
+		"""
+		Return everything that affects the extracted text, for keying cached results.
+
+		Returns:
+			Dict[str, Any]: Extractor version, normalization settings, limits and layout settings.
+		"""
+		settings = {
+			"version": EXTRACTOR_VERSION,
+			"normalization": self.normalization,
+			"max_pages": self.max_pages,
+			"max_chars": self.max_chars,
+		}
+		if self.layout:
+			settings["layout"] = self.layout
+		return settings
+
+	def extract_content(
+		self,
+		file_path: str,
+		max_pages: Optional[int] = None,
+		max_chars: Optional[int] = None,
+		workers: Optional[int] = None,
+	) -> str:
 		"""
 		Extract text content from a PDF file, handling foreign characters and special characters.
 		Accents are removed from the text.
 
 		Args:
 			file_path (str): Path to the PDF file.
+			max_pages (Optional[int]): Stop after this many pages; defaults to ``pdf_extractor.max_pages``.
+			max_chars (Optional[int]): Stop after this many characters; defaults to ``pdf_extractor.max_chars``.
+			workers (Optional[int]): Worker processes; 1 extracts in this process.
+				Defaults to ``pdf_extractor.workers``.
 
 		Returns:
 			str: Extracted text content with accents removed and properly handled characters.
 		"""
 		try:
-			doc = pymupdf.open(file_path)
-			content = " ".join(page.get_text() for page in doc)
-			doc.close()
-			
-			# Normalize the text to handle special characters and remove accents
-			normalized_content = unicodedata.normalize('NFKD', content)
-
-			return normalized_content
+			return "".join(text for _, text in self.iter_content(file_path, max_pages, max_chars, workers))
 		except Exception as e:
 			logger.error(f"Error extracting PDF content: {str(e)}")
 			raise
 
+	def iter_content(
+		self,
+		file_path: str,
+		max_pages: Optional[int] = None,
+		max_chars: Optional[int] = None,
+		workers: Optional[int] = None,
+	) -> Iterator[Tuple[int, str]]:
+		"""
+		Yield the text of extract_content page by page, without holding the whole document.
+
+		Pages after the first start with the separating space, so the pieces
+		concatenate to exactly what extract_content returns.
+
+		Args:
+			file_path (str): Path to the PDF file.
+			max_pages (Optional[int]): Stop after this many pages; defaults to ``pdf_extractor.max_pages``.
+			max_chars (Optional[int]): Stop after this many characters, separators
+				included; defaults to ``pdf_extractor.max_chars``.
+			workers (Optional[int]): Worker processes; 1 extracts in this process.
+				Defaults to ``pdf_extractor.workers``.
+
+		Yields:
+			Tuple[int, str]: 1-based page number and its text.
+		"""
+		if max_chars is None:
+			max_chars = self.max_chars
+		remaining = max_chars
+		for index, text in enumerate(self.iter_pages(file_path, max_pages, max_chars, workers)):
+			if index:
+				text = " " + text
+			if remaining is not None:
+				if remaining <= 0:
+					return
+				text = text[:remaining]
+				remaining -= len(text)
+			yield index + 1, text
+
+	def iter_pages(
+		self,
+		file_path: str,
+		max_pages: Optional[int] = None,
+		max_chars: Optional[int] = None,
+		workers: Optional[int] = None,
+	) -> Iterator[str]:
+		"""
+		Yield the normalized text of each page, in page order.
+
+		Documents with at least ``parallel_min_pages`` pages are split into
+		ranges of ``pages_per_shard`` pages extracted by a process pool; only
+		a few ranges per worker are in flight at a time, and none are started
+		once a cap is reached. In layout mode, boilerplate and dropped sections
+		are removed first, so a page inside the references yields "".
+
+		Args:
+			file_path (str): Path to the PDF file.
+			max_pages (Optional[int]): Stop after this many pages; defaults to ``pdf_extractor.max_pages``.
+			max_chars (Optional[int]): Stop after this many characters, truncating
+				the last page; defaults to ``pdf_extractor.max_chars``.
+			workers (Optional[int]): Worker processes; 1 extracts in this process.
+				Defaults to ``pdf_extractor.workers``.
+
+		Yields:
+			str: NFKD-normalized page text.
+		"""
+		if max_pages is None:
+			max_pages = self.max_pages
+		if max_chars is None:
+			max_chars = self.max_chars
+		if workers is None:
+			workers = self.workers
+
+		with pymupdf.open(file_path) as doc:
+			page_count = doc.page_count
+			profile = layout_profile(doc, self.layout) if self.layout else None
+		if max_pages is not None:
+			page_count = min(page_count, max_pages)
+		shards = [
+			(start, min(start + self.pages_per_shard, page_count))
+			for start in range(0, page_count, self.pages_per_shard)
+		]
+
+		if self.layout:
+			task = functools.partial(
+				extract_page_range_layout, file_path,
+				normalization=self.normalization, layout=self.layout, profile=profile
+			)
+			pages = filter_sections(self._iter_shards(task, shards, workers, page_count), self.layout["drop_sections"])
+		else:
+			task = functools.partial(extract_page_range, file_path, normalization=self.normalization)
+			pages = self._iter_shards(task, shards, workers, page_count)
+
+		remaining = max_chars
+		for text in pages:
+			if remaining is not None:
+				if remaining <= 0:
+					return
+				text = text[:remaining]
+				remaining -= len(text)
+			yield text
+
+	def _iter_shards(self, task: Callable[[int, int], List[Any]], shards: List[tuple], workers: int, page_count: int) -> Iterator[Any]:
+		"""Yield the pages ``task`` extracts, shard by shard, in this process or in a bounded pool."""
+		if workers <= 1 or page_count < self.parallel_min_pages or len(shards) <= 1:
+			for start, end in shards:
+				yield from task(start, end)
+			return
+
+		logger.debug(f"Extracting {page_count} pages with {workers} workers")
+		pending = deque()
+		shard_iter = iter(shards)
+		# The caller may already run threads (e.g. batch downloads), so workers must not be forked
+		with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+			try:
+				for start, end in shard_iter:
+					pending.append(executor.submit(task, start, end))
+					if len(pending) >= workers * 2:
+						break
+				while pending:
+					texts = pending.popleft().result()
+					# Keep the pool busy while the caller consumes this shard
+					for start, end in shard_iter:
+						pending.append(executor.submit(task, start, end))
+						break
+					yield from texts
+			finally:
+				# The caller stopped early or a shard failed: drop queued shards
+				for future in pending:
+					future.cancel()
+
+def extract_page_range(
+	file_path: str, start: int, end: int, normalization: Optional[Dict[str, Any]] = None
+) -> List[str]:
+	"""
+	Extract and normalize the text of pages ``start`` to ``end - 1``.
+
+	Module-level so that it can run in a worker process, which opens the
+	document itself.
+
+	Args:
+		file_path (str): Path to the PDF file.
+		start (int): First page index.
+		end (int): Page index after the last page.
+		normalization (Optional[Dict[str, Any]]): Normalizer settings; NFKD only if omitted.
+
+	Returns:
+		List[str]: Normalized text of each page.
+	"""
+	# Normalize the text to handle special characters and remove accents
+	normalizer = get_normalizer(**(normalization or {"unicode_form": "NFKD"}))
+	with pymupdf.open(file_path) as doc:
+		return [normalizer.normalize(doc[index].get_text()) for index in range(start, end)]
+
+def _signature(text: str) -> str:
+	"""Key of a margin line that is equal on every page it repeats on, whatever the page number."""
+	return re.sub(r"[\W_]+", "", re.sub(r"\d+", "0", text.lower()))
+
+def _is_rotated(line: Dict[str, Any]) -> bool:
+	return abs(line["dir"][1]) > 0.1
+
+def layout_profile(doc: "pymupdf.Document", layout: Dict[str, Any]) -> Dict[str, Any]:
+	"""
+	Find the body font size and the running headers and footers of a document.
+
+	Up to ``sample_pages`` pages spread over the document are read; a margin
+	line is a running header or footer if it is on at least half of them.
+
+	Args:
+		doc (pymupdf.Document): Open document.
+		layout (Dict[str, Any]): Layout settings of PDFExtractor.
+
+	Returns:
+		Dict[str, Any]: ``body_size``, the most common font size by characters,
+		and ``boilerplate``, the signatures of repeated margin lines.
+	"""
+	page_count = doc.page_count
+	samples = min(page_count, layout["sample_pages"])
+	indexes = sorted({round(i * (page_count - 1) / max(samples - 1, 1)) for i in range(samples)})
+	sizes: Counter = Counter()
+	margin_lines: Counter = Counter()
+	for index in indexes:
+		page = doc[index]
+		margin = page.rect.height * layout["margin_fraction"]
+		signatures = set()
+		for block in page.get_text("dict", flags=pymupdf.TEXTFLAGS_TEXT)["blocks"]:
+			for line in block["lines"]:
+				middle = (line["bbox"][1] + line["bbox"][3]) / 2
+				if middle < page.rect.y0 + margin or middle > page.rect.y1 - margin:
+					signatures.add(_signature("".join(span["text"] for span in line["spans"])))
+				elif not _is_rotated(line):
+					for span in line["spans"]:
+						sizes[round(span["size"], 1)] += len(span["text"].strip())
+		margin_lines.update(signatures)
+	threshold = max(2, math.ceil(len(indexes) / 2))
+	return {
+		"body_size": sizes.most_common(1)[0][0] if sizes else 10.0,
+		"boilerplate": sorted(signature for signature, count in margin_lines.items() if signature and count >= threshold),
+	}
+
+def extract_page_range_layout(
+	file_path: str,
+	start: int,
+	end: int,
+	normalization: Optional[Dict[str, Any]] = None,
+	layout: Optional[Dict[str, Any]] = None,
+	profile: Optional[Dict[str, Any]] = None,
+) -> List[List[Segment]]:
+	"""
+	Extract the text blocks of pages ``start`` to ``end - 1`` without page boilerplate.
+
+	Module-level so that it can run in a worker process. Margin lines that
+	are running headers, footers or page numbers, rotated lines, and small
+	print with affiliations or emails and blocks of affiliation lines on the
+	first page are dropped. Lines
+	that are short and bold or larger than the body text are headings; a
+	paragraph that starts with a short bold run, like "Funding. This work...",
+	has that run as its heading.
+
+	Args:
+		file_path (str): Path to the PDF file.
+		start (int): First page index.
+		end (int): Page index after the last page.
+		normalization (Optional[Dict[str, Any]]): Normalizer settings; NFKD only if omitted.
+		layout (Optional[Dict[str, Any]]): Layout settings of PDFExtractor.
+		profile (Optional[Dict[str, Any]]): Result of layout_profile.
+
+	Returns:
+		List[List[Segment]]: For each page, its blocks as (heading or None, font size, normalized text).
+	"""
+	normalizer = get_normalizer(**(normalization or {"unicode_form": "NFKD"}))
+	margin_fraction = (layout or {}).get("margin_fraction", 0.08)
+	body_size = (profile or {}).get("body_size", 10.0)
+	boilerplate = frozenset((profile or {}).get("boilerplate", ()))
+	pages = []
+	with pymupdf.open(file_path) as doc:
+		for index in range(start, end):
+			page = doc[index]
+			margin = page.rect.height * margin_fraction
+			segments: List[Segment] = []
+			for block in page.get_text("dict", flags=pymupdf.TEXTFLAGS_TEXT)["blocks"]:
+				lines = []
+				for line in block["lines"]:
+					text = "".join(span["text"] for span in line["spans"])
+					if not text.strip() or _is_rotated(line):
+						continue
+					middle = (line["bbox"][1] + line["bbox"][3]) / 2
+					if (middle < page.rect.y0 + margin or middle > page.rect.y1 - margin) and (
+						_signature(text) in boilerplate or _PAGE_NUMBER_PATTERN.match(text)
+					):
+						continue
+					lines.append((text, [span for span in line["spans"] if span["text"].strip()]))
+				if not lines:
+					continue
+				sizes: Counter = Counter()
+				for _, spans in lines:
+					for span in spans:
+						sizes[span["size"]] += len(span["text"])
+				if index == 0:
+					affiliation_lines = sum(1 for text, _ in lines if _AFFILIATION_PATTERN.search(text))
+					small_print = sizes.most_common(1)[0][0] < body_size - 0.25
+					if affiliation_lines * 2 >= len(lines) or (small_print and affiliation_lines):
+						continue
+				# Split the block into heading lines and runs of text lines: [heading, size, lines, is_heading]
+				parts: List[list] = []
+				for text, spans in lines:
+					size = max(span["size"] for span in spans)
+					first = spans[0]
+					is_heading = (
+						first["size"] >= body_size - 0.5 and len(text.strip()) <= 120
+						and (all(span["flags"] & _BOLD for span in spans) or size >= body_size * 1.2)
+						and "=" not in text and _HEADING_WORD_PATTERN.search(text) is not None
+					)
+					if parts and parts[-1][3] == is_heading and (not is_heading or len(parts[-1][2]) < 3):
+						parts[-1][2].append(text)
+					elif is_heading:
+						parts.append([None, size, [text], True])
+					elif first["flags"] & _BOLD and first["size"] >= body_size - 0.5 and len(first["text"].strip()) <= 60:
+						parts.append([first["text"], first["size"], [text], False])
+					else:
+						parts.append([None, size, [text], False])
+				for heading, size, part_lines, is_heading in parts:
+					text = "".join(line + "\n" for line in part_lines)
+					if is_heading:
+						heading = text
+					segments.append((
+						normalizer.normalize(heading).strip() if heading is not None else None, size, normalizer.normalize(text)
+					))
+			pages.append(segments)
+	return pages
+
+def section_name(heading: str) -> str:
+	"""
+	Reduce a heading to the name matched against ``drop_sections``.
+
+	Args:
+		heading (str): Heading text, e.g. "7. References:".
+
+	Returns:
+		str: Lowercased name without numbering, punctuation or extra whitespace, e.g. "references".
+	"""
+	name = " ".join(heading.lower().split())
+	name = _HEADING_NUMBER_PATTERN.sub("", name)
+	return name.strip(" .:;-\u2013\u2014")
+
+def filter_sections(pages: Iterable[List[Segment]], drop_sections: List[str]) -> Iterator[str]:
+	"""
+	Join the blocks of each page, skipping the sections named in ``drop_sections``.
+
+	A dropped section starts at a heading whose name starts with one of
+	``drop_sections`` and ends at the next heading set at least as large,
+	so subheadings and bold reference numbers inside it do not end it.
+
+	Args:
+		pages (Iterable[List[Segment]]): Pages from extract_page_range_layout, in order.
+		drop_sections (List[str]): Lowercased section names.
+
+	Yields:
+		str: Text of each page.
+	"""
+	dropped_size = None
+	for segments in pages:
+		parts = []
+		for heading, size, text in segments:
+			if heading is not None and (dropped_size is None or size >= dropped_size - 0.5):
+				name = section_name(heading)
+				dropped_size = size if name and any(name.startswith(section) for section in drop_sections) else None
+			if dropped_size is None:
+				parts.append(text)
+		yield "".join(parts)
+
 def main(seed: int = 42) -> None:
 	"""
 	Test the PDFExtractor class with a specific PDF file.
@@ -0,0 +1,184 @@
+"""
+Site Crawler Module
+
+This module provides the link and sitemap handling behind the crawl mode of
+the WebsiteExtractor: collecting the links of a page, keeping the ones in the
+crawl scope (same origin, optionally under the start URL's path), and reading
+sitemap URLs from robots.txt and sitemap XML, including sitemap indexes and
+gzipped sitemaps.
+"""
+
+import io
+import gzip
+import logging
+import posixpath
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+from urllib.parse import urljoin, urlparse, urlunparse
+from xml.etree import ElementTree
+
+logger = logging.getLogger(__name__)
+
+# Largest sitemap the protocol allows, uncompressed
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+
+# Links to files that are never HTML pages are not requested
+SKIPPED_EXTENSIONS = frozenset({
+	".7z", ".avi", ".bmp", ".css", ".csv", ".doc", ".docx", ".epub", ".gif", ".gz", ".ico", ".jpeg",
+	".jpg", ".js", ".json", ".m4a", ".mov", ".mp3", ".mp4", ".ogg", ".pdf", ".png", ".ppt", ".pptx",
+	".rar", ".rss", ".svg", ".tar", ".tgz", ".wav", ".webm", ".webp", ".woff", ".woff2", ".xls",
+	".xlsx", ".xml", ".zip",
+})
+
+
+class _LinkCollector(HTMLParser):
+	"""Collects the href of every link and the document's base URL."""
+
+	def __init__(self):
+		super().__init__(convert_charrefs=True)
+		self.base: Optional[str] = None
+		self.hrefs: List[str] = []
+
+	def handle_starttag(self, tag, attrs):
+		if tag == "a":
+			attributes = dict(attrs)
+			href = attributes.get("href")
+			if href and "nofollow" not in (attributes.get("rel") or "").lower():
+				self.hrefs.append(href)
+		elif tag == "base" and self.base is None:
+			self.base = dict(attrs).get("href")
+
+
+def canonical_url(url: str) -> str:
+	"""
+	Return the form of a URL used to recognize pages already seen.
+
+	Args:
+		url (str): Absolute URL.
+
+	Returns:
+		str: The URL with a lowercase scheme and host, no fragment, and "/" for an empty path.
+	"""
+	parsed = urlparse(url)
+	return urlunparse((parsed.scheme.lower(), parsed.netloc.lower(), parsed.path or "/", parsed.params, parsed.query, ""))
+
+
+def extract_links(html_text: str, page_url: str) -> List[str]:
+	"""
+	Return the absolute http(s) URLs a page links to, in document order, without duplicates.
+
+	Args:
+		html_text (str): Page HTML.
+		page_url (str): URL the page was served from, against which relative links resolve.
+
+	Returns:
+		List[str]: Canonical link URLs, without links to non-HTML files.
+	"""
+	collector = _LinkCollector()
+	collector.feed(html_text)
+	collector.close()
+	base = urljoin(page_url, collector.base) if collector.base else page_url
+	links = []
+	seen = set()
+	for href in collector.hrefs:
+		url = urljoin(base, href.strip())
+		parsed = urlparse(url)
+		if parsed.scheme not in ("http", "https"):
+			continue
+		if posixpath.splitext(parsed.path)[1].lower() in SKIPPED_EXTENSIONS:
+			continue
+		url = canonical_url(url)
+		if url not in seen:
+			seen.add(url)
+			links.append(url)
+	return links
+
+
+def crawl_scope(start_url: str, same_path_prefix: bool = False) -> Tuple[str, str]:
+	"""
+	Return the origin and path prefix a crawl from ``start_url`` stays within.
+
+	Args:
+		start_url (str): Canonical start URL.
+		same_path_prefix (bool): Only crawl below the start URL's directory, e.g.
+			/guide/ for https://example.com/guide/intro.
+
+	Returns:
+		Tuple[str, str]: Origin (scheme and host) and path prefix.
+	"""
+	parsed = urlparse(start_url)
+	prefix = "/"
+	if same_path_prefix:
+		prefix = parsed.path if parsed.path.endswith("/") else posixpath.dirname(parsed.path).rstrip("/") + "/"
+	return f"{parsed.scheme}://{parsed.netloc}", prefix
+
+
+def in_scope(url: str, scope: Tuple[str, str]) -> bool:
+	"""
+	Whether a canonical URL is in a crawl scope.
+
+	Args:
+		url (str): Canonical URL.
+		scope (Tuple[str, str]): Result of crawl_scope.
+
+	Returns:
+		bool: True if the URL has the scope's origin and path prefix.
+	"""
+	parsed = urlparse(url)
+	origin, prefix = scope
+	return f"{parsed.scheme}://{parsed.netloc}" == origin and parsed.path.startswith(prefix)
+
+
+def robots_sitemaps(robots_text: str) -> List[str]:
+	"""
+	Return the sitemap URLs declared in a robots.txt file.
+
+	Args:
+		robots_text (str): robots.txt content.
+
+	Returns:
+		List[str]: URLs of "Sitemap:" lines.
+	"""
+	sitemaps = []
+	for line in robots_text.splitlines():
+		name, _, value = line.partition(":")
+		if name.strip().lower() == "sitemap" and value.strip():
+			sitemaps.append(value.strip())
+	return sitemaps
+
+
+def parse_sitemap(body: bytes, max_bytes: int = MAX_SITEMAP_BYTES) -> Tuple[List[str], List[str]]:
+	"""
+	Parse a sitemap or sitemap index.
+
+	Args:
+		body (bytes): Sitemap XML, optionally gzipped.
+		max_bytes (int): Sitemaps larger than this once decompressed are ignored.
+
+	Returns:
+		Tuple[List[str], List[str]]: Page URLs and nested sitemap URLs.
+	"""
+	try:
+		if body[:2] == b"\x1f\x8b":
+			# Decompress at most one byte past the limit, so a gzip bomb stays bounded
+			with gzip.GzipFile(fileobj=io.BytesIO(body)) as f:
+				body = f.read(max_bytes + 1)
+		if len(body) > max_bytes:
+			logger.warning(f"Ignoring a sitemap larger than {max_bytes} bytes")
+			return [], []
+		root = ElementTree.fromstring(body)
+	except (ElementTree.ParseError, OSError, EOFError) as e:
+		logger.debug(f"Ignoring an invalid sitemap: {str(e)}")
+		return [], []
+	pages, sitemaps = [], []
+	for element in root:
+		# Tags are namespaced, e.g. {http://www.sitemaps.org/schemas/sitemap/0.9}url
+		kind = element.tag.rsplit("}", 1)[-1]
+		loc = next((child.text for child in element if child.tag.rsplit("}", 1)[-1] == "loc"), None)
+		if not loc or not loc.strip():
+			continue
+		if kind == "url":
+			pages.append(loc.strip())
+		elif kind == "sitemap":
+			sitemaps.append(loc.strip())
+	return pages, sitemaps
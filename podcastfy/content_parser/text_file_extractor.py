@@ -0,0 +1,149 @@
+"""
+Text File Extractor Module
+
+This module extracts content from local plain text, Markdown and HTML files.
+Files are memory-mapped and decoded incrementally, so a large archive is
+never read into memory twice. Text and Markdown go through the shared text
+normalizer; HTML files go through the website parsing and cleaning pipeline.
+"""
+
+import os
+import mmap
+import codecs
+import logging
+from typing import Any, Dict, Iterator, Optional, Tuple
+from podcastfy.utils.config import load_config
+from .html_text import extract_text_chunks
+from .text_normalizer import get_normalizer, normalizer_settings
+from .website_extractor import clean_content
+
+logger = logging.getLogger(__name__)
+
+# Bump when extraction or normalization changes so cached text is re-extracted
+EXTRACTOR_VERSION = "1"
+
+TEXT_EXTENSIONS = (".txt", ".md", ".markdown")
+HTML_EXTENSIONS = (".html", ".htm")
+
+
+class TextFileExtractor:
+	def __init__(self):
+		"""
+		Initialize the TextFileExtractor.
+		"""
+		self.config = load_config()
+		self.text_file_config = self.config.get('text_file_extractor', {})
+		self.encoding = self.text_file_config.get('encoding', 'utf-8-sig')
+		self.chunk_bytes = self.text_file_config.get('chunk_bytes', 1024 * 1024)
+		self.cache_min_bytes = self.text_file_config.get('cache_min_bytes', 1024 * 1024)
+		website_config = self.config.get('website_extractor', {})
+		self.unwanted_tags = website_config.get('unwanted_tags', [])
+		self.remove_patterns = website_config.get('markdown_cleaning', {}).get('remove_patterns', [])
+		self.parser_backend = website_config.get('parser_backend', 'stream')
+		self.text_normalization = normalizer_settings("text", self.config)
+		self.strip_invisible = normalizer_settings("website", self.config)["strip_invisible"]
+
+	@staticmethod
+	def file_type(file_path: str) -> Optional[str]:
+		"""
+		Return "text" or "html" for a supported file extension, else None.
+
+		Args:
+			file_path (str): Path to the file.
+
+		Returns:
+			Optional[str]: The file type.
+		"""
+		extension = os.path.splitext(file_path)[1].lower()
+		if extension in TEXT_EXTENSIONS:
+			return "text"
+		if extension in HTML_EXTENSIONS:
+			return "html"
+		return None
+
+	def cache_settings(self, file_type: str) -> Dict[str, Any]:
+		"""
+		Return everything that affects the extracted text of a file type, for keying cached results.
+
+		Args:
+			file_type (str): "text" or "html".
+
+		Returns:
+			Dict[str, Any]: Extractor version, encoding and normalization or parser settings.
+		"""
+		settings = {"version": EXTRACTOR_VERSION, "encoding": self.encoding}
+		if file_type == "html":
+			settings.update(
+				unwanted_tags=self.unwanted_tags, remove_patterns=self.remove_patterns,
+				parser_backend=self.parser_backend, strip_invisible=self.strip_invisible
+			)
+		else:
+			settings["normalization"] = self.text_normalization
+		return settings
+
+	def iter_decoded(self, file_path: str) -> Iterator[Tuple[int, str]]:
+		"""
+		Decode a file piece by piece through a read-only memory map.
+
+		Args:
+			file_path (str): Path to the file.
+
+		Yields:
+			Tuple[int, str]: Byte offset of the piece in the file and its decoded text.
+		"""
+		decoder = codecs.getincrementaldecoder(self.encoding)(errors="replace")
+		with open(file_path, "rb") as f:
+			if os.fstat(f.fileno()).st_size == 0:
+				return
+			with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+				size = len(mapped)
+				for offset in range(0, size, self.chunk_bytes):
+					text = decoder.decode(mapped[offset:offset + self.chunk_bytes], final=offset + self.chunk_bytes >= size)
+					if text:
+						yield offset, text
+
+	def iter_content(self, file_path: str) -> Iterator[Tuple[Optional[float], str]]:
+		"""
+		Yield the extracted text of a file piece by piece.
+
+		Text and Markdown pieces are normalized as they are decoded and located
+		by their byte offset; an HTML file is parsed as it is decoded and its
+		cleaned text yielded whole.
+
+		Args:
+			file_path (str): Path to a .txt, .md, .markdown, .html or .htm file.
+
+		Yields:
+			Tuple[Optional[float], str]: Byte offset of the piece (None for HTML) and its text.
+
+		Raises:
+			ValueError: If the file type is unsupported.
+		"""
+		file_type = self.file_type(file_path)
+		if file_type == "html":
+			raw_text = extract_text_chunks(
+				(text for _, text in self.iter_decoded(file_path)), self.unwanted_tags, self.parser_backend
+			)
+			yield None, clean_content(raw_text, self.remove_patterns, self.strip_invisible)
+		elif file_type == "text":
+			normalizer = get_normalizer(**self.text_normalization)
+			for offset, text in self.iter_decoded(file_path):
+				yield offset, normalizer.normalize(text)
+		else:
+			raise ValueError(f"Unsupported file type: {file_path}")
+
+	def extract_content(self, file_path: str) -> str:
+		"""
+		Extract the text of a local text, Markdown or HTML file.
+
+		Args:
+			file_path (str): Path to the file.
+
+		Returns:
+			str: Extracted text content.
+		"""
+		try:
+			return "".join(text for _, text in self.iter_content(file_path))
+		except Exception as e:
+			logger.error(f"Error extracting content from {file_path}: {str(e)}")
+			raise
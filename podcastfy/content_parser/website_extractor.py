@@ -2,17 +2,35 @@
 Website Extractor Module
 
 This module is responsible for extracting clean text content from websites using
-BeautifulSoup for local HTML parsing instead of the Jina AI API.
+local HTML parsing instead of the Jina AI API. The HTML parser backend is
+configurable, see html_text. In main-content mode only the article body of
+each page is kept, see main_content. Multi-page sources can be crawled from a
+start URL, see site_crawler.
 """
 
 import requests
-import re
-import html
+from requests.compat import chardet
+import httpx
+import asyncio
+import json
+import hashlib
+import time
+import random
+import importlib.util
 import logging
 from urllib.parse import urlparse
 from bs4 import BeautifulSoup
 from podcastfy.utils.config import load_config
-from typing import List
+from .http_cache import HTTPCache, Page
+from .html_text import extract_text
+from .main_content import extract_main_text
+from .site_crawler import canonical_url, crawl_scope, extract_links, in_scope, parse_sitemap, robots_sitemaps
+from .text_normalizer import get_normalizer, normalizer_settings
+from podcastfy.utils.token_budget import count_tokens
+from typing import Any, Dict, List, Optional, Tuple
+
+# Bump when parse_html changes so cached clean text is re-derived from cached bodies
+PARSER_VERSION = "2"
 
 logger = logging.getLogger(__name__)
 
@@ -26,11 +44,33 @@ class WebsiteExtractor:
 		self.unwanted_tags = self.website_extractor_config.get('unwanted_tags', [])
 		self.user_agent = self.website_extractor_config.get('user_agent', 'Mozilla/5.0')
 		self.timeout = self.website_extractor_config.get('timeout', 10)
+		download_config = self.website_extractor_config.get('download', {})
+		self.max_bytes = download_config.get('max_bytes', 10 * 1024 * 1024)
+		self.deadline = download_config.get('deadline_seconds', 30)
+		self.chunk_bytes = download_config.get('chunk_bytes', 64 * 1024)
+		self.allowed_content_types = [
+			content_type.lower() for content_type in download_config.get('allowed_content_types', [])
+		]
 		self.remove_patterns = self.website_extractor_config.get('markdown_cleaning', {}).get('remove_patterns', [])
+		self.parser_backend = self.website_extractor_config.get('parser_backend', 'stream')
+		self.strip_invisible = normalizer_settings("website", self.config)["strip_invisible"]
+		main_content_config = self.website_extractor_config.get('main_content', {})
+		self.main_content: Optional[Dict[str, Any]] = {
+			"min_chars": main_content_config.get('min_chars', 250),
+			"max_link_density": main_content_config.get('max_link_density', 0.5),
+		} if main_content_config.get('enabled', False) else None
+		self.crawl_config = self.website_extractor_config.get('crawl', {})
+		# httpx transport override for crawling, e.g. httpx.MockTransport
+		self.transport: Optional[httpx.AsyncBaseTransport] = None
+		self.cache = HTTPCache.from_config(self.website_extractor_config)
+		parser_settings = [PARSER_VERSION, self.parser_backend, self.unwanted_tags, self.remove_patterns, self.strip_invisible]
+		if self.main_content:
+			parser_settings.append(self.main_content)
+		self.parser_key = hashlib.sha256(json.dumps(parser_settings).encode("utf-8")).hexdigest()[:16]
 
 	def extract_content(self, url: str) -> str:
 		"""
-		Extract clean text content from a website using BeautifulSoup.
+		Extract clean text content from a website.
 
 		Args:
 			url (str): Website URL.
@@ -41,33 +81,462 @@ class WebsiteExtractor:
 		Raises:
 			Exception: If there's an error in extracting the content.
 		"""
+		page = self.fetch(url)
+		if page.text is None:
+			page.text = self.parse_html(page.html, url)
+			self.store(page)
+		elif page.status == "revalidated":
+			self.store(page)
+		return page.text
+
+	def fetch(self, url: str) -> Page:
+		"""
+		Download a webpage, going through the HTTP cache.
+
+		Fresh cache entries are returned without a request; stale ones are
+		revalidated with If-None-Match / If-Modified-Since and returned from
+		the cache on 304. Bodies are streamed: a disallowed content type is
+		rejected before the body is read, and a body that exceeds ``max_bytes``
+		or the download deadline is cut short and returned with status "partial".
+
+		Args:
+			url (str): Website URL.
+
+		Returns:
+			Page: The page; ``text`` is set when cached text can be reused.
+
+		Raises:
+			Exception: If the page cannot be downloaded.
+		"""
 		try:
 			# Normalize the URL
 			normalized_url = self.normalize_url(url)
 
-			# Request the webpage
+			entry = self.cache.get(normalized_url) if self.cache else None
+			if entry and self.cache.is_fresh(entry):
+				logger.debug(f"Serving {normalized_url} from the HTTP cache")
+				return Page(
+					normalized_url, entry["html"], entry.get("etag"), entry.get("last_modified"),
+					entry.get("texts", {}).get(self.parser_key), status="fresh", final_url=entry.get("final_url")
+				)
+
+			# Request the webpage, revalidating a stale cache entry
 			headers = {'User-Agent': self.user_agent}
-			response = requests.get(normalized_url, headers=headers, timeout=self.timeout)
-			response.raise_for_status()  # Raise an exception for bad status codes
+			if entry and entry.get("etag"):
+				headers['If-None-Match'] = entry["etag"]
+			if entry and entry.get("last_modified"):
+				headers['If-Modified-Since'] = entry["last_modified"]
+			deadline = time.monotonic() + self.deadline
+			# Stream the body so size, type and deadline limits apply before it is all read
+			with requests.get(normalized_url, headers=headers, timeout=self.timeout, stream=True) as response:
+				if response.status_code == 304 and entry:
+					logger.debug(f"{normalized_url} not modified; serving from the HTTP cache")
+					return Page(
+						normalized_url, entry["html"], entry.get("etag"), entry.get("last_modified"),
+						entry.get("texts", {}).get(self.parser_key), status="revalidated",
+						final_url=entry.get("final_url")
+					)
+				response.raise_for_status()  # Raise an exception for bad status codes
+
+				html_text, partial = self.read_body(response, normalized_url, deadline)
+				no_store = 'no-store' in response.headers.get('Cache-Control', '').lower()
+				status = "partial" if partial else "no-store" if no_store else "downloaded"
+				return Page(
+					normalized_url, html_text, response.headers.get('ETag'),
+					response.headers.get('Last-Modified'), status=status, final_url=response.url
+				)
+		except requests.RequestException as e:
+			logger.error(f"Failed to extract content from {url}: {str(e)}")
+			raise Exception(f"Failed to extract content from {url}: {str(e)}")
+		except Exception as e:
+			logger.error(f"An unexpected error occurred while extracting content from {url}: {str(e)}")
+			raise Exception(f"An unexpected error occurred while extracting content from {url}: {str(e)}")
 
-			# Parse the page content with BeautifulSoup
-			soup = BeautifulSoup(response.text, 'html.parser')
+	def read_body(self, response: requests.Response, url: str, deadline: float) -> Tuple[str, bool]:
+		"""
+		Read a streamed response body within the download limits.
 
-			# Remove unwanted elements
-			self.remove_unwanted_elements(soup)
+		The body is read in chunks until it ends, exceeds ``max_bytes`` or the
+		deadline passes; in the last two cases the part read so far is returned.
 
-			# Extract and clean the text content
-			raw_text = soup.get_text(separator="\n")  # Get all text content
-			cleaned_content = self.clean_content(raw_text)
+		Args:
+			response (requests.Response): Response opened with ``stream=True``.
+			url (str): Page URL, used in messages.
+			deadline (float): ``time.monotonic()`` value after which reading stops.
 
-			return cleaned_content
-		except requests.RequestException as e:
+		Returns:
+			Tuple[str, bool]: The decoded body and whether it was cut short.
+
+		Raises:
+			ValueError: If the response's content type is not allowed.
+		"""
+		self.check_content_type(response.headers.get('Content-Type', ''), url)
+		chunks = []
+		size = 0
+		partial = None
+		for chunk in response.iter_content(chunk_size=self.chunk_bytes):
+			chunks.append(chunk)
+			size += len(chunk)
+			if size > self.max_bytes:
+				partial = f"exceeds {self.max_bytes} bytes"
+				break
+			if time.monotonic() > deadline:
+				partial = f"took longer than {self.deadline} seconds"
+				break
+		return self.decode_body(chunks, partial, url, response.encoding), partial is not None
+
+	async def aread_body(self, response: httpx.Response, url: str, deadline: float) -> Tuple[str, bool]:
+		"""
+		Read a streamed httpx response body within the download limits.
+
+		Same limits as read_body, for the crawler's async client.
+
+		Args:
+			response (httpx.Response): Response opened with ``client.stream``.
+			url (str): Page URL, used in messages.
+			deadline (float): ``time.monotonic()`` value after which reading stops.
+
+		Returns:
+			Tuple[str, bool]: The decoded body and whether it was cut short.
+
+		Raises:
+			ValueError: If the response's content type is not allowed.
+		"""
+		self.check_content_type(response.headers.get('Content-Type', ''), url)
+		chunks, partial = await self.aread_chunks(response, deadline)
+		return self.decode_body(chunks, partial, url, response.charset_encoding), partial is not None
+
+	async def aread_chunks(self, response: httpx.Response, deadline: float) -> Tuple[List[bytes], Optional[str]]:
+		"""
+		Read a streamed httpx response body until it ends or a download limit is hit.
+
+		Args:
+			response (httpx.Response): Response opened with ``client.stream``.
+			deadline (float): ``time.monotonic()`` value after which reading stops.
+
+		Returns:
+			Tuple[List[bytes], Optional[str]]: The chunks read, and why reading
+			stopped early, or None if the body is complete.
+		"""
+		chunks = []
+		size = 0
+		async for chunk in response.aiter_bytes(self.chunk_bytes):
+			chunks.append(chunk)
+			size += len(chunk)
+			if size > self.max_bytes:
+				return chunks, f"exceeds {self.max_bytes} bytes"
+			if time.monotonic() > deadline:
+				return chunks, f"took longer than {self.deadline} seconds"
+		return chunks, None
+
+	def check_content_type(self, content_type_header: str, url: str) -> None:
+		"""
+		Reject a response whose content type is not in ``allowed_content_types``.
+
+		Args:
+			content_type_header (str): Content-Type header value.
+			url (str): Page URL, used in messages.
+
+		Raises:
+			ValueError: If the content type is not allowed.
+		"""
+		content_type = content_type_header.split(';')[0].strip().lower()
+		if content_type and self.allowed_content_types and content_type not in self.allowed_content_types:
+			raise ValueError(f"Content type {content_type} of {url} is not allowed")
+
+	def decode_body(self, chunks: List[bytes], partial: Optional[str], url: str, encoding: Optional[str]) -> str:
+		"""
+		Join and decode the chunks of a body read within the download limits.
+
+		Args:
+			chunks (List[bytes]): Body chunks, in order.
+			partial (Optional[str]): Why reading stopped early, or None if the body is complete.
+			url (str): Page URL, used in messages.
+			encoding (Optional[str]): Declared charset, if any.
+
+		Returns:
+			str: The decoded body, at most ``max_bytes`` long.
+		"""
+		body = b"".join(chunks)[:self.max_bytes]
+		if partial:
+			logger.warning(f"Download of {url} {partial}; using the first {len(body)} bytes")
+
+		# Same decoding as response.text: declared charset, else detected
+		encoding = encoding or chardet.detect(body[:65536]).get('encoding') or 'utf-8'
+		try:
+			return body.decode(encoding, errors='replace')
+		except LookupError:
+			return body.decode('utf-8', errors='replace')
+
+	async def afetch(self, client: httpx.AsyncClient, url: str) -> Page:
+		"""
+		Download a webpage with an async client, going through the HTTP cache.
+
+		Same caching, revalidation and download limits as fetch.
+
+		Args:
+			client (httpx.AsyncClient): Pooled client.
+			url (str): Website URL.
+
+		Returns:
+			Page: The page; ``final_url`` is the URL it was served from after
+			redirects, against which its links resolve.
+
+		Raises:
+			Exception: If the page cannot be downloaded.
+		"""
+		try:
+			normalized_url = self.normalize_url(url)
+			entry = await asyncio.to_thread(self.cache.get, normalized_url) if self.cache else None
+			if entry and self.cache.is_fresh(entry):
+				logger.debug(f"Serving {normalized_url} from the HTTP cache")
+				return Page(
+					normalized_url, entry["html"], entry.get("etag"), entry.get("last_modified"),
+					entry.get("texts", {}).get(self.parser_key), status="fresh", final_url=entry.get("final_url")
+				)
+
+			headers = {}
+			if entry and entry.get("etag"):
+				headers['If-None-Match'] = entry["etag"]
+			if entry and entry.get("last_modified"):
+				headers['If-Modified-Since'] = entry["last_modified"]
+			deadline = time.monotonic() + self.deadline
+			async with client.stream("GET", normalized_url, headers=headers) as response:
+				if response.status_code == 304 and entry:
+					logger.debug(f"{normalized_url} not modified; serving from the HTTP cache")
+					return Page(
+						normalized_url, entry["html"], entry.get("etag"), entry.get("last_modified"),
+						entry.get("texts", {}).get(self.parser_key), status="revalidated",
+						final_url=entry.get("final_url")
+					)
+				response.raise_for_status()
+
+				html_text, partial = await self.aread_body(response, normalized_url, deadline)
+				no_store = 'no-store' in response.headers.get('Cache-Control', '').lower()
+				status = "partial" if partial else "no-store" if no_store else "downloaded"
+				return Page(
+					normalized_url, html_text, response.headers.get('ETag'),
+					response.headers.get('Last-Modified'), status=status, final_url=str(response.url)
+				)
+		except httpx.HTTPError as e:
 			logger.error(f"Failed to extract content from {url}: {str(e)}")
 			raise Exception(f"Failed to extract content from {url}: {str(e)}")
 		except Exception as e:
 			logger.error(f"An unexpected error occurred while extracting content from {url}: {str(e)}")
 			raise Exception(f"An unexpected error occurred while extracting content from {url}: {str(e)}")
 
+	def crawl(self, start_url: str, **kwargs) -> List[Dict[str, Any]]:
+		"""
+		Synchronous wrapper around acrawl.
+		"""
+		return asyncio.run(self.acrawl(start_url, **kwargs))
+
+	async def acrawl(
+		self,
+		start_url: str,
+		max_depth: Optional[int] = None,
+		max_pages: Optional[int] = None,
+		max_concurrency: Optional[int] = None,
+		per_host_concurrency: Optional[int] = None,
+	) -> List[Dict[str, Any]]:
+		"""
+		Crawl a multi-page source, such as a guide, from its start URL.
+
+		Pages are discovered breadth-first from the links of crawled pages and,
+		optionally, the site's sitemap, staying on the origin the start URL is
+		served from after redirects (e.g. www.example.com for example.com). Each
+		depth level is fetched concurrently through one pooled async client,
+		bounded overall and per host. Pages fresh in the HTTP cache with text
+		for the current parser settings are neither requested nor parsed again;
+		their links are read from the cached HTML. A failing page is reported
+		in its result instead of aborting the crawl.
+
+		Args:
+			start_url (str): First page of the source.
+			max_depth (Optional[int]): Link hops followed from the start URL; sitemap
+				pages count as one hop. Defaults to ``website_extractor.crawl.max_depth``.
+			max_pages (Optional[int]): Maximum pages crawled, the start URL included.
+				Defaults to ``website_extractor.crawl.max_pages``.
+			max_concurrency (Optional[int]): Maximum concurrent requests; defaults
+				to ``website_extractor.crawl.max_concurrency``.
+			per_host_concurrency (Optional[int]): Maximum concurrent requests per host;
+				defaults to ``website_extractor.crawl.per_host_concurrency``.
+
+		Returns:
+			List[Dict[str, Any]]: One result per page, in discovery order, with keys
+			``index``, ``source``, ``depth``, ``status`` ("success" or "error"),
+			``content``, ``error`` and ``cached``.
+		"""
+		if max_depth is None:
+			max_depth = self.crawl_config.get('max_depth', 2)
+		if max_pages is None:
+			max_pages = self.crawl_config.get('max_pages', 50)
+		if max_concurrency is None:
+			max_concurrency = self.crawl_config.get('max_concurrency', 8)
+		if per_host_concurrency is None:
+			per_host_concurrency = self.crawl_config.get('per_host_concurrency', 4)
+
+		start = canonical_url(self.normalize_url(start_url))
+		host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+		def host_semaphore(url: str) -> asyncio.Semaphore:
+			host = urlparse(url).netloc.lower()
+			if host not in host_semaphores:
+				host_semaphores[host] = asyncio.Semaphore(per_host_concurrency)
+			return host_semaphores[host]
+
+		async def crawl_one(index: int, url: str, depth: int) -> Tuple[Dict[str, Any], List[str], str]:
+			"""Crawl one page; return its result, its links and the URL it was served from."""
+			result = {
+				"index": index, "source": url, "depth": depth, "status": "success",
+				"content": None, "error": None, "cached": False,
+			}
+			links: List[str] = []
+			page_url = url
+			try:
+				async with host_semaphore(url):
+					page = await self.afetch(client, url)
+				page_url = page.final_url
+				result["cached"] = page.text is not None
+				if page.text is None:
+					page.text = await asyncio.to_thread(self.parse_html, page.html, url)
+					await asyncio.to_thread(self.store, page)
+				elif page.status == "revalidated":
+					await asyncio.to_thread(self.store, page)
+				result["content"] = page.text
+				if depth < max_depth:
+					links = await asyncio.to_thread(extract_links, page.html, page_url)
+			except Exception as e:
+				logger.error(f"Error crawling {url}: {str(e)}")
+				result["status"] = "error"
+				result["error"] = str(e)
+			return result, links, page_url
+
+		limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+		async with httpx.AsyncClient(
+			headers={'User-Agent': self.user_agent}, timeout=self.timeout, limits=limits,
+			follow_redirects=True, transport=self.transport,
+		) as client:
+			# The scope follows the start URL's redirects, e.g. from the apex domain to www
+			result, candidates, page_url = await crawl_one(0, start, 0)
+			served_from = canonical_url(page_url)
+			scope = crawl_scope(served_from, self.crawl_config.get('same_path_prefix', False))
+			seen = {start, served_from}
+			results: List[Dict[str, Any]] = [result]
+			if max_depth > 0 and self.crawl_config.get('use_sitemap', True):
+				# Pages only the sitemap knows come after the start page's own links
+				candidates = candidates + await self._sitemap_urls(client, scope, host_semaphore)
+			depth = 1
+			while True:
+				level = []
+				for url in candidates:
+					if len(seen) >= max_pages:
+						break
+					if url not in seen and in_scope(url, scope):
+						seen.add(url)
+						level.append(url)
+				if not level:
+					break
+				crawled = await asyncio.gather(*(
+					crawl_one(len(results) + i, url, depth) for i, url in enumerate(level)
+				))
+				results.extend(result for result, _, _ in crawled)
+				candidates = [link for _, links, _ in crawled for link in links]
+				depth += 1
+
+		cached = sum(result["cached"] for result in results)
+		failed = sum(result["status"] == "error" for result in results)
+		logger.info(
+			f"Crawled {len(results)} pages from {start} ({cached} from the cache, {failed} failed)"
+		)
+		return results
+
+	async def _sitemap_urls(self, client: httpx.AsyncClient, scope: Tuple[str, str], host_semaphore) -> List[str]:
+		"""
+		Discover page URLs in scope from the sitemaps named in robots.txt, or /sitemap.xml.
+
+		Sitemap indexes are followed up to ``crawl.max_sitemaps`` sitemaps; only
+		sitemaps on the crawl's origin are read. Bodies are streamed under the
+		download limits and decompressed sitemaps are capped at ``max_bytes``.
+		Failures are logged and yield no URLs, since the crawl can proceed from
+		links alone.
+		"""
+		origin = scope[0]
+		origin_scope = (origin, "/")
+		max_sitemaps = self.crawl_config.get('max_sitemaps', 10)
+
+		async def get(url: str) -> Optional[bytes]:
+			try:
+				async with host_semaphore(url):
+					async with client.stream("GET", url) as response:
+						if response.status_code != 200:
+							return None
+						chunks, partial = await self.aread_chunks(response, time.monotonic() + self.deadline)
+			except httpx.HTTPError as e:
+				logger.debug(f"Could not fetch {url}: {str(e)}")
+				return None
+			if partial:
+				# A truncated sitemap is not valid XML
+				logger.warning(f"Ignoring {url}: download {partial}")
+				return None
+			return b"".join(chunks)
+
+		def on_origin(urls: List[str]) -> List[str]:
+			return [url for url in map(canonical_url, urls) if in_scope(url, origin_scope)]
+
+		robots = await get(f"{origin}/robots.txt")
+		declared = robots_sitemaps(robots.decode("utf-8", errors="replace")) if robots is not None else []
+		queue = on_origin(declared) if declared else [f"{origin}/sitemap.xml"]
+		urls: List[str] = []
+		fetched = 0
+		while queue and fetched < max_sitemaps:
+			body = await get(queue.pop(0))
+			fetched += 1
+			if body is None:
+				continue
+			pages, sitemaps = parse_sitemap(body, self.max_bytes)
+			urls.extend(url for url in map(canonical_url, pages) if in_scope(url, scope))
+			queue.extend(on_origin(sitemaps))
+		logger.debug(f"Found {len(urls)} pages in scope in the sitemaps of {origin}")
+		return urls
+
+	def store(self, page: Page) -> None:
+		"""
+		Save a fetched page and its extracted text to the HTTP cache.
+
+		Args:
+			page (Page): Page returned by fetch, with ``text`` set.
+		"""
+		if not self.cache or page.status in ("no-store", "partial"):
+			return
+		try:
+			if page.status == "downloaded":
+				self.cache.put(page, self.parser_key)
+			else:
+				self.cache.update(page.url, self.parser_key, page.text, revalidated=page.status == "revalidated")
+		except OSError as e:
+			logger.warning(f"Could not cache {page.url}: {str(e)}")
+
+	def parse_html(self, html_text: str, url: str = "") -> str:
+		"""
+		Extract clean text content from downloaded HTML.
+
+		Args:
+			html_text (str): Page HTML.
+			url (str): Source URL, used in error messages.
+
+		Returns:
+			str: Extracted clean text content.
+		"""
+		try:
+			return parse_html(
+				html_text, self.unwanted_tags, self.remove_patterns, self.parser_backend,
+				self.strip_invisible, self.main_content, url
+			)
+		except Exception as e:
+			logger.error(f"An unexpected error occurred while extracting content from {url}: {str(e)}")
+			raise Exception(f"An unexpected error occurred while extracting content from {url}: {str(e)}")
+
 	def normalize_url(self, url: str) -> str:
 		"""
 		Normalize the given URL by adding scheme if missing and ensuring it's a valid URL.
@@ -101,9 +570,7 @@ class WebsiteExtractor:
 		Args:
 			soup (BeautifulSoup): The BeautifulSoup object to clean.
 		"""
-		for tag in self.unwanted_tags:
-			for element in soup.find_all(tag):
-				element.decompose()
+		remove_unwanted_elements(soup, self.unwanted_tags)
 
 	def clean_content(self, content: str) -> str:
 		"""
@@ -116,20 +583,126 @@ class WebsiteExtractor:
 		Returns:
 			str: Cleaned text content.
 		"""
-		# Decode HTML entities
-		cleaned_content = html.unescape(content)
+		return clean_content(content, self.remove_patterns, self.strip_invisible)
+
+def parse_html(
+	html_text: str,
+	unwanted_tags: List[str],
+	remove_patterns: List[str],
+	backend: str = "stream",
+	strip_invisible: bool = True,
+	main_content: Optional[Dict[str, Any]] = None,
+	url: str = "",
+) -> str:
+	"""
+	Parse HTML and return its cleaned text.
+
+	Module-level so that batch extraction can run it in a worker process.
+	In main-content mode the token reduction of the page is logged, and a
+	page without a clear article body keeps all of its text.
+
+	Args:
+		html_text (str): Page HTML.
+		unwanted_tags (List[str]): Tags removed before text extraction.
+		remove_patterns (List[str]): Regex patterns removed from the text.
+		backend (str): HTML parser backend: "stream", "lxml" or "bs4". Not used in main-content mode.
+		strip_invisible (bool): Remove zero-width characters, soft hyphens and BOMs.
+		main_content (Optional[Dict[str, Any]]): Keyword arguments of
+			main_content.extract_main_text to keep only the article body, or None for all text.
+		url (str): Source URL, used in log messages.
+
+	Returns:
+		str: Cleaned text content.
+	"""
+	if main_content is None:
+		# Extract the text outside unwanted elements, then clean it
+		raw_text = extract_text(html_text, unwanted_tags, backend)
+		return clean_content(raw_text, remove_patterns, strip_invisible)
+
+	main_text, full_text = extract_main_text(html_text, unwanted_tags, **main_content)
+	full_content = clean_content(full_text, remove_patterns, strip_invisible)
+	if main_text is None:
+		logger.info(f"No main content found in {url or 'page'}; keeping all {count_tokens(full_content)} tokens")
+		return full_content
+	content = clean_content(main_text, remove_patterns, strip_invisible)
+	full_tokens = count_tokens(full_content)
+	main_tokens = count_tokens(content)
+	logger.info(
+		f"Main content of {url or 'page'}: {main_tokens} of {full_tokens} tokens "
+		f"({full_tokens / max(main_tokens, 1):.1f}x reduction)"
+	)
+	return content
+
+def remove_unwanted_elements(soup: BeautifulSoup, unwanted_tags: List[str]) -> None:
+	"""
+	Remove unwanted elements from the BeautifulSoup object.
 
-		# Remove extra whitespace
-		cleaned_content = re.sub(r'\s+', ' ', cleaned_content)
+	Args:
+		soup (BeautifulSoup): The BeautifulSoup object to clean.
+		unwanted_tags (List[str]): Tags to remove.
+	"""
+	for tag in unwanted_tags:
+		for element in soup.find_all(tag):
+			element.decompose()
 
-		# Remove extra newlines
-		cleaned_content = re.sub(r'\n{3,}', '\n\n', cleaned_content)
+def clean_content(content: str, remove_patterns: List[str], strip_invisible: bool = True) -> str:
+	"""
+	Clean extracted text by removing unnecessary whitespace and applying
+	custom cleaning patterns.
+
+	Args:
+		content (str): The content to clean.
+		remove_patterns (List[str]): Regex patterns removed from the text.
+		strip_invisible (bool): Remove zero-width characters, soft hyphens and BOMs.
 
-		# Apply custom cleaning patterns from config
-		for pattern in self.remove_patterns:
-			cleaned_content = re.sub(pattern, '', cleaned_content)
+	Returns:
+		str: Cleaned text content.
+	"""
+	# Decode entities, collapse whitespace and drop the patterns in one compiled pipeline
+	normalizer = get_normalizer(
+		unescape_html=True, strip_invisible=strip_invisible, collapse_whitespace=True,
+		remove_patterns=tuple(remove_patterns)
+	)
+	return normalizer.normalize(content)
+
+def benchmark_parser_backends(seed: int = 42, sections: int = 2000, repeat: int = 3) -> None:
+	"""
+	Time each HTML parser backend on a synthetic page and check they agree.
 
-		return cleaned_content.strip()
+	Args:
+		seed (int): Seed of the synthetic page generator.
+		sections (int): Number of article sections in the page.
+		repeat (int): Runs per backend; the best time is reported.
+	"""
+	rng = random.Random(seed)
+	words = ["podcast", "audio", "&amp;", "transcript", "episode", "host", "guest", "caf&eacute;", "topic"]
+	body = []
+	for i in range(sections):
+		text = " ".join(rng.choice(words) for _ in range(rng.randint(20, 60)))
+		body.append(
+			f'<nav><ul><li><a href="/s{i}">Section {i}</a></li></ul></nav>'
+			f'<div class="section"><h2>Section {i}</h2><p>{text}<br><b>{i}</b></p>'
+			f'<script>var s{i} = "{text}";</script><!-- section {i} --></div>'
+		)
+	page = f"<html><head><style>p {{ margin: 0 }}</style></head><body>{''.join(body)}<footer>End</footer></body></html>"
+	size_mb = len(page.encode("utf-8")) / (1024 * 1024)
+	extractor_config = load_config().get('website_extractor', {})
+	unwanted_tags = extractor_config.get('unwanted_tags', [])
+	remove_patterns = extractor_config.get('markdown_cleaning', {}).get('remove_patterns', [])
+
+	backends = ["bs4", "stream"]
+	if importlib.util.find_spec("lxml"):
+		backends.append("lxml")
+	results = {}
+	for backend in backends:
+		timings = []
+		for _ in range(repeat):
+			start = time.perf_counter()
+			results[backend] = parse_html(page, unwanted_tags, remove_patterns, backend)
+			timings.append(time.perf_counter() - start)
+		best = min(timings)
+		logger.info(f"{backend:>6}: {best * 1000:.1f} ms ({size_mb / best:.1f} MB/s) on {size_mb:.2f} MB")
+	logger.info(f"stream matches bs4: {results['stream'] == results['bs4']}")
 
 def main(seed: int = 42) -> None:
 	"""
@@ -137,6 +710,9 @@ def main(seed: int = 42) -> None:
 	"""
 	logging.basicConfig(level=logging.INFO)
 
+	# Compare the HTML parser backends offline
+	benchmark_parser_backends(seed)
+
 	# Create an instance of WebsiteExtractor
 	extractor = WebsiteExtractor()
 
@@ -3,19 +3,138 @@ YouTube Transcriber Module
 
 This module is responsible for extracting and cleaning transcripts from YouTube videos.
 It uses the YouTube Transcript API to fetch transcripts and provides functionality
-to clean and format the extracted text.
+to clean and format the extracted text. Video ids are parsed from every supported
+URL form, raw transcript entries are cached on disk per video and language, and
+many videos can be fetched concurrently under a shared limit.
 """
 
 from youtube_transcript_api import YouTubeTranscriptApi
+import os
+import re
+import json
+import asyncio
+import hashlib
 import logging
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse, parse_qs
 from podcastfy.utils.config import load_config
+from .text_normalizer import get_normalizer, normalizer_settings
+from .disk_cache import DiskCache
 
 logger = logging.getLogger(__name__)
 
+_VIDEO_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{11}$")
+
+# Path prefixes that are followed by the video id, e.g. /shorts/<id>
+_ID_PATH_PREFIXES = ("embed", "shorts", "live", "v", "e")
+
+
+def parse_video_id(url: str, url_patterns: Optional[Sequence[str]] = None) -> str:
+	"""
+	Parse the video id out of a YouTube URL.
+
+	Supports watch?v= URLs (with any other query parameters), youtu.be short
+	links, and /embed/, /shorts/, /live/ and /v/ paths, on any YouTube host.
+
+	Args:
+		url (str): YouTube video URL.
+		url_patterns (Optional[Sequence[str]]): Host patterns that identify YouTube
+			URLs, from ``content_extractor.youtube_url_patterns``.
+
+	Returns:
+		str: The 11-character video id.
+
+	Raises:
+		ValueError: If the URL is not a YouTube video URL.
+	"""
+	url_patterns = url_patterns or ("youtube.com", "youtu.be")
+	parsed = urlparse(url if url.startswith(('http://', 'https://')) else 'https://' + url)
+	host = parsed.netloc.lower()
+	if not any(pattern in host for pattern in url_patterns):
+		raise ValueError(f"Not a YouTube URL: {url}")
+
+	segments = [segment for segment in parsed.path.split("/") if segment]
+	candidate = None
+	if host.endswith("youtu.be"):
+		candidate = segments[0] if segments else None
+	elif "v" in parse_qs(parsed.query):
+		candidate = parse_qs(parsed.query)["v"][0]
+	elif len(segments) >= 2 and segments[0] in _ID_PATH_PREFIXES:
+		candidate = segments[1]
+
+	if not candidate or not _VIDEO_ID_PATTERN.match(candidate):
+		raise ValueError(f"Could not find a video id in YouTube URL: {url}")
+	return candidate
+
+
+class TranscriptCache(DiskCache):
+	def __init__(self, cache_dir: str = "./data/cache/youtube", max_total_bytes: int = 100 * 1024 * 1024):
+		"""
+		Initialize the TranscriptCache.
+
+		Args:
+			cache_dir (str): Directory holding one JSON file of raw entries per video and languages.
+			max_total_bytes (int): Oldest transcripts are evicted beyond this size.
+		"""
+		super().__init__(cache_dir, max_total_bytes)
+
+	def _path(self, video_id: str, languages: Sequence[str]) -> str:
+		"""Return the cache file of a video's transcript in the given languages."""
+		language_key = hashlib.sha256(",".join(languages).encode("utf-8")).hexdigest()[:8]
+		return os.path.join(self.cache_dir, f"{video_id}.{language_key}.json")
+
+	def get(self, video_id: str, languages: Sequence[str]) -> Optional[List[Dict[str, Any]]]:
+		"""
+		Return the cached raw transcript entries of a video.
+
+		Args:
+			video_id (str): Video id.
+			languages (Sequence[str]): Language codes, in order of preference.
+
+		Returns:
+			Optional[List[Dict[str, Any]]]: Entries with ``text``, ``start`` and ``duration``, or None.
+		"""
+		try:
+			with open(self._path(video_id, languages), "r", encoding="utf-8") as f:
+				return json.load(f)
+		except (OSError, ValueError):
+			return None
+
+	def put(self, video_id: str, languages: Sequence[str], entries: List[Dict[str, Any]]) -> None:
+		"""
+		Store the raw transcript entries of a video.
+
+		Args:
+			video_id (str): Video id.
+			languages (Sequence[str]): Language codes, in order of preference.
+			entries (List[Dict[str, Any]]): Entries returned by the transcript API.
+		"""
+		try:
+			self._store({self._path(video_id, languages): json.dumps(entries)})
+		except OSError as e:
+			logger.warning(f"Could not cache the transcript of {video_id}: {str(e)}")
+
+
 class YouTubeTranscriber:
 	def __init__(self):
 		self.config = load_config()
-		self.youtube_transcriber_config = self.config.get('youtube_transcriber')
+		self.youtube_transcriber_config = self.config.get('youtube_transcriber', {})
+		self.url_patterns = self.config.get('content_extractor', {}).get('youtube_url_patterns', [])
+		# Phrases are matched against each lowercased entry in one set lookup
+		self.normalizer = get_normalizer(**normalizer_settings("youtube", self.config))
+		self.languages = tuple(self.youtube_transcriber_config.get('languages', ['en']))
+		self.max_concurrency = self.youtube_transcriber_config.get('max_concurrency', 4)
+		# Bounds concurrent transcript requests across all threads and event loops
+		self._limiter = threading.BoundedSemaphore(self.max_concurrency)
+		cache_config = self.youtube_transcriber_config.get('cache', {})
+		self.cache = (
+			TranscriptCache(
+				cache_config.get('cache_dir', "./data/cache/youtube"),
+				cache_config.get('max_total_bytes', 100 * 1024 * 1024),
+			)
+			if cache_config.get('enabled', True) else None
+		)
 
 	def extract_transcript(self, url: str) -> str:
 		"""
@@ -28,17 +147,109 @@ class YouTubeTranscriber:
 			str: Cleaned and extracted transcript.
 		"""
 		try:
-			video_id = url.split("v=")[-1]
-			transcript = YouTubeTranscriptApi.get_transcript(video_id)
-			cleaned_transcript = " ".join([
-				entry['text'] for entry in transcript 
-				if entry['text'].lower() not in self.youtube_transcriber_config['remove_phrases']
-			])
-			return cleaned_transcript
+			video_id = parse_video_id(url, self.url_patterns)
+			return self.clean_transcript(self.fetch_entries(video_id))
 		except Exception as e:
 			logger.error(f"Error extracting YouTube transcript: {str(e)}")
 			raise
 
+	def fetch_entries(self, video_id: str) -> List[Dict[str, Any]]:
+		"""
+		Return the raw transcript entries of a video, from the cache or the transcript API.
+
+		Args:
+			video_id (str): Video id.
+
+		Returns:
+			List[Dict[str, Any]]: Entries with ``text``, ``start`` and ``duration``.
+		"""
+		if self.cache:
+			entries = self.cache.get(video_id, self.languages)
+			if entries is not None:
+				logger.debug(f"Serving the transcript of {video_id} from the cache")
+				return entries
+		with self._limiter:
+			entries = YouTubeTranscriptApi.get_transcript(video_id, languages=self.languages)
+		if self.cache:
+			self.cache.put(video_id, self.languages, entries)
+		return entries
+
+	def clean_transcript(self, entries: List[Dict[str, Any]]) -> str:
+		"""
+		Join transcript entries, dropping those that are only a removed phrase.
+
+		Args:
+			entries (List[Dict[str, Any]]): Raw transcript entries.
+
+		Returns:
+			str: Cleaned transcript.
+		"""
+		normalizer = self.normalizer
+		return " ".join([
+			normalizer.normalize(entry['text']) for entry in entries
+			if normalizer.keep_segment(entry['text'])
+		])
+
+	def iter_content(self, url: str) -> Iterator[Tuple[float, str]]:
+		"""
+		Yield the cleaned transcript entry by entry.
+
+		Entries after the first start with the separating space, so the pieces
+		concatenate to exactly what extract_transcript returns.
+
+		Args:
+			url (str): YouTube video URL.
+
+		Yields:
+			Tuple[float, str]: Start time of the entry in seconds and its text.
+		"""
+		video_id = parse_video_id(url, self.url_patterns)
+		normalizer = self.normalizer
+		first = True
+		for entry in self.fetch_entries(video_id):
+			if not normalizer.keep_segment(entry['text']):
+				continue
+			text = normalizer.normalize(entry['text'])
+			yield entry.get('start', 0.0), text if first else " " + text
+			first = False
+
+	def extract_transcripts(self, urls: List[str]) -> List[Dict[str, Any]]:
+		"""
+		Synchronous wrapper around aextract_transcripts.
+		"""
+		return asyncio.run(self.aextract_transcripts(urls))
+
+	async def aextract_transcripts(self, urls: List[str]) -> List[Dict[str, Any]]:
+		"""
+		Extract the transcripts of many videos concurrently.
+
+		Each distinct video is fetched once, at most ``max_concurrency`` at a time.
+		A failing video is reported in its result instead of aborting the others.
+
+		Args:
+			urls (List[str]): YouTube video URLs.
+
+		Returns:
+			List[Dict[str, Any]]: One result per URL, in input order, with keys
+			``index``, ``source``, ``status`` ("success" or "error"), ``content`` and ``error``.
+		"""
+		fetches: Dict[str, asyncio.Task] = {}
+
+		async def extract_one(index: int, url: str) -> Dict[str, Any]:
+			result = {"index": index, "source": url, "status": "success", "content": None, "error": None}
+			try:
+				video_id = parse_video_id(url, self.url_patterns)
+				if video_id not in fetches:
+					fetches[video_id] = asyncio.ensure_future(asyncio.to_thread(self.fetch_entries, video_id))
+				result["content"] = self.clean_transcript(await fetches[video_id])
+			except Exception as e:
+				logger.error(f"Error extracting YouTube transcript from {url}: {str(e)}")
+				result["status"] = "error"
+				result["error"] = str(e)
+			return result
+
+		return list(await asyncio.gather(*(extract_one(i, url) for i, url in enumerate(urls))))
+
 def main(seed: int = 42) -> None:
 	"""
 	Test the YouTubeTranscriber class with a specific URL and save the transcript.
@@ -52,12 +263,12 @@ def main(seed: int = 42) -> None:
 	try:
 		transcript = transcriber.extract_transcript(url)
 		print("Transcript extracted successfully.")
-		
+
 		# Save transcript to file
 		output_file = 'tests/data/transcripts/youtube_transcript2.txt'
 		with open(output_file, 'w') as file:
 			file.write(transcript)
-		
+
 		print(f"Transcript saved to {output_file}")
 		print("First 500 characters of the transcript:")
 		print(transcript[:500] + "..." if len(transcript) > 500 else transcript)
@@ -66,4 +277,4 @@ def main(seed: int = 42) -> None:
 		raise
 
 if __name__ == "__main__":
-	main()
\ No newline at end of file
+	main()
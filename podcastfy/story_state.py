@@ -0,0 +1,147 @@
+"""
+Story State Module
+
+This module keeps a compact, persisted story-state summary per series
+(characters, open threads, last events). Each new episode is generated from
+that summary plus its own input instead of the full background and prior
+episodes, and the summary is then updated incrementally from the new episode
+alone, so prompt size and latency stay flat as a series grows.
+"""
+
+import os
+import re
+import json
+import asyncio
+import time
+import hashlib
+import logging
+from typing import Any, Dict, Optional
+from langchain_core.messages import SystemMessage, HumanMessage
+from podcastfy.utils.config import load_config
+from podcastfy.utils.token_budget import count_tokens, trim_to_tokens
+
+logger = logging.getLogger(__name__)
+
+STATE_SYSTEM_PROMPT = """You maintain the story bible of a serialized noir audio drama.
+Given the current story state and the transcript of the newest episode, return the
+updated story state using exactly these sections:
+CHARACTERS: who they are, what they know and want, how they relate.
+OPEN THREADS: unresolved mysteries, promises and dangers.
+LAST EVENTS: what happened most recently, in order.
+Drop threads that were resolved and details no future episode needs.
+Return ONLY the updated story state."""
+
+
+class StoryStateStore:
+    def __init__(self, config: Optional[Any] = None, is_local: bool = False):
+        """
+        Initialize the StoryStateStore.
+
+        Args:
+            config (Optional[Any]): Loaded Config instance. Loaded when omitted.
+            is_local (bool): Use the local LLM backend for summary updates.
+        """
+        self.config = config or load_config()
+        series_config = self.config.get("content_generator", {}).get("series", {})
+        self.state_dir = series_config.get("state_dir", "./data/series")
+        self.model_name = series_config.get("model", "gemini-1.5-flash-latest")
+        self.summary_tokens = series_config.get("summary_tokens", 1500)
+        self.is_local = is_local
+        self._llm = None
+
+    @property
+    def llm(self):
+        """Lazily create the summary LLM so reading state never builds a client."""
+        if self._llm is None:
+            from podcastfy.content_generator import LLMBackend
+
+            self._llm = LLMBackend(
+                is_local=self.is_local,
+                temperature=0.2,
+                max_output_tokens=self.summary_tokens,
+                model_name=self.model_name,
+            ).llm
+        return self._llm
+
+    def _state_path(self, series_id: str) -> str:
+        """Return the state file path for a series."""
+        safe_id = re.sub(r"[^A-Za-z0-9_.-]", "_", series_id)
+        return os.path.join(self.state_dir, f"{safe_id}.json")
+
+    def load(self, series_id: str, background: str = "") -> Dict[str, Any]:
+        """
+        Load the story state of a series, seeding it from ``background`` if it is new.
+
+        Args:
+            series_id (str): Series identifier.
+            background (str): Series background used as the initial state.
+
+        Returns:
+            Dict[str, Any]: State with keys ``series_id``, ``episode_count``,
+            ``summary``, ``last_episode_hash`` and ``updated_at``.
+        """
+        try:
+            with open(self._state_path(series_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            logger.info(f"Starting new series '{series_id}'")
+        except ValueError as e:
+            logger.warning(f"Ignoring unreadable state for series '{series_id}': {str(e)}")
+        return {
+            "series_id": series_id,
+            "episode_count": 0,
+            "summary": trim_to_tokens(background.strip(), self.summary_tokens),
+            "last_episode_hash": None,
+            "updated_at": None,
+        }
+
+    def save(self, state: Dict[str, Any]) -> None:
+        """Atomically persist the story state of a series."""
+        path = self._state_path(state["series_id"])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    async def aupdate(self, state: Dict[str, Any], episode_text: str) -> Dict[str, Any]:
+        """
+        Fold a new episode into the story state and persist it.
+
+        Only the current summary and the new episode are sent, so the cost of an
+        update does not grow with the number of episodes. Updating twice with the
+        same episode is a no-op.
+
+        Args:
+            state (Dict[str, Any]): State returned by load.
+            episode_text (str): Transcript of the new episode.
+
+        Returns:
+            Dict[str, Any]: The updated state.
+        """
+        episode_hash = hashlib.sha256(episode_text.encode("utf-8")).hexdigest()
+        if state.get("last_episode_hash") == episode_hash:
+            logger.debug(f"Episode already folded into series '{state['series_id']}'")
+            return state
+
+        messages = [
+            SystemMessage(content=STATE_SYSTEM_PROMPT),
+            HumanMessage(content=(
+                f"CURRENT STORY STATE:\n{state['summary'] or '(none yet)'}\n\n"
+                f"NEWEST EPISODE:\n{episode_text}"
+            )),
+        ]
+        response = await self.llm.ainvoke(messages)
+        summary = getattr(response, "content", response).strip()
+
+        state = dict(state)
+        state["summary"] = trim_to_tokens(summary, self.summary_tokens)
+        state["episode_count"] = state.get("episode_count", 0) + 1
+        state["last_episode_hash"] = episode_hash
+        state["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        await asyncio.to_thread(self.save, state)
+        logger.info(
+            f"Updated story state of series '{state['series_id']}' after episode "
+            f"{state['episode_count']} (~{count_tokens(state['summary'])} tokens)"
+        )
+        return state
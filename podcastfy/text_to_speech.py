@@ -11,9 +11,11 @@ from elevenlabs.client import ElevenLabs
 from elevenlabs import VoiceSettings
 from podcastfy.utils.config_conversation import load_conversation_config
 from podcastfy.utils.config import load_config
+from podcastfy.utils.dialogue import Dialogue, Line
 from pydub import AudioSegment
-import re
-from typing import List, Tuple, Optional, Union
+import threading
+from queue import Queue
+from typing import Any, Iterable, Iterator, List, Tuple, Optional, Union
 
 logger = logging.getLogger(__name__)
 
@@ -145,17 +147,11 @@ class TextToSpeech:
     def split_dialogues(self, input_text: str) -> List[Tuple[str, str]]:
         """Split the input text into a list of (speaker, dialogue) tuples."""
         logger.debug("Splitting dialogues")
-        pattern = r'<(.*?)>(.*?)</\1>'
-        matches = re.findall(pattern, input_text, re.DOTALL)
-        
-        processed_matches = []
-        for speaker, text in matches:
-            # Remove emotes from the spoken text
-            clean_text = re.sub(r'\*[^*]+\*', '', text)
-            # Remove extra whitespace
-            clean_text = ' '.join(clean_text.split())
-            if clean_text.strip():  # Only add if there's actual dialog
-                processed_matches.append((speaker.strip(), clean_text.strip()))
+        processed_matches = [
+            (line.speaker, line.text)
+            for line in Dialogue.parse(input_text)
+            if line.text  # Only add if there's actual dialog
+        ]
         
         logger.info(f"Found {len(processed_matches)} dialogue segments")
         for speaker, text in processed_matches:
@@ -164,10 +160,47 @@ class TextToSpeech:
 
     def convert_to_speech(self, text: str, output_file: str) -> None:
         """Convert input text to speech with normalization."""
+        logger.info("Starting text to speech conversion")
+        self.convert_dialogues_to_speech(self.split_dialogues(text), output_file)
+
+    def convert_stream_to_speech(self, blocks: Iterable[Tuple[str, str]], output_file: str) -> None:
+        """
+        Convert a stream of (speaker, text) blocks to speech while they are still arriving.
+
+        The stream is drained on a background thread so the LLM keeps generating
+        while earlier lines are being synthesized.
+        """
+        logger.info("Starting streaming text to speech conversion")
+        queue: "Queue[Tuple[str, Any]]" = Queue()
+
+        def produce():
+            try:
+                for speaker, text in blocks:
+                    queue.put(("block", (speaker, text)))
+            except Exception as e:
+                queue.put(("error", e))
+            else:
+                queue.put(("done", None))
+
+        threading.Thread(target=produce, daemon=True).start()
+
+        def consume() -> Iterator[Tuple[str, str]]:
+            while True:
+                kind, payload = queue.get()
+                if kind == "done":
+                    return
+                if kind == "error":
+                    raise payload
+                speaker, text = payload
+                line = Line(speaker, text, 0, len(text))
+                if line.text:
+                    yield line.speaker, line.text
+
+        self.convert_dialogues_to_speech(consume(), output_file)
+
+    def convert_dialogues_to_speech(self, dialogues: Iterable[Tuple[str, str]], output_file: str) -> None:
+        """Convert (speaker, text) dialogues to speech with normalization."""
         try:
-            logger.info("Starting text to speech conversion")
-            dialogues = self.split_dialogues(text)
-            
             audio_segments = []
             counter = 0
 
@@ -0,0 +1,192 @@
+"""
+Context Cache Module
+
+This module registers a prompt prefix shared by many LLM calls (system message,
+base prompt and common background material) once, so each call only sends its
+own delta. GeminiContextCache uses Gemini's context caching; LocalContextCache is
+a stand-in for local models and tests that keeps the prefix in memory and
+prepends it to every call. A provider cache is reused for the same model and
+prefix until shortly before its TTL runs out, and deleted when the cache is closed.
+"""
+
+import time
+import hashlib
+import logging
+import threading
+from datetime import timedelta
+from typing import Any, Dict, List
+from langchain_core.messages import SystemMessage, HumanMessage
+from podcastfy.utils.token_budget import count_tokens
+
+logger = logging.getLogger(__name__)
+
+
+def prefix_key(model_name: str, system_prompt: str, prefix: str) -> str:
+    """Return the content hash identifying a cached prefix."""
+    return hashlib.sha256(f"{model_name}\0{system_prompt}\0{prefix}".encode("utf-8")).hexdigest()
+
+
+class LocalContextCache:
+    """Keeps registered prefixes in memory and sends them in full with every call."""
+
+    def __init__(self):
+        self._prefixes: Dict[str, Dict[str, str]] = {}
+        self.registrations = 0
+
+    def __contains__(self, handle: str) -> bool:
+        return handle in self._prefixes
+
+    def register(self, model_name: str, system_prompt: str, prefix: str) -> str:
+        """
+        Register a shared prefix and return its handle.
+
+        Args:
+            model_name (str): Model the prefix is used with.
+            system_prompt (str): System message shared by every call.
+            prefix (str): Shared leading part of the user message.
+
+        Returns:
+            str: Handle to pass to messages_for and backend_kwargs.
+        """
+        handle = prefix_key(model_name, system_prompt, prefix)
+        if handle not in self._prefixes:
+            self._prefixes[handle] = {"system_prompt": system_prompt, "prefix": prefix}
+            self.registrations += 1
+        return handle
+
+    def messages_for(self, handle: str, delta: str) -> List[Any]:
+        """Build the messages for one call: the full prefix followed by its delta."""
+        entry = self._prefixes[handle]
+        return [
+            SystemMessage(content=entry["system_prompt"]),
+            HumanMessage(content=entry["prefix"] + delta),
+        ]
+
+    def backend_kwargs(self, handle: str) -> Dict[str, Any]:
+        """Extra LLMBackend arguments for calls using ``handle``."""
+        return {}
+
+    def close(self) -> None:
+        """Forget the registered prefixes."""
+        self._prefixes.clear()
+
+
+class GeminiContextCache:
+    """Registers prefixes with Gemini's context cache so calls only send their delta."""
+
+    def __init__(self, ttl_seconds: int = 3600, min_tokens: int = 32768):
+        """
+        Initialize the GeminiContextCache.
+
+        Args:
+            ttl_seconds (int): Lifetime of cached prefixes on the provider.
+            min_tokens (int): Smallest prefix the provider accepts for caching;
+                shorter prefixes fall back to the local stand-in.
+        """
+        self.ttl_seconds = ttl_seconds
+        self.min_tokens = min_tokens
+        # Provider caches are not reused this close to their expiry, so a batch never outlives its cache
+        self.reuse_margin_seconds = min(300, ttl_seconds / 2)
+        self._handles: Dict[str, Dict[str, Any]] = {}
+        self._fallback = LocalContextCache()
+        self._lock = threading.Lock()
+        self.registrations = 0
+
+    def register(self, model_name: str, system_prompt: str, prefix: str) -> str:
+        """
+        Register a shared prefix with Gemini, reusing an existing cache entry for the same content.
+
+        Args:
+            model_name (str): Gemini model the prefix is used with.
+            system_prompt (str): System message shared by every call.
+            prefix (str): Shared leading part of the user message.
+
+        Returns:
+            str: Handle to pass to messages_for and backend_kwargs.
+        """
+        key = prefix_key(model_name, system_prompt, prefix)
+        # Concurrent batches with the same prefix wait for one registration instead of each creating one
+        with self._lock:
+            entry = self._handles.get(key)
+            if entry is not None and time.monotonic() < entry["reuse_until"]:
+                return entry["handle"]
+
+            if count_tokens(system_prompt) + count_tokens(prefix) < self.min_tokens:
+                logger.debug("Shared prefix below the provider's minimum cache size; sending it in full")
+                handle = self._fallback.register(model_name, system_prompt, prefix)
+                entry = {"handle": handle, "reuse_until": float("inf")}
+            else:
+                try:
+                    from google.generativeai import caching
+
+                    cached_content = caching.CachedContent.create(
+                        model=f"models/{model_name}",
+                        display_name=f"podcastfy-{key[:16]}",
+                        system_instruction=system_prompt,
+                        contents=[prefix],
+                        ttl=timedelta(seconds=self.ttl_seconds),
+                    )
+                    entry = {
+                        "handle": cached_content.name,
+                        "reuse_until": time.monotonic() + self.ttl_seconds - self.reuse_margin_seconds,
+                    }
+                    self.registrations += 1
+                    logger.info(f"Registered shared prefix with Gemini context cache: {cached_content.name}")
+                except Exception as e:
+                    logger.warning(f"Gemini context caching unavailable, sending prefix in full: {str(e)}")
+                    handle = self._fallback.register(model_name, system_prompt, prefix)
+                    entry = {"handle": handle, "reuse_until": float("inf")}
+
+            self._handles[key] = entry
+            return entry["handle"]
+
+    def messages_for(self, handle: str, delta: str) -> List[Any]:
+        """Build the messages for one call: only the delta when the prefix is cached."""
+        if handle in self._fallback:
+            return self._fallback.messages_for(handle, delta)
+        return [HumanMessage(content=delta)]
+
+    def backend_kwargs(self, handle: str) -> Dict[str, Any]:
+        """Extra LLMBackend arguments for calls using ``handle``."""
+        if handle in self._fallback:
+            return {}
+        return {"cached_content": handle}
+
+    def close(self) -> None:
+        """Delete the provider caches registered by this instance; expired ones are already gone."""
+        with self._lock:
+            entries = list(self._handles.values())
+            self._handles.clear()
+        now = time.monotonic()
+        for entry in entries:
+            if entry["handle"] in self._fallback or entry["reuse_until"] + self.reuse_margin_seconds <= now:
+                continue
+            try:
+                from google.generativeai import caching
+
+                caching.CachedContent.get(entry["handle"]).delete()
+                logger.info(f"Deleted Gemini context cache {entry['handle']}")
+            except Exception as e:
+                logger.warning(f"Could not delete Gemini context cache {entry['handle']}: {str(e)}")
+        self._fallback.close()
+
+
+def create_context_cache(config: Any, is_local: bool = False):
+    """
+    Create the context cache configured under ``content_generator.batch.context_cache``.
+
+    Args:
+        config (Any): Loaded Config instance.
+        is_local (bool): Whether calls go to a local model, which always uses the stand-in.
+
+    Returns:
+        LocalContextCache or GeminiContextCache.
+    """
+    cache_config = config.get("content_generator", {}).get("batch", {}).get("context_cache", {})
+    provider = cache_config.get("provider", "gemini")
+    if is_local or provider == "local":
+        return LocalContextCache()
+    return GeminiContextCache(
+        ttl_seconds=cache_config.get("ttl_seconds", 3600),
+        min_tokens=cache_config.get("min_tokens", 32768),
+    )
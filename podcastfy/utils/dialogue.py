@@ -0,0 +1,268 @@
+"""
+Dialogue Module
+
+This module provides the parsed representation of a speaker-tagged transcript
+shared by the content generator, text-to-speech and timing code. Transcripts are
+tokenized once, in a single linear pass with precompiled patterns, into slotted
+Line objects; parses are memoized by transcript text so each stage of the
+pipeline reuses the same Dialogue instead of re-running its own regexes.
+"""
+
+import re
+import time
+import threading
+from collections import OrderedDict
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+TAG_PATTERN = re.compile(r'<(/?)(\w+)>')
+EMOTE_PATTERN = re.compile(r'\*([^*]+)\*')
+
+_PARSE_CACHE_SIZE = 16
+_parse_cache: "OrderedDict[str, Dialogue]" = OrderedDict()
+# Parses happen on worker threads too, e.g. the webhook's asyncio.to_thread calls
+_parse_cache_lock = threading.Lock()
+
+
+class Line:
+    """A single speaker block of a transcript."""
+
+    __slots__ = ("speaker", "raw_text", "text", "emotes", "start", "end")
+
+    def __init__(self, speaker: str, raw_text: str, start: int, end: int):
+        """
+        Initialize a Line.
+
+        Args:
+            speaker (str): Speaker tag name.
+            raw_text (str): Text between the opening and closing tags.
+            start (int): Offset of the opening tag in the transcript.
+            end (int): Offset just past the block (closing tag included when present).
+        """
+        self.speaker = speaker
+        self.raw_text = raw_text
+        self.emotes = tuple(emote.strip() for emote in EMOTE_PATTERN.findall(raw_text))
+        self.text = ' '.join(EMOTE_PATTERN.sub('', raw_text).split())
+        self.start = start
+        self.end = end
+
+    def __repr__(self) -> str:
+        return f"Line(speaker={self.speaker!r}, text={self.text[:40]!r}, start={self.start}, end={self.end})"
+
+
+class DialogueTokenizer:
+    """Incremental, linear-time tokenizer turning tagged text into Lines."""
+
+    def __init__(self):
+        self._buffer = ""
+        self._offset = 0  # Absolute offset of _buffer[0]
+        self._scan_pos = 0
+        self._speaker: Optional[str] = None
+        self._block_start = 0
+        self._content_start = 0
+
+    def feed(self, text: str) -> List[Line]:
+        """
+        Add text and return the Lines it completed.
+
+        A block ends at its matching closing tag. A new opening tag implicitly
+        closes an unterminated block; stray closing tags are ignored.
+
+        Args:
+            text (str): Next piece of the transcript.
+
+        Returns:
+            List[Line]: Blocks completed by this piece, in order.
+        """
+        self._buffer += text
+        lines = []
+        for match in TAG_PATTERN.finditer(self._buffer, self._scan_pos):
+            is_closing, name = match.group(1), match.group(2)
+            if is_closing:
+                if name == self._speaker:
+                    lines.append(self._make_line(match.start(), match.end()))
+                    self._speaker = None
+            else:
+                if self._speaker is not None:
+                    lines.append(self._make_line(match.start(), match.start()))
+                self._speaker = name
+                self._block_start = match.start()
+                self._content_start = match.end()
+            self._scan_pos = match.end()
+        # Only a trailing "<" can still start a tag, so the rest is never scanned again
+        pending_tag = self._buffer.rfind("<", self._scan_pos)
+        self._scan_pos = pending_tag if pending_tag != -1 else len(self._buffer)
+
+        # Drop text that can no longer be part of a block
+        keep_from = min(self._block_start, self._scan_pos) if self._speaker is not None else self._scan_pos
+        if keep_from:
+            self._buffer = self._buffer[keep_from:]
+            self._offset += keep_from
+            self._scan_pos -= keep_from
+            self._block_start -= keep_from
+            self._content_start -= keep_from
+        return lines
+
+    def close(self) -> List[Line]:
+        """Flush an unterminated final block and reset the tokenizer."""
+        lines = []
+        if self._speaker is not None:
+            lines.append(self._make_line(len(self._buffer), len(self._buffer)))
+        self.__init__()
+        return lines
+
+    def _make_line(self, content_end: int, block_end: int) -> Line:
+        """Build a Line for the current block from buffer positions."""
+        return Line(
+            self._speaker,
+            self._buffer[self._content_start:content_end],
+            self._offset + self._block_start,
+            self._offset + block_end,
+        )
+
+
+class Dialogue:
+    """A parsed transcript: an ordered, immutable sequence of speaker Lines."""
+
+    __slots__ = ("lines", "source")
+
+    def __init__(self, lines: Iterable[Line], source: str):
+        self.lines: Tuple[Line, ...] = tuple(lines)
+        self.source = source
+
+    def __iter__(self) -> Iterator[Line]:
+        return iter(self.lines)
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    @property
+    def speakers(self) -> set:
+        """Set of speakers with at least one block."""
+        return {line.speaker for line in self.lines}
+
+    @classmethod
+    def parse(cls, text: str) -> "Dialogue":
+        """
+        Parse a tagged transcript, reusing a previous parse of the same text.
+
+        Args:
+            text (str): Transcript with <Speaker>...</Speaker> blocks.
+
+        Returns:
+            Dialogue: The parsed transcript.
+        """
+        with _parse_cache_lock:
+            dialogue = _parse_cache.get(text)
+            if dialogue is not None:
+                _parse_cache.move_to_end(text)
+                return dialogue
+        tokenizer = DialogueTokenizer()
+        lines = tokenizer.feed(text)
+        lines.extend(tokenizer.close())
+        return _remember(cls(lines, text))
+
+    @classmethod
+    def from_blocks(cls, blocks: Iterable[Tuple[str, str]]) -> "Dialogue":
+        """
+        Render (speaker, text) blocks into a transcript and return its Dialogue.
+
+        Args:
+            blocks (Iterable[Tuple[str, str]]): Speaker and block body pairs.
+
+        Returns:
+            Dialogue: Dialogue whose ``source`` is the rendered transcript.
+        """
+        parts = []
+        lines = []
+        position = 0
+        for speaker, body in blocks:
+            block = f"<{speaker}>\n{body}\n</{speaker}>"
+            if parts:
+                position += 1  # newline separator
+            # Same raw text Dialogue.parse would extract from the rendered block
+            lines.append(Line(speaker, f"\n{body}\n", position, position + len(block)))
+            parts.append(block)
+            position += len(block)
+        return _remember(cls(lines, '\n'.join(parts)))
+
+
+def _remember(dialogue: Dialogue) -> Dialogue:
+    """Store a Dialogue in the parse cache, evicting the least recently used."""
+    with _parse_cache_lock:
+        _parse_cache[dialogue.source] = dialogue
+        _parse_cache.move_to_end(dialogue.source)
+        while len(_parse_cache) > _PARSE_CACHE_SIZE:
+            _parse_cache.popitem(last=False)
+    return dialogue
+
+
+def normalize_block(raw_text: str) -> str:
+    """
+    Normalize a block body: drop blank lines and mark lines without an emote as neutral.
+
+    Args:
+        raw_text (str): Text between a speaker's opening and closing tags.
+
+    Returns:
+        str: Normalized block body.
+    """
+    lines = []
+    for line in raw_text.split('\n'):
+        line = line.strip()
+        if line:
+            if not line.startswith('*'):
+                line = f"*neutral* {line}"
+            lines.append(line)
+    return '\n'.join(lines)
+
+
+def main(seed: int = 42) -> None:
+    """
+    Benchmark the parse-once pipeline against the previous per-stage regexes on a 10k-line transcript.
+    """
+    import random
+    random.seed(seed)
+
+    speakers = ["DetectiveSarah", "OfficerMike", "EmmaLawson", "Maria"]
+    blocks = []
+    for i in range(3334):
+        speaker = random.choice(speakers)
+        blocks.append(f"<{speaker}>\n*whispers* Line {i}, the rain never stops in this city.\n</{speaker}>")
+    transcript = '\n'.join(blocks)
+    print(f"Transcript: {transcript.count(chr(10)) + 1} lines, {len(transcript)} characters")
+
+    # Previous pipeline: validation line loop, TTS split and timing extraction each re-parse
+    start = time.perf_counter()
+    set(re.findall(r'<(\w+)>', transcript))
+    current_tag = None
+    for line in transcript.split('\n'):
+        if re.match(r'<(\w+)>', line):
+            current_tag = line
+        elif re.match(f'</({"|".join(speakers)})>', line):
+            current_tag = None
+    legacy = []
+    for speaker, text in re.findall(r'<(.*?)>(.*?)</\1>', transcript, re.DOTALL):
+        clean_text = ' '.join(re.sub(r'\*[^*]+\*', '', text).split())
+        if clean_text:
+            legacy.append((speaker.strip(), clean_text))
+    for speaker, text in re.findall(r'<(.*?)>(.*?)</\1>', transcript, re.DOTALL):
+        len(text.split())
+    legacy_time = time.perf_counter() - start
+
+    # Parse-once pipeline: one tokenizer pass shared by all three stages
+    _parse_cache.clear()
+    start = time.perf_counter()
+    dialogue = Dialogue.parse(transcript)
+    dialogue.speakers
+    parsed = [(line.speaker, line.text) for line in Dialogue.parse(transcript) if line.text]
+    for line in Dialogue.parse(transcript):
+        len(line.raw_text.split())
+    parse_time = time.perf_counter() - start
+
+    assert parsed == legacy
+    print(f"Per-stage regexes: {legacy_time * 1000:.1f} ms")
+    print(f"Parse-once:        {parse_time * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Image Inputs Module
+
+This module prepares image files for multimodal LLM messages. Images are
+deduplicated by content hash, downscaled and re-encoded to the model's useful
+resolution, and the result is cached on disk: either the encoded JPEG payload
+(inline mode) or the provider file handle (file_api mode), so repeat runs with
+the same images neither re-encode nor re-upload anything.
+"""
+
+import io
+import os
+import json
+import time
+import base64
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+from PIL import Image, ImageOps
+from podcastfy.utils.config import load_config
+from podcastfy.utils.token_budget import image_tokens
+
+logger = logging.getLogger(__name__)
+
+# Bump when the encoding pipeline changes so stale cache entries are ignored
+ENCODER_VERSION = "1"
+
+
+class ImageInputProcessor:
+    def __init__(self, config: Optional[Any] = None):
+        """
+        Initialize the ImageInputProcessor.
+
+        Args:
+            config (Optional[Any]): Loaded Config instance. Loaded when omitted.
+        """
+        self.config = config or load_config()
+        image_config = self.config.get("content_generator", {}).get("image_inputs", {})
+        self.max_dimension = image_config.get("max_dimension", 1024)
+        self.jpeg_quality = image_config.get("jpeg_quality", 85)
+        self.upload_mode = image_config.get("upload", "inline")
+        self.file_ttl_seconds = image_config.get("file_ttl_hours", 46) * 3600
+        self.cache_dir = image_config.get("cache_dir", "./data/cache/images")
+        self._handles_path = os.path.join(self.cache_dir, "file_handles.json")
+        self._lock = threading.Lock()
+
+    def prepare(self, image_paths: List[str]) -> List[Dict[str, Any]]:
+        """
+        Turn image files into message content parts, skipping duplicates.
+
+        Args:
+            image_paths (List[str]): Paths to image files.
+
+        Returns:
+            List[Dict[str, Any]]: LangChain content parts, one per unique image, in input order.
+        """
+        parts = []
+        seen = set()
+        for path in image_paths:
+            with open(path, "rb") as f:
+                data = f.read()
+            content_hash = hashlib.sha256(data).hexdigest()
+            if content_hash in seen:
+                logger.debug(f"Skipping duplicate image {path}")
+                continue
+            seen.add(content_hash)
+
+            encoded = self._encoded_image(content_hash, data)
+            if self.upload_mode == "file_api":
+                parts.append(self._file_part(content_hash, encoded))
+            else:
+                payload = base64.b64encode(encoded).decode("ascii")
+                parts.append({"type": "image_url", "image_url": f"data:image/jpeg;base64,{payload}"})
+        logger.info(f"Prepared {len(parts)} unique images from {len(image_paths)} inputs")
+        return parts
+
+    def encode(self, data: bytes) -> bytes:
+        """
+        Downscale and re-encode an image as JPEG.
+
+        Args:
+            data (bytes): Original image file contents.
+
+        Returns:
+            bytes: JPEG no larger than ``max_dimension`` on its longest side.
+        """
+        with Image.open(io.BytesIO(data)) as image:
+            image = ImageOps.exif_transpose(image)
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+            image.thumbnail((self.max_dimension, self.max_dimension), Image.LANCZOS)
+            output = io.BytesIO()
+            image.save(output, format="JPEG", quality=self.jpeg_quality, optimize=True)
+            return output.getvalue()
+
+    def part_tokens(self, part: Dict[str, Any]) -> int:
+        """
+        Count the prompt tokens of a prepared image part from the size it is sent at.
+
+        Args:
+            part (Dict[str, Any]): Content part returned by ``prepare``.
+
+        Returns:
+            int: Tokens of the image. Uploaded images are counted at ``max_dimension`` on both sides.
+        """
+        if part.get("type") == "image_url":
+            payload = part["image_url"].split(",", 1)[1]
+            with Image.open(io.BytesIO(base64.b64decode(payload))) as image:
+                return image_tokens(*image.size)
+        return image_tokens(self.max_dimension, self.max_dimension)
+
+    def _encoded_image(self, content_hash: str, data: bytes) -> bytes:
+        """Return the encoded image, from the cache when possible."""
+        key = f"{content_hash}-{ENCODER_VERSION}-{self.max_dimension}-{self.jpeg_quality}"
+        path = os.path.join(self.cache_dir, key[:2], f"{key}.jpg")
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            pass
+
+        encoded = self.encode(data)
+        logger.debug(f"Encoded image {content_hash[:12]}: {len(data)} -> {len(encoded)} bytes")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(encoded)
+        os.replace(tmp_path, path)
+        return encoded
+
+    def _file_part(self, content_hash: str, encoded: bytes) -> Dict[str, Any]:
+        """Return a content part referencing an uploaded file, uploading only when needed."""
+        key = f"{content_hash}-{ENCODER_VERSION}-{self.max_dimension}-{self.jpeg_quality}"
+        with self._lock:
+            handles = self._load_handles()
+            handle = handles.get(key)
+            if handle is None or handle["expires_at"] <= time.time():
+                import google.generativeai as genai
+
+                uploaded = genai.upload_file(io.BytesIO(encoded), mime_type="image/jpeg")
+                handle = {"uri": uploaded.uri, "expires_at": time.time() + self.file_ttl_seconds}
+                handles[key] = handle
+                self._save_handles(handles)
+                logger.info(f"Uploaded image {content_hash[:12]} to provider file storage")
+        return {"type": "media", "file_uri": handle["uri"], "mime_type": "image/jpeg"}
+
+    def _load_handles(self) -> Dict[str, Dict[str, Any]]:
+        """Load cached provider file handles."""
+        try:
+            with open(self._handles_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_handles(self, handles: Dict[str, Dict[str, Any]]) -> None:
+        """Persist provider file handles, dropping expired ones."""
+        now = time.time()
+        handles = {key: value for key, value in handles.items() if value["expires_at"] > now}
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self._handles_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(handles, f)
+        os.replace(tmp_path, self._handles_path)
@@ -0,0 +1,466 @@
+"""
+Local LLM Module
+
+This module talks to one or more llamafile / llama.cpp servers on localhost
+through their OpenAI-compatible chat endpoint. A single process-wide pool
+spreads requests round-robin across the instances that pass a readiness probe,
+bounds in-flight requests per instance to its parallel slots (across threads
+and event loops alike) and applies a per-request timeout, so dialog, scene, title and shot calls of an all-local
+deployment share the local cores instead of each opening its own connection.
+"""
+
+import json
+import time
+import asyncio
+import logging
+import threading
+import weakref
+from collections import deque
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+import httpx
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+logger = logging.getLogger(__name__)
+
+_ROLES = {"system": "system", "human": "user", "ai": "assistant"}
+
+
+def to_chat_messages(messages: List[Any]) -> List[Dict[str, str]]:
+    """
+    Convert LangChain messages to OpenAI-style chat messages.
+
+    Local servers are text-only, so non-text parts of multimodal messages are dropped.
+
+    Args:
+        messages (List[Any]): LangChain messages or plain strings.
+
+    Returns:
+        List[Dict[str, str]]: Messages with ``role`` and ``content`` keys.
+    """
+    chat_messages = []
+    for message in messages:
+        if isinstance(message, str):
+            chat_messages.append({"role": "user", "content": message})
+            continue
+        content = message.content
+        if not isinstance(content, str):
+            content = "\n".join(
+                part if isinstance(part, str) else part.get("text", "")
+                for part in content
+                if isinstance(part, str) or part.get("type") == "text"
+            )
+        chat_messages.append({"role": _ROLES.get(message.type, "user"), "content": content})
+    return chat_messages
+
+
+class LocalInstance:
+    """One local server and its readiness state."""
+
+    __slots__ = ("base_url", "slots", "ready", "checked_at")
+
+    def __init__(self, base_url: str, slots: int):
+        self.base_url = base_url.rstrip("/")
+        self.slots = slots
+        self.ready = False
+        self.checked_at = 0.0
+
+
+class SlotLimiter:
+    """
+    Bounds the in-flight requests to one server across threads and event loops.
+
+    Waiters are served in arrival order. A released slot is handed over directly
+    to the next waiter, which is either a blocked thread or a future on its own loop.
+    """
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self._in_use = 0
+        self._waiters: deque = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take a slot, blocking the calling thread until one is free."""
+        with self._lock:
+            if self._in_use < self.slots and not self._waiters:
+                self._in_use += 1
+                return
+            event = threading.Event()
+            self._waiters.append(event)
+        event.wait()
+
+    async def aacquire(self) -> None:
+        """Take a slot without blocking the event loop."""
+        future = asyncio.get_running_loop().create_future()
+        with self._lock:
+            if self._in_use < self.slots and not self._waiters:
+                self._in_use += 1
+                return
+            self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                if future in self._waiters:
+                    self._waiters.remove(future)
+                    raise
+            # The slot was handed over before the cancellation; pass it on
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        """Return a slot, handing it to the next waiter if there is one."""
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if isinstance(waiter, threading.Event):
+                    waiter.set()
+                    return
+                try:
+                    waiter.get_loop().call_soon_threadsafe(self._wake, waiter)
+                    return
+                except RuntimeError:
+                    # The waiter's loop is closed
+                    continue
+            self._in_use -= 1
+
+    def _wake(self, future: asyncio.Future) -> None:
+        """Give a handed-over slot to an async waiter, or pass it on if it was cancelled."""
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+    def __enter__(self) -> "SlotLimiter":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.release()
+
+    async def __aenter__(self) -> "SlotLimiter":
+        await self.aacquire()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self.release()
+
+
+class LocalLLMPool:
+    def __init__(
+        self,
+        base_urls: List[str],
+        slots_per_instance: int = 4,
+        request_timeout: float = 300.0,
+        probe_interval: float = 10.0,
+        probe_timeout: float = 2.0,
+        startup_timeout: float = 30.0,
+        transport: Optional[Any] = None,
+    ):
+        """
+        Initialize the LocalLLMPool.
+
+        Args:
+            base_urls (List[str]): Server URLs, e.g. ``http://127.0.0.1:8080``.
+            slots_per_instance (int): Concurrent requests per server; match the
+                server's ``--parallel`` setting.
+            request_timeout (float): Seconds allowed for one completion.
+            probe_interval (float): Seconds a readiness probe result is trusted.
+            probe_timeout (float): Seconds allowed for one readiness probe.
+            startup_timeout (float): Seconds to wait for a first ready server.
+            transport (Optional[Any]): httpx transport override, e.g. httpx.MockTransport.
+        """
+        if not base_urls:
+            raise ValueError("At least one local LLM server URL is required")
+        self.instances = [LocalInstance(url, slots_per_instance) for url in base_urls]
+        self.request_timeout = request_timeout
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.startup_timeout = startup_timeout
+        self.transport = transport
+        self._next = 0
+        self._lock = threading.Lock()
+        # HTTP clients are bound to one event loop; sync wrappers run a new loop per call
+        self._loop_state: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Any]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        # Slots are shared by sync calls and every event loop
+        self._slots = [SlotLimiter(instance.slots) for instance in self.instances]
+        # One pooled client for all sync calls; httpx.Client is thread-safe
+        self._sync_client = httpx.Client(timeout=self.request_timeout, transport=self.transport)
+
+    @classmethod
+    def from_config(cls, config: Any) -> "LocalLLMPool":
+        """
+        Build a pool from config.yaml's ``local_llm`` section.
+
+        Args:
+            config (Any): Loaded Config instance.
+
+        Returns:
+            LocalLLMPool: The configured pool.
+        """
+        local_config = config.get("local_llm", {})
+        return cls(
+            base_urls=local_config.get("base_urls", ["http://127.0.0.1:8080"]),
+            slots_per_instance=local_config.get("slots_per_instance", 4),
+            request_timeout=local_config.get("request_timeout", 300),
+            probe_interval=local_config.get("probe_interval", 10),
+            probe_timeout=local_config.get("probe_timeout", 2),
+            startup_timeout=local_config.get("startup_timeout", 30),
+        )
+
+    def chat_model(self, temperature: float = 0.7, max_output_tokens: int = 2048) -> "LocalChatModel":
+        """Return a chat model that sends its requests through this pool."""
+        return LocalChatModel(self, temperature=temperature, max_output_tokens=max_output_tokens)
+
+    def close(self) -> None:
+        """Close the sync HTTP client. Async clients are closed when their event loop shuts down."""
+        self._sync_client.close()
+
+    async def _client_lifetime(self) -> AsyncIterator[httpx.AsyncClient]:
+        """
+        Own the async client of one event loop.
+
+        The loop tracks this generator once it has started; loop.shutdown_asyncgens,
+        which asyncio.run calls before closing the loop, finalizes it and closes the client.
+        """
+        client = httpx.AsyncClient(timeout=self.request_timeout, transport=self.transport)
+        try:
+            yield client
+        finally:
+            await client.aclose()
+
+    async def _state(self) -> Dict[str, Any]:
+        """Return the HTTP client of the running event loop."""
+        loop = asyncio.get_running_loop()
+        state = self._loop_state.get(loop)
+        if state is None:
+            lifetime = self._client_lifetime()
+            state = {
+                "client": await lifetime.__anext__(),
+                # The loop only holds a weak reference to the generator
+                "lifetime": lifetime,
+            }
+            self._loop_state[loop] = state
+        return state
+
+    def _rotate(self, ready: List[int]) -> List[int]:
+        """Order ready instance indexes round-robin, starting after the last pick."""
+        with self._lock:
+            start = self._next % len(ready)
+            self._next += 1
+        return ready[start:] + ready[:start]
+
+    def _record_probe(self, instance: LocalInstance, ready: bool) -> None:
+        """Store a readiness probe result, logging state changes."""
+        if ready != instance.ready:
+            logger.info(f"Local LLM server {instance.base_url} is {'ready' if ready else 'not ready'}")
+        instance.ready = ready
+        instance.checked_at = time.monotonic()
+
+    async def _probe(self, client: httpx.AsyncClient, instance: LocalInstance) -> bool:
+        """Check readiness of an instance, reusing a recent probe result."""
+        if time.monotonic() - instance.checked_at < self.probe_interval:
+            return instance.ready
+        try:
+            # llama.cpp and llamafile answer 503 while the model is still loading
+            response = await client.get(f"{instance.base_url}/health", timeout=self.probe_timeout)
+            ready = response.status_code == 200
+        except httpx.HTTPError:
+            ready = False
+        self._record_probe(instance, ready)
+        return ready
+
+    def _probe_sync(self, client: httpx.Client, instance: LocalInstance) -> bool:
+        """Synchronous counterpart of _probe."""
+        if time.monotonic() - instance.checked_at < self.probe_interval:
+            return instance.ready
+        try:
+            response = client.get(f"{instance.base_url}/health", timeout=self.probe_timeout)
+            ready = response.status_code == 200
+        except httpx.HTTPError:
+            ready = False
+        self._record_probe(instance, ready)
+        return ready
+
+    async def _ready_instances(self, client: httpx.AsyncClient) -> List[int]:
+        """Return ready instance indexes in round-robin order, waiting for startup if needed."""
+        deadline = time.monotonic() + self.startup_timeout
+        while True:
+            probes = await asyncio.gather(*(self._probe(client, instance) for instance in self.instances))
+            ready = [index for index, ok in enumerate(probes) if ok]
+            if ready:
+                return self._rotate(ready)
+            if time.monotonic() >= deadline:
+                urls = ", ".join(instance.base_url for instance in self.instances)
+                raise RuntimeError(f"No local LLM server is ready at {urls}")
+            await asyncio.sleep(min(1.0, self.probe_interval))
+            for instance in self.instances:
+                instance.checked_at = 0.0
+
+    def _ready_instances_sync(self, client: httpx.Client) -> List[int]:
+        """Synchronous counterpart of _ready_instances."""
+        deadline = time.monotonic() + self.startup_timeout
+        while True:
+            ready = [index for index, instance in enumerate(self.instances) if self._probe_sync(client, instance)]
+            if ready:
+                return self._rotate(ready)
+            if time.monotonic() >= deadline:
+                urls = ", ".join(instance.base_url for instance in self.instances)
+                raise RuntimeError(f"No local LLM server is ready at {urls}")
+            time.sleep(min(1.0, self.probe_interval))
+            for instance in self.instances:
+                instance.checked_at = 0.0
+
+    async def acomplete(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send a chat completion request to the next ready instance.
+
+        Servers that refuse the connection are marked not ready and the request
+        moves on to the next one; timeouts and HTTP errors are raised.
+
+        Args:
+            payload (Dict[str, Any]): OpenAI-style chat completion request body.
+
+        Returns:
+            Dict[str, Any]: The decoded response body.
+        """
+        state = await self._state()
+        client = state["client"]
+        last_error: Optional[Exception] = None
+        for index in await self._ready_instances(client):
+            instance = self.instances[index]
+            async with self._slots[index]:
+                try:
+                    response = await client.post(f"{instance.base_url}/v1/chat/completions", json=payload)
+                except httpx.ConnectError as e:
+                    self._record_probe(instance, False)
+                    last_error = e
+                    continue
+            response.raise_for_status()
+            return response.json()
+        raise RuntimeError(f"All local LLM servers failed: {str(last_error)}")
+
+    def complete(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Synchronous counterpart of acomplete."""
+        client = self._sync_client
+        last_error: Optional[Exception] = None
+        for index in self._ready_instances_sync(client):
+            instance = self.instances[index]
+            with self._slots[index]:
+                try:
+                    response = client.post(f"{instance.base_url}/v1/chat/completions", json=payload)
+                except httpx.ConnectError as e:
+                    self._record_probe(instance, False)
+                    last_error = e
+                    continue
+            response.raise_for_status()
+            return response.json()
+        raise RuntimeError(f"All local LLM servers failed: {str(last_error)}")
+
+    def stream(self, payload: Dict[str, Any]) -> Iterator[str]:
+        """
+        Stream a chat completion from the next ready instance.
+
+        Args:
+            payload (Dict[str, Any]): OpenAI-style chat completion request body.
+
+        Yields:
+            str: Content deltas as they arrive.
+        """
+        payload = dict(payload, stream=True)
+        client = self._sync_client
+        index = self._ready_instances_sync(client)[0]
+        instance = self.instances[index]
+        with self._slots[index]:
+            with client.stream("POST", f"{instance.base_url}/v1/chat/completions", json=payload) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    delta = json.loads(data)["choices"][0].get("delta", {})
+                    if delta.get("content"):
+                        yield delta["content"]
+
+
+class LocalChatModel:
+    """Chat model facade over a LocalLLMPool with the invoke/ainvoke/stream interface used in this package."""
+
+    # llama.cpp and llamafile constrain sampling to a JSON schema via response_format
+    supports_json_schema = True
+
+    def __init__(self, pool: LocalLLMPool, temperature: float = 0.7, max_output_tokens: int = 2048):
+        self.pool = pool
+        self.temperature = temperature
+        self.max_output_tokens = max_output_tokens
+
+    def _payload(self, messages: List[Any], response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Build the chat completion request body."""
+        payload = {
+            "messages": to_chat_messages(messages),
+            "temperature": self.temperature,
+            "max_tokens": self.max_output_tokens,
+        }
+        if response_schema:
+            payload["response_format"] = {"type": "json_object", "schema": response_schema}
+        return payload
+
+    @staticmethod
+    def _to_message(body: Dict[str, Any]) -> AIMessage:
+        """Convert a chat completion response into an AIMessage with usage metadata."""
+        content = body["choices"][0]["message"].get("content") or ""
+        usage = body.get("usage")
+        if not usage:
+            return AIMessage(content=content)
+        return AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": usage.get("prompt_tokens", 0),
+                "output_tokens": usage.get("completion_tokens", 0),
+                "total_tokens": usage.get("total_tokens", 0),
+            },
+        )
+
+    def invoke(self, messages: List[Any], response_schema: Optional[Dict[str, Any]] = None) -> AIMessage:
+        """Generate a reply synchronously, optionally constrained to a JSON schema."""
+        return self._to_message(self.pool.complete(self._payload(messages, response_schema)))
+
+    async def ainvoke(self, messages: List[Any], response_schema: Optional[Dict[str, Any]] = None) -> AIMessage:
+        """Generate a reply without blocking the event loop, optionally constrained to a JSON schema."""
+        return self._to_message(await self.pool.acomplete(self._payload(messages, response_schema)))
+
+    def stream(self, messages: List[Any]) -> Iterator[AIMessageChunk]:
+        """Generate a reply as a stream of message chunks."""
+        for text in self.pool.stream(self._payload(messages)):
+            yield AIMessageChunk(content=text)
+
+
+_pool: Optional[LocalLLMPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_local_llm_pool(config: Optional[Any] = None) -> LocalLLMPool:
+    """
+    Return the process-wide LocalLLMPool, creating it from config.yaml on first use.
+
+    Args:
+        config (Optional[Any]): Loaded Config instance. Loaded when omitted.
+
+    Returns:
+        LocalLLMPool: The shared pool.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                if config is None:
+                    from podcastfy.utils.config import load_config
+
+                    config = load_config()
+                _pool = LocalLLMPool.from_config(config)
+    return _pool
@@ -5,32 +5,32 @@ This module handles the loading and merging of prompt templates.
 """
 
 import os
-import yaml
 from typing import Dict, Any, Optional
+from podcastfy.utils.prompt_registry import get_prompt_registry
 
 def load_custom_prompt(path: str) -> str:
     """Load custom prompt from file."""
-    with open(path, 'r', encoding='utf-8') as f:
-        return f.read()
+    return get_prompt_registry().get_text(path)
 
 class PromptHandler:
     def __init__(self, base_prompt_path: str, custom_prompt_path: Optional[str] = None):
         """Initialize the PromptHandler."""
         self.base_prompt_path = base_prompt_path
         self.custom_prompt_path = custom_prompt_path
+        # Resolved once; a missing custom prompt means the base prompt is used alone
+        self.has_custom_prompt = bool(custom_prompt_path) and os.path.exists(custom_prompt_path)
+        self.registry = get_prompt_registry()
 
     def load_base_prompt(self) -> str:
         """Load the base prompt template."""
-        with open(self.base_prompt_path, 'r', encoding='utf-8') as f:
-            return f.read()
+        return self.registry.get_text(self.base_prompt_path)
 
     def load_custom_prompt(self) -> Dict[str, Any]:
         """Load the custom prompt configuration."""
-        if not self.custom_prompt_path or not os.path.exists(self.custom_prompt_path):
+        if not self.has_custom_prompt:
             return {}
         
-        with open(self.custom_prompt_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+        return self.registry.get_yaml(self.custom_prompt_path)
 
     def format_custom_section(self, config: Dict[str, Any]) -> str:
         """Format custom configuration into prompt section."""
@@ -86,10 +86,19 @@ The darkness here isn't natural. It moves, shifts like something alive. And the
         return "\n\n".join(sections)
 
     def merge_prompts(self) -> str:
-        """Merge base prompt with custom configuration."""
-        base_prompt = self.load_base_prompt()
-        custom_config = self.load_custom_prompt()
-        
+        """Merge base prompt with custom configuration, reusing a previous merge of the same content."""
+        base_file = self.registry.get_file(self.base_prompt_path)
+        if not self.has_custom_prompt:
+            return base_file.text
+
+        custom_file = self.registry.get_file(self.custom_prompt_path, parse_yaml=True)
+        return self.registry.compile(
+            ("merged_prompt", base_file.content_hash, custom_file.content_hash),
+            lambda: self._merge(base_file.text, custom_file.data),
+        )
+
+    def _merge(self, base_prompt: str, custom_config: Dict[str, Any]) -> str:
+        """Insert the formatted custom section into the base prompt."""
         if not custom_config:
             return base_prompt
             
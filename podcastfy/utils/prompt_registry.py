@@ -0,0 +1,186 @@
+"""
+Prompt Registry Module
+
+This module loads, validates and pre-merges prompt templates once per process.
+Files are re-read only when their mtime changes, and mtimes are checked at most
+once per ``reload_interval`` seconds, so hot paths are served from memory.
+Compiled prompts (e.g. a base prompt merged with a custom YAML section) are keyed
+by the content hashes of their inputs, so an unchanged merge is not redone while
+it stays among the most recently used.
+"""
+
+import os
+import copy
+import time
+import string
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+import yaml
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RELOAD_INTERVAL = 2.0
+DEFAULT_MAX_COMPILED = 128
+
+
+class PromptFile:
+    """A loaded prompt file and the metadata used to detect changes."""
+
+    __slots__ = ("path", "text", "data", "content_hash", "mtime", "checked_at")
+
+    def __init__(self, path: str, text: str, data: Any, mtime: Tuple[int, int], checked_at: float):
+        self.path = path
+        self.text = text
+        self.data = data
+        self.content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        self.mtime = mtime
+        self.checked_at = checked_at
+
+
+class PromptRegistry:
+    def __init__(self, reload_interval: float = DEFAULT_RELOAD_INTERVAL, max_compiled: int = DEFAULT_MAX_COMPILED):
+        """
+        Initialize the PromptRegistry.
+
+        Args:
+            reload_interval (float): Minimum seconds between mtime checks of a file.
+                Use 0 to check on every access.
+            max_compiled (int): Compiled prompts kept; the least recently used are evicted.
+        """
+        self.reload_interval = reload_interval
+        self.max_compiled = max_compiled
+        self._files: Dict[str, PromptFile] = {}
+        self._compiled: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get_file(self, path: str, parse_yaml: bool = False) -> PromptFile:
+        """
+        Return a loaded prompt file, reloading it only if its mtime changed.
+
+        Args:
+            path (str): Path to the prompt file.
+            parse_yaml (bool): Parse and validate the file as a YAML mapping.
+
+        Returns:
+            PromptFile: The loaded file.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            ValueError: If the file is empty or, with ``parse_yaml``, not a YAML mapping.
+        """
+        with self._lock:
+            prompt_file = self._load(path)
+            # A file first loaded as text is parsed the first time it is asked for as YAML
+            if parse_yaml and prompt_file.data is None:
+                data = yaml.safe_load(prompt_file.text)
+                if not isinstance(data, dict):
+                    raise ValueError(f"Prompt file must contain a YAML mapping: {path}")
+                prompt_file.data = data
+            return prompt_file
+
+    def _load(self, path: str) -> PromptFile:
+        """Return the cached file of ``path``, reading it again only if its mtime changed."""
+        key = os.path.abspath(path)
+        now = time.monotonic()
+        cached = self._files.get(key)
+        if cached is not None and now - cached.checked_at < self.reload_interval:
+            return cached
+
+        stat = os.stat(key)
+        # Size catches rewrites within the filesystem's mtime resolution
+        mtime = (stat.st_mtime_ns, stat.st_size)
+        if cached is not None and cached.mtime == mtime:
+            cached.checked_at = now
+            return cached
+
+        logger.debug(f"Loading prompt file {path}")
+        with open(key, "r", encoding="utf-8") as f:
+            text = f.read()
+        if not text.strip():
+            raise ValueError(f"Prompt file is empty: {path}")
+        prompt_file = PromptFile(key, text, None, mtime, now)
+        self._files[key] = prompt_file
+        return prompt_file
+
+    def get_text(self, path: str) -> str:
+        """Return the text of a prompt file."""
+        return self.get_file(path).text
+
+    def get_yaml(self, path: str) -> Dict[str, Any]:
+        """Return a copy of the parsed mapping of a YAML prompt file, safe for the caller to modify."""
+        return copy.deepcopy(self.get_file(path, parse_yaml=True).data)
+
+    def get_template_fields(self, path: str) -> List[str]:
+        """
+        Return the placeholder names used by a str.format template file.
+
+        Args:
+            path (str): Path to the template.
+
+        Returns:
+            List[str]: Placeholder field names, in order of first use.
+
+        Raises:
+            ValueError: If the template has malformed placeholders.
+        """
+        prompt_file = self.get_file(path)
+
+        def parse_fields() -> List[str]:
+            fields = []
+            for _, field_name, _, _ in string.Formatter().parse(prompt_file.text):
+                if field_name and field_name not in fields:
+                    fields.append(field_name)
+            return fields
+
+        return self.compile(("template_fields", prompt_file.content_hash), parse_fields)
+
+    def compile(self, key: Hashable, builder: Callable[[], Any]) -> Any:
+        """
+        Return the compiled prompt for ``key``, building it on first use.
+
+        Keys should be made of the content hashes of the inputs so that a changed
+        file produces a new key while unchanged inputs reuse the compiled result.
+
+        Args:
+            key (Hashable): Cache key for the compiled prompt.
+            builder (Callable[[], Any]): Produces the compiled prompt.
+
+        Returns:
+            Any: The compiled prompt.
+        """
+        with self._lock:
+            if key in self._compiled:
+                self._compiled.move_to_end(key)
+                return self._compiled[key]
+            compiled = self._compiled[key] = builder()
+            while len(self._compiled) > self.max_compiled:
+                self._compiled.popitem(last=False)
+            return compiled
+
+    def clear(self) -> None:
+        """Forget all loaded files and compiled prompts."""
+        with self._lock:
+            self._files.clear()
+            self._compiled.clear()
+
+
+_registry: Optional[PromptRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """
+    Return the process-wide PromptRegistry.
+
+    Returns:
+        PromptRegistry: The shared registry instance.
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = PromptRegistry()
+    return _registry
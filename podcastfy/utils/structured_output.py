@@ -0,0 +1,303 @@
+"""
+Structured Output Module
+
+This module gets JSON objects that match a schema out of LLM calls without
+throwing paid replies away. The provider's JSON-schema mode is used when the
+model supports it (Gemini ``response_schema``, llama.cpp ``response_format``);
+replies are then parsed tolerantly (code fences, trailing commas, prose around
+the object), and only the fields that are still missing or invalid are asked
+for again, once. Parse outcomes are counted per kind of call in PARSE_METRICS.
+"""
+
+import re
+import json
+import threading
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.messages import AIMessage, HumanMessage
+from podcastfy.utils.token_budget import count_message_tokens
+
+logger = logging.getLogger(__name__)
+
+_FENCE_PATTERN = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+_TRAILING_COMMA_PATTERN = re.compile(r",\s*([}\]])")
+
+SCENE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "location": {"type": "string"},
+        "tone": {"type": "string"},
+        "characters": {"type": "array", "items": {"type": "string"}, "minItems": 1},
+        "key_elements": {"type": "array", "items": {"type": "string"}, "minItems": 3, "maxItems": 3},
+        "transitions": {"type": "string"},
+    },
+    "required": ["location", "tone", "characters", "key_elements", "transitions"],
+}
+
+TITLE_SCHEMA = {
+    "type": "object",
+    "properties": {"title": {"type": "string"}},
+    "required": ["title"],
+}
+
+SHOT_SCHEMA = {
+    "type": "object",
+    "properties": {"description": {"type": "string"}},
+    "required": ["description"],
+}
+
+
+class StructuredOutputError(ValueError):
+    """Raised when required fields are still missing or invalid after the re-ask."""
+
+    def __init__(self, kind: str, fields: List[str], partial: Dict[str, Any]):
+        super().__init__(f"Invalid {kind} output, failing fields: {', '.join(fields)}")
+        self.kind = kind
+        self.fields = fields
+        self.partial = partial
+
+
+class ParseMetrics:
+    """Thread-safe counters of structured output outcomes per kind of call."""
+
+    COUNTERS = ("calls", "repaired", "reasks", "failures")
+
+    def __init__(self):
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, counter: str) -> None:
+        """Increment ``counter`` for ``kind``."""
+        with self._lock:
+            counts = self._counts.setdefault(kind, dict.fromkeys(self.COUNTERS, 0))
+            counts[counter] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Return a copy of the counters with each kind's re-ask and failure rates."""
+        with self._lock:
+            result = {}
+            for kind, counts in self._counts.items():
+                calls = counts["calls"] or 1
+                result[kind] = dict(
+                    counts,
+                    reask_rate=counts["reasks"] / calls,
+                    failure_rate=counts["failures"] / calls,
+                )
+            return result
+
+    def render_prometheus(self) -> str:
+        """Render the counters in the Prometheus text exposition format."""
+        lines = []
+        snapshot = self.snapshot()
+        for counter in self.COUNTERS:
+            name = f"podcastfy_structured_output_{counter}_total"
+            lines.append(f"# TYPE {name} counter")
+            for kind, counts in sorted(snapshot.items()):
+                lines.append(f'{name}{{kind="{kind}"}} {counts[counter]}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Clear all counters."""
+        with self._lock:
+            self._counts.clear()
+
+
+PARSE_METRICS = ParseMetrics()
+
+
+def _outermost_object(text: str) -> Optional[str]:
+    """Return the first balanced ``{...}`` in text, ignoring braces inside strings."""
+    start = text.find("{")
+    if start == -1:
+        return None
+    depth = 0
+    in_string = False
+    escaped = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:index + 1]
+    # Unterminated object: hand back the rest for the caller to reject
+    return text[start:]
+
+
+def repair_json(text: str) -> Tuple[Any, bool]:
+    """
+    Parse a JSON object from an LLM reply, repairing common formatting slips.
+
+    Args:
+        text (str): Raw reply text.
+
+    Returns:
+        Tuple[Any, bool]: The parsed value and whether a repair was needed.
+
+    Raises:
+        ValueError: If no JSON object can be recovered.
+    """
+    stripped = text.strip()
+    try:
+        return json.loads(stripped), False
+    except json.JSONDecodeError:
+        pass
+
+    fence = _FENCE_PATTERN.search(stripped)
+    if fence:
+        stripped = fence.group(1).strip()
+    candidate = _outermost_object(stripped)
+    if candidate is None:
+        raise ValueError("No JSON object found in reply")
+    candidate = _TRAILING_COMMA_PATTERN.sub(r"\1", candidate)
+    try:
+        return json.loads(candidate), True
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Unrepairable JSON in reply: {str(e)}")
+
+
+def _valid(value: Any, schema: Dict[str, Any]) -> bool:
+    """Check a value against the subset of JSON schema used in this module."""
+    expected = schema.get("type")
+    if expected == "string":
+        return isinstance(value, str) and bool(value.strip())
+    if expected == "integer":
+        return isinstance(value, int) and not isinstance(value, bool)
+    if expected == "number":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if expected == "array":
+        if not isinstance(value, list):
+            return False
+        if len(value) < schema.get("minItems", 0) or len(value) > schema.get("maxItems", len(value)):
+            return False
+        item_schema = schema.get("items")
+        return item_schema is None or all(_valid(item, item_schema) for item in value)
+    if expected == "object":
+        return isinstance(value, dict)
+    return True
+
+
+def failing_fields(data: Any, schema: Dict[str, Any]) -> List[str]:
+    """
+    Return the required fields of ``schema`` that are missing or invalid in ``data``.
+
+    Args:
+        data (Any): Parsed reply.
+        schema (Dict[str, Any]): Object schema.
+
+    Returns:
+        List[str]: Failing field names, in schema order.
+    """
+    if not isinstance(data, dict):
+        return list(schema["required"])
+    return [
+        field for field in schema["required"]
+        if field not in data or not _valid(data[field], schema["properties"][field])
+    ]
+
+
+def structured_kwargs(llm: Any, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the invoke arguments that switch ``llm`` to JSON-schema output, if it has such a mode."""
+    if getattr(llm, "supports_json_schema", False):
+        return {"response_schema": schema}
+    try:
+        from langchain_google_genai import ChatGoogleGenerativeAI
+    except ImportError:
+        return {}
+    if isinstance(llm, ChatGoogleGenerativeAI):
+        return {"response_mime_type": "application/json", "response_schema": schema}
+    return {}
+
+
+async def agenerate_structured(
+    llm: Any,
+    messages: List[Any],
+    schema: Dict[str, Any],
+    kind: str,
+    token_budget: Optional[Any] = None,
+    metrics: ParseMetrics = PARSE_METRICS,
+) -> Dict[str, Any]:
+    """
+    Generate a JSON object matching ``schema``, re-asking once for failing fields only.
+
+    Args:
+        llm (Any): Chat model with ``ainvoke``.
+        messages (List[Any]): Prompt messages.
+        schema (Dict[str, Any]): Object schema with ``properties`` and ``required``.
+        kind (str): Metric label, e.g. "scene", "title" or "shot".
+        token_budget (Optional[Any]): TokenBudget used to log usage of each call.
+        metrics (ParseMetrics): Counters to record outcomes in.
+
+    Returns:
+        Dict[str, Any]: The parsed object with every required field valid.
+
+    Raises:
+        StructuredOutputError: If fields are still failing after the re-ask;
+            ``partial`` holds the valid fields recovered so far.
+    """
+    metrics.record(kind, "calls")
+    data, reply = await _ainvoke_and_parse(llm, messages, schema, kind, token_budget, metrics)
+    failing = failing_fields(data, schema)
+    if not failing:
+        return data
+
+    metrics.record(kind, "reasks")
+    logger.warning(f"Re-asking for invalid {kind} fields: {', '.join(failing)}")
+    data = {field: value for field, value in data.items() if field not in failing} if isinstance(data, dict) else {}
+    reask_schema = {
+        "type": "object",
+        "properties": {field: schema["properties"][field] for field in failing},
+        "required": failing,
+    }
+    reask_messages = list(messages) + [
+        AIMessage(content=reply),
+        HumanMessage(content=(
+            f"These fields were missing or invalid: {', '.join(failing)}. "
+            f"Return ONLY a JSON object with these fields, matching this schema:\n"
+            f"{json.dumps(reask_schema)}"
+        )),
+    ]
+    fixes, _ = await _ainvoke_and_parse(llm, reask_messages, reask_schema, kind, token_budget, metrics)
+    if isinstance(fixes, dict):
+        data.update({field: fixes[field] for field in failing if field not in failing_fields(fixes, reask_schema)})
+
+    still_failing = failing_fields(data, schema)
+    if still_failing:
+        metrics.record(kind, "failures")
+        raise StructuredOutputError(kind, still_failing, data)
+    return data
+
+
+async def _ainvoke_and_parse(
+    llm: Any,
+    messages: List[Any],
+    schema: Dict[str, Any],
+    kind: str,
+    token_budget: Optional[Any],
+    metrics: ParseMetrics,
+) -> Tuple[Any, str]:
+    """Run one call and parse its reply; unparseable replies yield None."""
+    predicted_tokens = count_message_tokens(messages)
+    response = await llm.ainvoke(messages, **structured_kwargs(llm, schema))
+    if token_budget:
+        token_budget.log_usage(predicted_tokens, response)
+    reply = response.content if isinstance(response.content, str) else str(response.content)
+    try:
+        data, repaired = repair_json(reply)
+    except ValueError as e:
+        logger.warning(f"Could not parse {kind} reply: {str(e)}")
+        return None, reply
+    if repaired:
+        metrics.record(kind, "repaired")
+        logger.debug(f"Repaired {kind} reply JSON")
+    return data, reply
@@ -0,0 +1,253 @@
+"""
+Token Budget Module
+
+This module counts prompt tokens locally and enforces per-call input budgets
+configured under ``content_generator.token_budget`` in config.yaml. Prompts are
+fitted with a deterministic policy: fixed parts (system message, base prompt,
+custom sections) are always kept, and the remaining budget is shared across input
+sources by water-filling, so small sources stay whole and larger ones are
+trimmed at paragraph, sentence or word boundaries. Predicted and actual token
+usage are logged after each call.
+"""
+
+import re
+import math
+import logging
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Words are counted in pieces of up to six characters and punctuation marks one
+# each. This tracks subword tokenizers closely for prose and, unlike a chars/4
+# ratio, is additive across whitespace, so trimmed parts sum to the whole.
+_TOKEN_PATTERN = re.compile(r"\w{1,6}|[^\w\s]")
+_PARAGRAPH_PATTERN = re.compile(r"\n\s*\n")
+_SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+# Gemini bills an image with both sides up to 384px as one 258-token tile and
+# cuts larger ones into 768x768 tiles of 258 tokens each
+IMAGE_TILE_TOKENS = 258
+IMAGE_TILE_SIZE = 768
+IMAGE_SMALL_SIZE = 384
+# Images of unknown size are counted as squares of image_inputs' default max_dimension
+DEFAULT_IMAGE_SIZE = 1024
+
+DEFAULT_BUDGETS = {
+    "dialog": 200000,
+    "scenes": 32000,
+    "shots": 8000,
+    "titles": 4000,
+}
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count the LLM tokens in a text locally, without calling the provider.
+
+    Args:
+        text (str): Text to measure.
+
+    Returns:
+        int: Approximate token count.
+    """
+    if not text:
+        return 0
+    return len(_TOKEN_PATTERN.findall(text))
+
+
+def image_tokens(width: int, height: int) -> int:
+    """
+    Count the prompt tokens of an image from the size it is sent at.
+
+    Args:
+        width (int): Width in pixels.
+        height (int): Height in pixels.
+
+    Returns:
+        int: Tokens of the tiles the image is cut into.
+    """
+    if width <= IMAGE_SMALL_SIZE and height <= IMAGE_SMALL_SIZE:
+        return IMAGE_TILE_TOKENS
+    return math.ceil(width / IMAGE_TILE_SIZE) * math.ceil(height / IMAGE_TILE_SIZE) * IMAGE_TILE_TOKENS
+
+
+def count_message_tokens(
+    messages: Sequence[Any],
+    image_part_tokens: Optional[Callable[[Dict[str, Any]], int]] = None,
+) -> int:
+    """
+    Count the tokens of a list of chat messages or plain strings.
+
+    Args:
+        messages (Sequence[Any]): Messages whose content is text or a list of text and image parts.
+        image_part_tokens (Optional[Callable[[Dict[str, Any]], int]]): Counts an image part from
+            its processed size. Without it, images count as ``DEFAULT_IMAGE_SIZE`` squares.
+
+    Returns:
+        int: Approximate prompt token count.
+    """
+    total = 0
+    for message in messages:
+        content = getattr(message, "content", message)
+        if isinstance(content, str):
+            total += count_tokens(content)
+            continue
+        # Multimodal content: a list of text and image parts
+        for part in content:
+            if isinstance(part, str):
+                total += count_tokens(part)
+            elif part.get("type") == "text":
+                total += count_tokens(part.get("text", ""))
+            elif image_part_tokens is not None:
+                total += image_part_tokens(part)
+            else:
+                total += image_tokens(DEFAULT_IMAGE_SIZE, DEFAULT_IMAGE_SIZE)
+    return total
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Keep the head of a text that fits in ``max_tokens``, cutting at the coarsest boundary possible.
+
+    Args:
+        text (str): Text to trim.
+        max_tokens (int): Token allowance.
+
+    Returns:
+        str: The text itself if it fits, otherwise its longest fitting prefix.
+    """
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    kept: List[str] = []
+    used = 0
+    joiner = ""
+    for separator, pattern in (("\n\n", _PARAGRAPH_PATTERN), (" ", _SENTENCE_PATTERN), (" ", None)):
+        units = pattern.split(text) if pattern else text.split()
+        overflow = None
+        for unit in units:
+            unit_tokens = count_tokens(unit)
+            if used + unit_tokens > max_tokens:
+                overflow = unit
+                break
+            kept.append(joiner + unit if kept else unit)
+            joiner = separator
+            used += unit_tokens
+        if overflow is None:
+            break
+        # Retry the unit that overflowed at the next, finer boundary
+        text = overflow
+    return "".join(kept).strip()
+
+
+def allocate(sizes: Sequence[int], available: int) -> List[int]:
+    """
+    Share ``available`` tokens across sources by water-filling.
+
+    Sources are visited from smallest to largest (ties broken by position); each
+    gets at most an equal share of what is left, so unused allowance of small
+    sources flows to larger ones. The result only depends on the inputs.
+
+    Args:
+        sizes (Sequence[int]): Token count of each source.
+        available (int): Tokens available for all sources.
+
+    Returns:
+        List[int]: Token allowance per source, in input order.
+    """
+    allowances = [0] * len(sizes)
+    remaining = max(0, available)
+    order = sorted(range(len(sizes)), key=lambda i: (sizes[i], i))
+    for position, index in enumerate(order):
+        share = remaining // (len(order) - position)
+        allowances[index] = min(sizes[index], share)
+        remaining -= allowances[index]
+    return allowances
+
+
+class TokenBudget:
+    def __init__(self, name: str, max_input_tokens: int):
+        """
+        Initialize a TokenBudget for one kind of LLM call.
+
+        Args:
+            name (str): Budget name used in logs (e.g. "dialog", "scenes").
+            max_input_tokens (int): Maximum prompt tokens per call.
+        """
+        self.name = name
+        self.max_input_tokens = max_input_tokens
+
+    @classmethod
+    def from_config(cls, config: Any, name: str) -> "TokenBudget":
+        """
+        Build the budget ``name`` from config.yaml's ``content_generator.token_budget`` section.
+
+        Args:
+            config (Any): Loaded Config instance.
+            name (str): Budget name.
+
+        Returns:
+            TokenBudget: The configured budget, or the built-in default.
+        """
+        budgets = config.get("content_generator", {}).get("token_budget", {})
+        return cls(name, budgets.get(name, DEFAULT_BUDGETS.get(name, DEFAULT_BUDGETS["dialog"])))
+
+    def fit(self, fixed: Sequence[str], sources: Sequence[str], reserved_tokens: int = 0) -> List[str]:
+        """
+        Trim input sources so that fixed parts plus sources fit the budget.
+
+        Args:
+            fixed (Sequence[str]): Prompt parts that are always sent unchanged.
+            sources (Sequence[str]): Input sources, trimmed as needed.
+            reserved_tokens (int): Tokens taken by non-text parts such as images.
+
+        Returns:
+            List[str]: Fitted sources, in input order.
+        """
+        fixed_tokens = sum(count_tokens(part) for part in fixed) + reserved_tokens
+        sizes = [count_tokens(source) for source in sources]
+        available = self.max_input_tokens - fixed_tokens
+        if fixed_tokens + sum(sizes) <= self.max_input_tokens:
+            return list(sources)
+
+        if available <= 0:
+            logger.warning(
+                f"Fixed prompt parts for '{self.name}' use {fixed_tokens} tokens, "
+                f"over the {self.max_input_tokens} token budget; dropping all input"
+            )
+        allowances = allocate(sizes, available)
+        fitted = [
+            source if allowance >= size else trim_to_tokens(source, allowance)
+            for source, size, allowance in zip(sources, sizes, allowances)
+        ]
+        logger.info(
+            f"Trimmed '{self.name}' input from {sum(sizes)} to "
+            f"{sum(count_tokens(source) for source in fitted)} tokens "
+            f"(budget {self.max_input_tokens}, fixed {fixed_tokens})"
+        )
+        return fitted
+
+    def log_usage(self, predicted_tokens: int, response: Any) -> Optional[Dict[str, int]]:
+        """
+        Log predicted prompt tokens next to the provider-reported usage.
+
+        Args:
+            predicted_tokens (int): Locally counted prompt tokens.
+            response (Any): LLM response; ``usage_metadata`` is read when present.
+
+        Returns:
+            Optional[Dict[str, int]]: Provider usage metadata, if any.
+        """
+        usage = getattr(response, "usage_metadata", None)
+        if not usage:
+            logger.info(f"'{self.name}' call: predicted {predicted_tokens} prompt tokens (no usage reported)")
+            return None
+        actual = usage.get("input_tokens", 0)
+        ratio = actual / predicted_tokens if predicted_tokens else 0.0
+        logger.info(
+            f"'{self.name}' call: predicted {predicted_tokens} prompt tokens, actual {actual} "
+            f"(x{ratio:.2f}), {usage.get('output_tokens', 0)} output tokens"
+        )
+        return usage
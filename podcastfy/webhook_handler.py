@@ -1,6 +1,7 @@
 """Webhook Handler Module"""
 
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, List, Any, Tuple
 import os
@@ -8,14 +9,18 @@ import shutil
 import json
 import asyncio
 from datetime import datetime
-from .content_generator import ContentGenerator
+from .content_generator import ContentGenerator, LLMBackend
 from .text_to_speech import TextToSpeech
 from .utils.image_generator import ImageGenerator
 from .utils.video_generator import VideoGenerator
 from .utils.config import load_config
+from .utils.token_budget import TokenBudget
+from .utils.structured_output import (
+    agenerate_structured, StructuredOutputError, PARSE_METRICS,
+    SCENE_SCHEMA, TITLE_SCHEMA, SHOT_SCHEMA
+)
 import logging
 import re
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import SystemMessage, HumanMessage
 
 # Configure logging
@@ -30,6 +35,7 @@ class VideoRequest(BaseModel):
     character_profiles: Optional[Dict[str, Any]] = None
     visual_style: Optional[Dict[str, Any]] = None
     shot_types: Optional[List[Dict[str, Any]]] = None
+    is_local: bool = False
 
 app = FastAPI(
     title="Podcastfy API",
@@ -72,15 +78,45 @@ def archive_old_files():
         logger.error(f"Error archiving old files: {str(e)}")
         raise
 
-async def generate_title_card(scene_index: int, scene_data: Dict[str, Any], llm: ChatGoogleGenerativeAI) -> str:
+def get_token_budgets(config: Any) -> Dict[str, TokenBudget]:
+    """Build the per-call token budgets used by the scene, title and shot prompts."""
+    return {name: TokenBudget.from_config(config, name) for name in ("scenes", "titles", "shots")}
+
+def fit_details(token_budget: Optional[TokenBudget], fixed: List[str], details: str) -> str:
+    """Trim the LLM-generated scene details of a title or shot prompt so the prompt fits its token budget."""
+    if token_budget is None:
+        return details
+    return token_budget.fit(fixed, [details])[0]
+
+def default_scene(scene_index: int) -> Dict[str, Any]:
+    """Fallback values for scene fields the LLM failed to provide."""
+    return {
+        "location": f"Scene {scene_index + 1}",
+        "tone": "Noir, mysterious",
+        "characters": ["DetectiveSarah", "OfficerMike"],
+        "key_elements": ["Shadows", "Rain", "City lights"],
+        "transitions": "Fade to next scene"
+    }
+
+def write_json(path: str, data: Any) -> None:
+    """Write data as indented JSON; called via asyncio.to_thread from handlers."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+
+async def generate_title_card(scene_index: int, scene_data: Dict[str, Any], llm: Any, token_budget: Optional[TokenBudget] = None) -> str:
     """Generate a noir-style title card for a scene."""
     try:
-        title_prompt = f"""Create a noir-style title card for scene {scene_index + 1}.
+        system_prompt = """You are a noir film title writer.
+Create dramatic, atmospheric chapter titles.
+Return ONLY a valid JSON object - no other text or formatting."""
+        scene_details = f"""- Location: {scene_data['location']}
+- Tone: {scene_data['tone']}
+- Key Elements: {', '.join(scene_data['key_elements'])}"""
+        title_head = f"""Create a noir-style title card for scene {scene_index + 1}.
 
 Scene Details:
-- Location: {scene_data['location']}
-- Tone: {scene_data['tone']}
-- Key Elements: {', '.join(scene_data['key_elements'])}
+"""
+        title_tail = f"""
 
 Requirements:
 1. Create a short, dramatic chapter title (2-4 words)
@@ -89,19 +125,19 @@ Requirements:
 4. Use classic noir film chapter style
 
 Example Format:
-"Shadows of Truth" or "Midnight Confessions"
+{{"title": "Shadows of Truth"}} or {{"title": "Midnight Confessions"}}
 
-Return ONLY the title text, no quotes or additional formatting."""
+Return ONLY a JSON object with a "title" field."""
+        # Scene fields come from the LLM and can be arbitrarily long
+        scene_details = fit_details(token_budget, [system_prompt, title_head, title_tail], scene_details)
 
         messages = [
-            SystemMessage(content="""You are a noir film title writer.
-Create dramatic, atmospheric chapter titles.
-Return ONLY the title text - no other text or formatting."""),
-            HumanMessage(content=title_prompt)
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=title_head + scene_details + title_tail)
         ]
         
-        response = llm.invoke(messages)
-        title = response.content.strip()
+        title_data = await agenerate_structured(llm, messages, TITLE_SCHEMA, "title", token_budget)
+        title = title_data["title"].strip().strip('"')
         logger.debug(f"Generated title for scene {scene_index + 1}: {title}")
         
         return title
@@ -110,17 +146,21 @@ Return ONLY the title text - no other text or formatting."""),
         logger.error(f"Error generating title for scene {scene_index + 1}: {str(e)}")
         return f"Chapter {scene_index + 1}"
 
-async def process_single_scene(scene_index: int, scene_config: Dict[str, int], dialog_content: str, gemini_api_key: str) -> Dict[str, Any]:
-    """Process a single scene with its own Gemini instance."""
+async def process_single_scene(scene_index: int, scene_config: Dict[str, int], dialog_content: str, gemini_api_key: str, token_budgets: Optional[Dict[str, TokenBudget]] = None, is_local: bool = False) -> Dict[str, Any]:
+    """Process a single scene with its own Gemini instance, or through the shared local pool."""
     try:
-        logger.info(f"Processing scene {scene_index + 1} with dedicated Gemini instance")
+        logger.info(f"Processing scene {scene_index + 1} with dedicated {'local' if is_local else 'Gemini'} instance")
+        if token_budgets is None:
+            token_budgets = get_token_budgets(load_config())
         
-        # Create a new Gemini instance for this scene
-        llm = ChatGoogleGenerativeAI(
-            model="gemini-1.5-pro-latest",
+        # Create a new LLM instance for this scene
+        llm = LLMBackend(
+            is_local=is_local,
             temperature=0.7,
-            google_api_key=gemini_api_key
-        )
+            max_output_tokens=8192,
+            model_name="gemini-1.5-pro-latest",
+            api_key=gemini_api_key
+        ).llm
         
         scene_prompt = f"""Create a noir scene description for scene {scene_index + 1} of {scene_config["num_scenes"]}.
 This scene should have EXACTLY {scene_config["shots_per_scene"]} distinct camera shots.
@@ -128,16 +168,11 @@ This scene should have EXACTLY {scene_config["shots_per_scene"]} distinct camera
 Return ONLY this JSON structure:
 
 {{
-  "scene": {{
-    "start_time": {scene_index * scene_config["scene_duration"]},
-    "duration": {scene_config["scene_duration"]},
-    "location": "Unique location for this scene",
-    "tone": "Specific noir mood and atmosphere",
-    "characters": ["DetectiveSarah", "OfficerMike"],
-    "key_elements": ["Three", "Distinct", "Visual elements"],
-    "transitions": "How this scene transitions",
-    "shots": {scene_config["shots_per_scene"]}
-  }}
+  "location": "Unique location for this scene",
+  "tone": "Specific noir mood and atmosphere",
+  "characters": ["DetectiveSarah", "OfficerMike"],
+  "key_elements": ["Three", "Distinct", "Visual elements"],
+  "transitions": "How this scene transitions"
 }}
 
 Requirements:
@@ -148,48 +183,43 @@ Requirements:
 5. Return ONLY valid JSON
 
 Context from dialog:
-{dialog_content}"""
+"""
 
-        messages = [
-            SystemMessage(content=f"""You are a noir film director creating scene {scene_index + 1} of {scene_config["num_scenes"]}.
+        system_prompt = f"""You are a noir film director creating scene {scene_index + 1} of {scene_config["num_scenes"]}.
 Focus on creating a unique and atmospheric scene.
 Return ONLY a valid JSON object.
-The response must start with {{ and end with }} - no other text allowed."""),
-            HumanMessage(content=scene_prompt)
+The response must start with {{ and end with }} - no other text allowed."""
+
+        # Trim the dialog context so the scene prompt fits its token budget
+        scene_budget = token_budgets["scenes"]
+        dialog_context = scene_budget.fit([system_prompt, scene_prompt], [dialog_content])[0]
+
+        messages = [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=scene_prompt + dialog_context)
         ]
         
-        logger.debug(f"Sending scene prompt to Gemini instance {scene_index + 1}")
-        response = llm.invoke(messages)
-        
-        # Clean and validate JSON response
-        response_text = response.content.strip()
+        logger.debug(f"Sending scene prompt to LLM instance {scene_index + 1}")
         try:
-            # Try to parse the response as JSON
-            scene_data = json.loads(response_text)
-            if "scene" not in scene_data:
-                raise ValueError("Missing 'scene' key in response")
-            scene_data = scene_data["scene"]
-            logger.debug(f"Generated scene {scene_index + 1}: {json.dumps(scene_data, indent=2)}")
-        except json.JSONDecodeError as e:
-            logger.error(f"Invalid JSON response from Gemini for scene {scene_index + 1}: {response_text}")
-            logger.error(f"JSON error: {str(e)}")
-            # Create default scene data
-            scene_data = {
-                "start_time": scene_index * scene_config["scene_duration"],
-                "duration": scene_config["scene_duration"],
-                "location": f"Scene {scene_index + 1}",
-                "tone": "Noir, mysterious",
-                "characters": ["DetectiveSarah", "OfficerMike"],
-                "key_elements": ["Shadows", "Rain", "City lights"],
-                "transitions": "Fade to next scene",
-                "shots": scene_config["shots_per_scene"]
-            }
+            scene_data = await agenerate_structured(llm, messages, SCENE_SCHEMA, "scene", scene_budget)
+        except StructuredOutputError as e:
+            # Keep every valid field; only the ones that failed twice fall back to defaults
+            logger.error(f"Scene {scene_index + 1} fields fell back to defaults: {', '.join(e.fields)}")
+            scene_data = dict(default_scene(scene_index), **e.partial)
+
+        # Timing and shot count come from the request, not the model
+        scene_data.update({
+            "start_time": scene_index * scene_config["scene_duration"],
+            "duration": scene_config["scene_duration"],
+            "shots": scene_config["shots_per_scene"]
+        })
+        logger.debug(f"Generated scene {scene_index + 1}: {json.dumps(scene_data, indent=2)}")
         
         # Generate title card for this scene
-        title = await generate_title_card(scene_index, scene_data, llm)
+        title = await generate_title_card(scene_index, scene_data, llm, token_budgets["titles"])
         
         # Generate shots for this scene with the same Gemini instance
-        shots = await generate_scene_shots(scene_data, llm, scene_index)
+        shots = await generate_scene_shots(scene_data, llm, scene_index, token_budgets["shots"])
         
         # Create the final scene segment
         segment = {
@@ -205,7 +235,7 @@ The response must start with {{ and end with }} - no other text allowed."""),
         logger.error(f"Error processing scene {scene_index + 1}: {str(e)}")
         raise
 
-async def generate_scene_shots(scene: Dict[str, Any], llm: ChatGoogleGenerativeAI, scene_index: int) -> List[str]:
+async def generate_scene_shots(scene: Dict[str, Any], llm: Any, scene_index: int, token_budget: Optional[TokenBudget] = None) -> List[str]:
     """Generate shots for a single scene using the same Gemini instance."""
     try:
         shots = []
@@ -234,17 +264,24 @@ async def generate_scene_shots(scene: Dict[str, Any], llm: ChatGoogleGenerativeA
             }
         ]
         
+        scene_details = f"""- Location: {scene['location']}
+- Tone: {scene['tone']}
+- Key Elements: {', '.join(scene['key_elements'])}
+- Characters: {', '.join(scene['characters'])}"""
+
         for shot_index in range(num_shots):
             base_shot = base_shot_types[shot_index % len(base_shot_types)]
             variation_num = (shot_index // len(base_shot_types)) + 1
             
-            shot_prompt = f"""Create a detailed noir visual description for shot {shot_index + 1} of {num_shots} in scene {scene_index + 1}:
+            system_prompt = f"""You are a noir cinematographer creating shot {shot_index + 1} of {num_shots} for scene {scene_index + 1}.
+Focus on powerful visuals and dramatic composition.
+Create a unique variation of {base_shot['type']}.
+Return ONLY a valid JSON object, no other text."""
+            shot_head = f"""Create a detailed noir visual description for shot {shot_index + 1} of {num_shots} in scene {scene_index + 1}:
 
 Scene Details:
-- Location: {scene['location']}
-- Tone: {scene['tone']}
-- Key Elements: {', '.join(scene['key_elements'])}
-- Characters: {', '.join(scene['characters'])}
+"""
+            shot_tail = f"""
 
 Shot Requirements:
 - Type: {base_shot['type']} (Variation {variation_num})
@@ -260,20 +297,18 @@ Create a cinematic description that:
 5. Creates a unique variation of the base shot type
 
 Example Format:
-Low angle shot through rain-streaked windows, harsh neon light cutting diagonal shadows across detective's face as she studies case files, city lights blurred in background.
+{{"description": "Low angle shot through rain-streaked windows, harsh neon light cutting diagonal shadows across detective's face as she studies case files, city lights blurred in background."}}
 
-IMPORTANT: Return ONLY the visual description, no other text."""
+IMPORTANT: Return ONLY a JSON object with a "description" field, no other text."""
+            details = fit_details(token_budget, [system_prompt, shot_head, shot_tail], scene_details)
 
             messages = [
-                SystemMessage(content=f"""You are a noir cinematographer creating shot {shot_index + 1} of {num_shots} for scene {scene_index + 1}.
-Focus on powerful visuals and dramatic composition.
-Create a unique variation of {base_shot['type']}.
-Return ONLY the shot description, no other text."""),
-                HumanMessage(content=shot_prompt)
+                SystemMessage(content=system_prompt),
+                HumanMessage(content=shot_head + details + shot_tail)
             ]
             
-            response = llm.invoke(messages)
-            shot_description = response.content.strip()
+            shot_data = await agenerate_structured(llm, messages, SHOT_SCHEMA, "shot", token_budget)
+            shot_description = shot_data["description"].strip()
             logger.debug(f"Generated shot {shot_index + 1} for scene {scene_index + 1}:\n{shot_description}")
             shots.append(shot_description)
         
@@ -294,7 +329,7 @@ async def generate_video(request: VideoRequest):
         dirs = ensure_directories()
             
         # Archive old files
-        archive_old_files()
+        await asyncio.to_thread(archive_old_files)
         
         config = load_config()
         gemini_api_key = os.getenv('GEMINI_API_KEY')
@@ -302,24 +337,24 @@ async def generate_video(request: VideoRequest):
         # Step 1: Generate dialog content
         logger.info("Generating dialog content...")
         content_generator = ContentGenerator(api_key=gemini_api_key)
-        dialog_content = content_generator.generate_qa_content(
-            input_texts=request.input_text
+        transcript_path = os.path.join(dirs['transcripts'], 'dialog.txt')
+        dialog_content = await content_generator.agenerate_qa_content(
+            input_texts=request.input_text,
+            output_filepath=transcript_path,
+            image_file_paths=request.image_paths or [],
+            is_local=request.is_local
         )
         logger.debug(f"Generated dialog content:\n{dialog_content}")
-        
-        # Save dialog content
-        transcript_path = os.path.join(dirs['transcripts'], 'dialog.txt')
-        with open(transcript_path, 'w', encoding='utf-8') as f:
-            f.write(dialog_content)
         logger.info(f"Dialog saved to {transcript_path}")
         
         # Step 2: Process each scene with its own Gemini instance
         logger.info(f"Processing {request.scene_config['num_scenes']} scenes with dedicated Gemini instances")
         
         # Create tasks for processing each scene
+        token_budgets = get_token_budgets(config)
         scene_tasks = []
         for i in range(request.scene_config["num_scenes"]):
-            task = process_single_scene(i, request.scene_config, dialog_content, gemini_api_key)
+            task = process_single_scene(i, request.scene_config, dialog_content, gemini_api_key, token_budgets, request.is_local)
             scene_tasks.append(task)
         
         # Process all scenes concurrently
@@ -328,15 +363,14 @@ async def generate_video(request: VideoRequest):
         
         # Save scene structure
         scenes_path = os.path.join(dirs['transcripts'], 'scenes.json')
-        with open(scenes_path, 'w', encoding='utf-8') as f:
-            json.dump(scene_segments, f, indent=2)
+        await asyncio.to_thread(write_json, scenes_path, scene_segments)
         logger.info(f"Scene structure saved to {scenes_path}")
         
         # Step 3: Generate audio
         logger.info("Generating audio...")
         tts = TextToSpeech(model='openai')
         audio_path = os.path.join(dirs['audio'], 'output.mp3')
-        tts.convert_to_speech(dialog_content, audio_path)
+        await asyncio.to_thread(tts.convert_to_speech, dialog_content, audio_path)
         logger.info(f"Audio saved to {audio_path}")
         
         # Step 4: Generate scene visualizations
@@ -355,7 +389,7 @@ async def generate_video(request: VideoRequest):
         # Step 5: Create final video with title cards
         logger.info("Creating video...")
         video_generator = VideoGenerator(scene_config=request.scene_config)
-        video_path = video_generator.create_slideshow(audio_path)
+        video_path = await asyncio.to_thread(video_generator.create_slideshow, audio_path)
         logger.info(f"Video saved to {video_path}")
         
         return {
@@ -370,3 +404,8 @@ async def generate_video(request: VideoRequest):
     except Exception as e:
         logger.error(f"Error generating video podcast: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Export structured output parse counters (calls, repairs, re-asks, failures) per kind."""
+    return PARSE_METRICS.render_prometheus()
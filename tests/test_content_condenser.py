@@ -0,0 +1,63 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from podcastfy.content_condenser import ContentCondenser
+from podcastfy.utils.token_budget import count_tokens
+
+
+class FakeLLM:
+	def __init__(self):
+		self.calls = 0
+
+	async def ainvoke(self, messages):
+		self.calls += 1
+		return SimpleNamespace(content=messages[-1].content[:40])
+
+
+class TestContentCondenser(unittest.TestCase):
+	def setUp(self):
+		import tempfile
+		self.tmp_dir = tempfile.TemporaryDirectory()
+		self.condenser = ContentCondenser()
+		self.condenser.chunk_tokens = 200
+		self.condenser.target_tokens = 300
+		self.condenser.cache_dir = self.tmp_dir.name
+		self.condenser._llm = FakeLLM()
+
+	def tearDown(self):
+		self.tmp_dir.cleanup()
+
+	def test_chunk_text_respects_budget(self):
+		text = "\n\n".join("The detective waits in the rain. " * 20 for _ in range(10))
+		chunks = self.condenser.chunk_text(text)
+		self.assertGreater(len(chunks), 1)
+		self.assertTrue(all(count_tokens(chunk) <= 200 for chunk in chunks))
+
+	def test_small_input_passes_through(self):
+		result = asyncio.run(self.condenser.condense(["short", "input"]))
+		self.assertEqual(result, "short\n\ninput")
+		self.assertEqual(self.condenser._llm.calls, 0)
+
+	def test_summaries_are_cached(self):
+		sources = ["Paragraph %d. " % i + "Rain falls on the city. " * 30 for i in range(8)]
+		first = asyncio.run(self.condenser.condense(sources))
+		calls = self.condenser._llm.calls
+		self.assertGreater(calls, 0)
+		self.assertLessEqual(count_tokens(first), 300)
+
+		second = asyncio.run(self.condenser.condense(sources))
+		self.assertEqual(first, second)
+		self.assertEqual(self.condenser._llm.calls, calls)
+
+	def test_single_summary_groups_are_not_reduced(self):
+		self.condenser.fan_in = 4
+		self.condenser.target_tokens = 30
+		self.condenser.chunk_text = lambda source: [source]
+		sources = ["Paragraph %d. " % i + "Rain falls on the city. " * 5 for i in range(5)]
+		asyncio.run(self.condenser.condense(sources))
+		# Five map calls, then one reduce of the first four summaries; the fifth passes through
+		self.assertEqual(self.condenser._llm.calls, 6)
+
+
+if __name__ == "__main__":
+	unittest.main()
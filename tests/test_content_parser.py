@@ -1,10 +1,41 @@
+import asyncio
+import gzip
+import io
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
 import unittest
 import pytest
+import httpx
+import requests
+from unittest.mock import patch
 from podcastfy.utils.config import load_config
 from podcastfy.content_parser.content_extractor import ContentExtractor
-from podcastfy.content_parser.youtube_transcriber import YouTubeTranscriber
-from podcastfy.content_parser.website_extractor import WebsiteExtractor
-from podcastfy.content_parser.pdf_extractor import PDFExtractor
+from podcastfy.content_parser.youtube_transcriber import YouTubeTranscriber, TranscriptCache, parse_video_id
+from podcastfy.content_parser.website_extractor import WebsiteExtractor, parse_html
+from podcastfy.content_parser.site_crawler import parse_sitemap
+from podcastfy.content_parser.pdf_extractor import PDFExtractor, section_name
+from podcastfy.content_parser.text_file_extractor import TextFileExtractor
+from podcastfy.content_parser.http_cache import HTTPCache, Page
+from podcastfy.content_parser.extraction_cache import ExtractionCache
+from podcastfy.content_parser.deduplicator import NearDuplicateRemover
+from podcastfy.utils.token_budget import count_tokens
+from podcastfy.content_parser.text_normalizer import TextNormalizer, _sequential_clean, compile_patterns, compile_probe, normalizer_settings
+
+
+def make_response(status_code, body, headers=None):
+    """Build a streamable requests.Response around an in-memory body."""
+    response = requests.models.Response()
+    response.status_code = status_code
+    response.headers = requests.structures.CaseInsensitiveDict(
+        {"Content-Type": "text/html; charset=utf-8", **(headers or {})}
+    )
+    response.raw = io.BytesIO(body)
+    response.encoding = "utf-8"
+    return response
 
 
 class TestContentParser(unittest.TestCase):
@@ -12,6 +43,44 @@ class TestContentParser(unittest.TestCase):
         # Add tests for ContentExtractor
         pass
 
+    def test_extract_batch_keeps_order_and_isolates_errors(self):
+        """
+        Test that batch extraction returns results in input order, bounds downloads
+        per host and reports a failing source without aborting the batch.
+        """
+        extractor = ContentExtractor()
+        extractor.website_extractor.cache = None
+        extractor.extraction_cache = None
+        lock = threading.Lock()
+        in_flight = {}
+        max_in_flight = {}
+
+        def fake_fetch(url):
+            host = url.split("/")[2]
+            with lock:
+                in_flight[host] = in_flight.get(host, 0) + 1
+                max_in_flight[host] = max(max_in_flight.get(host, 0), in_flight[host])
+            time.sleep(0.05)
+            with lock:
+                in_flight[host] -= 1
+            if url.endswith("broken"):
+                raise Exception(f"Failed to extract content from {url}: 404")
+            return Page(url, f"<html><body><nav>Menu</nav><p>Page {url.split('/')[-1]}</p></body></html>")
+
+        sources = [f"https://a.example/{i}" for i in range(4)] + [
+            "https://b.example/broken",
+            "./tests/data/pdf/file.pdf",
+        ]
+        with patch.object(extractor.website_extractor, "fetch", side_effect=fake_fetch):
+            results = extractor.extract_batch(sources, per_host_concurrency=2, parse_workers=2)
+
+        self.assertEqual([result["source"] for result in results], sources)
+        self.assertEqual([result["content"] for result in results[:4]], [f"Page {i}" for i in range(4)])
+        self.assertEqual(results[4]["status"], "error")
+        self.assertIn("404", results[4]["error"])
+        self.assertEqual(results[5]["status"], "success")
+        self.assertEqual(max_in_flight["a.example"], 2)
+
     @pytest.mark.skip(reason="IP getting blocked by YouTube when running from GitHub Actions")
     def test_youtube_transcriber(self):
         """
@@ -35,6 +104,57 @@ class TestContentParser(unittest.TestCase):
             extracted_transcript[:100].strip(), expected_transcript[:100].strip()
         )
 
+    def test_parse_video_id(self):
+        for url in [
+            "https://www.youtube.com/watch?v=m3kJo5kEzTQ",
+            "https://www.youtube.com/watch?feature=share&v=m3kJo5kEzTQ&t=42s",
+            "youtu.be/m3kJo5kEzTQ?si=abc",
+            "https://m.youtube.com/shorts/m3kJo5kEzTQ",
+            "https://www.youtube.com/embed/m3kJo5kEzTQ?start=3",
+        ]:
+            with self.subTest(url=url):
+                self.assertEqual(parse_video_id(url), "m3kJo5kEzTQ")
+        for url in ["https://www.youtube.com/channel/UC123", "https://example.com/watch?v=m3kJo5kEzTQ"]:
+            with self.subTest(url=url), self.assertRaises(ValueError):
+                parse_video_id(url)
+
+    def test_youtube_transcripts_are_cached_and_fetched_once(self):
+        calls = []
+
+        def fake_get_transcript(video_id, languages):
+            calls.append(video_id)
+            time.sleep(0.02)
+            return [{"text": f"Hello {video_id}", "start": 0.0, "duration": 1.0}, {"text": "[Music]", "start": 1.0, "duration": 1.0}]
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            transcriber = YouTubeTranscriber()
+            transcriber.cache = TranscriptCache(tmp_dir)
+            urls = [
+                "https://www.youtube.com/watch?v=aaaaaaaaaaa",
+                "https://youtu.be/aaaaaaaaaaa",
+                "https://www.youtube.com/watch?v=bbbbbbbbbbb",
+                "https://www.youtube.com/playlist?list=x",
+            ]
+            with patch("podcastfy.content_parser.youtube_transcriber.YouTubeTranscriptApi.get_transcript", side_effect=fake_get_transcript):
+                results = transcriber.extract_transcripts(urls)
+                self.assertEqual(transcriber.extract_transcript(urls[2]), "Hello bbbbbbbbbbb")
+
+        self.assertEqual(sorted(calls), ["aaaaaaaaaaa", "bbbbbbbbbbb"])
+        self.assertEqual([result["content"] for result in results[:3]], ["Hello aaaaaaaaaaa", "Hello aaaaaaaaaaa", "Hello bbbbbbbbbbb"])
+        self.assertEqual(results[3]["status"], "error")
+
+    def test_transcript_cache_is_bounded(self):
+        entries = [{"text": "x" * 1000, "start": 0.0, "duration": 1.0}]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = TranscriptCache(tmp_dir, max_total_bytes=4000)
+            for i in range(8):
+                cache.put(f"video{i:06d}", ["en"], entries)
+            kept = [i for i in range(8) if cache.get(f"video{i:06d}", ["en"]) is not None]
+            leftovers = [name for name in os.listdir(tmp_dir) if name.endswith(".tmp")]
+
+        self.assertTrue(0 < len(kept) <= 3)
+        self.assertEqual(leftovers, [])
+
     def test_website_extractor(self):
         """
         Test the WebsiteExtractor class to ensure it correctly extracts content from a website.
@@ -58,6 +178,358 @@ class TestContentParser(unittest.TestCase):
         # Assert that the extracted content matches the expected content
         self.assertEqual(extracted_content.strip(), expected_content.strip())
 
+    def test_website_extractor_revalidates_cached_pages(self):
+        """
+        Test that a stale cached page is revalidated with its validators and that a
+        304 is served from the cache without re-parsing.
+        """
+        extractor = WebsiteExtractor()
+        responses = [
+            make_response(200, b"<p>Breaking news</p>", {"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}),
+            make_response(304, b""),
+        ]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            extractor.cache = HTTPCache(cache_dir=tmp_dir, max_age=0)
+            with patch("podcastfy.content_parser.website_extractor.requests.get", side_effect=responses) as get:
+                first = extractor.extract_content("https://news.example/story")
+                with patch("podcastfy.content_parser.website_extractor.parse_html") as parse:
+                    second = extractor.extract_content("https://news.example/story")
+                    parse.assert_not_called()
+            revalidation_headers = get.call_args_list[1].kwargs["headers"]
+
+            extractor.cache.max_age = 3600
+            with patch("podcastfy.content_parser.website_extractor.requests.get") as get:
+                third = extractor.extract_content("https://news.example/story")
+                get.assert_not_called()
+
+        self.assertEqual(first, "Breaking news")
+        self.assertEqual(second, first)
+        self.assertEqual(third, first)
+        self.assertEqual(revalidation_headers["If-None-Match"], '"v1"')
+        self.assertEqual(revalidation_headers["If-Modified-Since"], "Mon, 01 Jan 2024 00:00:00 GMT")
+
+    def test_http_cache_walks_the_tree_only_to_prune(self):
+        """
+        Test that storing pages keeps a running size instead of walking the cache
+        on every put, and still evicts pages past the size limit.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = HTTPCache(cache_dir=tmp_dir, max_total_bytes=20000)
+            walk = os.walk
+            with patch("podcastfy.content_parser.http_cache.os.walk", side_effect=walk) as walked:
+                for i in range(5):
+                    cache.put(Page(f"https://news.example/{i}", "x" * 3000, text="x"), "p")
+                    cache.update(f"https://news.example/{i}", "p", "y")
+                walks_under_limit = walked.call_count
+                for i in range(5, 8):
+                    cache.put(Page(f"https://news.example/{i}", "x" * 3000, text="x"), "p")
+            kept = [i for i in range(8) if cache.get(f"https://news.example/{i}") is not None]
+            on_disk = sum(
+                os.path.getsize(os.path.join(root, name))
+                for root, _, files in os.walk(tmp_dir) for name in files
+            )
+
+        self.assertEqual(walks_under_limit, 1)
+        self.assertLessEqual(on_disk, 20000)
+        self.assertTrue(0 < len(kept) < 8)
+
+    def test_website_downloads_are_capped(self):
+        extractor = WebsiteExtractor()
+        extractor.cache = None
+        extractor.max_bytes = 1000
+        extractor.chunk_bytes = 100
+        body = b"<p>" + b"word " * 1000 + b"</p>"
+        with patch("podcastfy.content_parser.website_extractor.requests.get", return_value=make_response(200, body)), \
+                self.assertLogs("podcastfy.content_parser.website_extractor", level="WARNING"):
+            page = extractor.fetch("https://big.example/page")
+        self.assertEqual((page.status, len(page.html)), ("partial", 1000))
+
+        class SlowBody(io.BytesIO):
+            def read(self, *args, **kwargs):
+                time.sleep(0.02)
+                return super().read(*args, **kwargs)
+
+        extractor.max_bytes = 10 ** 6
+        extractor.deadline = 0.05
+        slow = make_response(200, b"")
+        slow.raw = SlowBody(body)
+        with patch("podcastfy.content_parser.website_extractor.requests.get", return_value=slow):
+            page = extractor.fetch("https://slow.example/page")
+        self.assertEqual(page.status, "partial")
+        self.assertLess(len(page.html), len(body))
+
+        video = make_response(200, b"\x00" * 100, {"Content-Type": "video/mp4"})
+        with patch("podcastfy.content_parser.website_extractor.requests.get", return_value=video), \
+                self.assertRaisesRegex(Exception, "video/mp4"):
+            extractor.fetch("https://cdn.example/movie.mp4")
+
+    def test_body_of_exactly_max_bytes_is_complete(self):
+        extractor = WebsiteExtractor()
+        extractor.cache = None
+        extractor.max_bytes = 1000
+        extractor.chunk_bytes = 100
+        body = b"<p>" + b"x" * 993 + b"</p>"
+        with patch("podcastfy.content_parser.website_extractor.requests.get", return_value=make_response(200, body)):
+            page = extractor.fetch("https://exact.example/page")
+        self.assertEqual((page.status, len(page.html)), ("downloaded", 1000))
+
+        async def read(content):
+            transport = httpx.MockTransport(lambda request: httpx.Response(
+                200, content=content, headers={"Content-Type": "text/html; charset=utf-8"}
+            ))
+            async with httpx.AsyncClient(transport=transport) as client:
+                async with client.stream("GET", "https://exact.example/page") as response:
+                    return await extractor.aread_body(response, "https://exact.example/page", time.monotonic() + 10)
+
+        self.assertEqual(asyncio.run(read(body)), (body.decode("utf-8"), False))
+        with self.assertLogs("podcastfy.content_parser.website_extractor", level="WARNING"):
+            self.assertEqual(asyncio.run(read(body + b" ")), (body.decode("utf-8"), True))
+
+    def test_stream_parser_matches_bs4(self):
+        config = load_config().get('website_extractor', {})
+        unwanted_tags = config.get('unwanted_tags', [])
+        remove_patterns = config.get('markdown_cleaning', {}).get('remove_patterns', [])
+        corpus = [
+            "<html><head><title>T</title><style>p {}</style></head><body><nav>Menu</nav><p>Hello &amp; welcome</p></body></html>",
+            "<div>a<!-- hidden -->b<![CDATA[raw]]><template><p>tpl</p></template><ruby>漢<rp>(</rp><rt>kan</rt></ruby></div>",
+            "<p>unclosed <b>bold <i>italic</p> tail</b><br>next<br/>line</br><img src=x></img> &bogus; &#39;quoted&#39;",
+            "<pre>  keep   spaces </pre><textarea>\n</textarea><footer>Footer <script>var x = '</p>';</script></footer>end",
+            "<p>Read https://example.com and [a link](https://example.com) now</p><aside>side</aside><p",
+        ]
+        for html_text in corpus:
+            with self.subTest(html_text=html_text):
+                self.assertEqual(
+                    parse_html(html_text, unwanted_tags, remove_patterns, "stream"),
+                    parse_html(html_text, unwanted_tags, remove_patterns, "bs4"),
+                )
+        self.assertEqual(parse_html(corpus[0], unwanted_tags, remove_patterns, "stream"), "T Hello & welcome")
+
+    def test_main_content_keeps_the_article_body(self):
+        config = load_config().get('website_extractor', {})
+        unwanted_tags = config.get('unwanted_tags', [])
+        remove_patterns = config.get('markdown_cleaning', {}).get('remove_patterns', [])
+        main_content = {"min_chars": 250, "max_link_density": 0.5}
+        paragraph = (
+            "The city council voted on Tuesday to expand the riverside park, adding new trails, a playground "
+            "and a community garden. Officials said construction, funded by a state grant, would begin next spring. "
+        )
+        menu = "".join(f'<li><a href="/s{i}">Section {i} news</a></li>' for i in range(30))
+        comments = "".join(
+            f'<div class="comment"><p>Great news, and about time too, the old park was falling apart. Comment {i}.</p></div>'
+            for i in range(25)
+        )
+        related = "".join(f'<li><a href="/a{i}">Related story {i} about the city and its projects</a></li>' for i in range(20))
+        html_text = (
+            f'<html><body><div class="top-menu"><ul>{menu}</ul></div>'
+            '<div id="cookie-banner"><p>We use cookies to improve your experience, personalise content and ads, '
+            'and analyse our traffic. By continuing you agree to our cookie policy.</p></div>'
+            f'<div class="wrapper"><div class="article-body"><h1>Council expands riverside park</h1>'
+            f'{"".join("<p>" + paragraph + "</p>" for _ in range(5))}'
+            '<div class="share-tools"><a href="#">Share</a> <a href="#">Email</a></div></div>'
+            f'<div class="comments">{comments}</div><div class="related-articles"><ul>{related}</ul></div></div>'
+            '</body></html>'
+        )
+
+        full = parse_html(html_text, unwanted_tags, remove_patterns)
+        main = parse_html(html_text, unwanted_tags, remove_patterns, main_content=main_content)
+        self.assertTrue(main.startswith("Council expands riverside park The city council"))
+        self.assertEqual(main.count("The city council"), 5)
+        for clutter in ("Section 1 news", "cookies", "Share", "Comment 1.", "Related story"):
+            self.assertIn(clutter, full)
+            self.assertNotIn(clutter, main)
+        self.assertGreaterEqual(count_tokens(full) / count_tokens(main), 3)
+
+        # Without a clear article body the whole page is kept
+        short_page = "<div><a href='/'>Home</a></div><p>Just a short note.</p>"
+        self.assertEqual(
+            parse_html(short_page, unwanted_tags, remove_patterns, main_content=main_content),
+            parse_html(short_page, unwanted_tags, remove_patterns),
+        )
+
+    def test_site_crawl_stays_in_scope_and_reuses_cached_pages(self):
+        pages = {
+            "/guide/": '<a href="intro">Intro</a> <a href="/guide/setup#install">Setup</a> '
+                       '<a href="https://other.example/">Elsewhere</a> <a href="/files/guide.pdf">PDF</a> '
+                       '<p>Guide home</p>',
+            "/guide/intro": '<a href="/guide/">Home</a> <a href="/guide/deep">Deep</a> <p>Intro page</p>',
+            "/guide/setup": '<p>Setup page</p>',
+            "/guide/deep": '<a href="/guide/deeper">Deeper</a> <p>Deep page</p>',
+            "/guide/deeper": '<p>Too deep</p>',
+            "/guide/faq": '<p>FAQ page</p>',
+        }
+        sitemap = (
+            '<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            '<url><loc>https://docs.example/guide/faq</loc></url>'
+            '<url><loc>https://other.example/page</loc></url></urlset>'
+        )
+        requested = []
+        in_flight = {"now": 0, "max": 0}
+
+        async def handler(request):
+            requested.append(request.url.path)
+            if request.url.host != "docs.example":
+                return httpx.Response(404)
+            in_flight["now"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["now"])
+            await asyncio.sleep(0.01)
+            in_flight["now"] -= 1
+            if request.url.path == "/robots.txt":
+                return httpx.Response(200, text="User-agent: *\nSitemap: https://docs.example/map.xml\n")
+            if request.url.path == "/map.xml":
+                return httpx.Response(200, text=sitemap, headers={"Content-Type": "application/xml"})
+            if request.url.path in pages:
+                return httpx.Response(200, text=pages[request.url.path], headers={"Content-Type": "text/html"})
+            return httpx.Response(404)
+
+        extractor = WebsiteExtractor()
+        extractor.transport = httpx.MockTransport(handler)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            extractor.cache = HTTPCache(cache_dir=tmp_dir, max_age=3600)
+            first = extractor.crawl("https://docs.example/guide/", max_depth=2, per_host_concurrency=2)
+            crawled = {result["source"]: result for result in first}
+            first_requests = list(requested)
+
+            requested.clear()
+            with patch("podcastfy.content_parser.website_extractor.parse_html") as parse:
+                second = extractor.crawl("https://docs.example/guide/", max_depth=2)
+                parse.assert_not_called()
+            second_requests = list(requested)
+            limited = extractor.crawl("https://docs.example/guide/", max_pages=2)
+
+        self.assertEqual(list(crawled), [
+            "https://docs.example/guide/", "https://docs.example/guide/intro",
+            "https://docs.example/guide/setup", "https://docs.example/guide/faq",
+            "https://docs.example/guide/deep",
+        ])
+        self.assertEqual(crawled["https://docs.example/guide/faq"]["depth"], 1)
+        self.assertEqual(crawled["https://docs.example/guide/deep"]["content"], "Deeper Deep page")
+        self.assertTrue(all(result["status"] == "success" for result in first))
+        self.assertNotIn("/guide/deeper", first_requests)
+        self.assertNotIn("/files/guide.pdf", first_requests)
+        self.assertLessEqual(in_flight["max"], 2)
+
+        # Fresh cached pages are neither requested nor parsed again
+        self.assertEqual(second_requests, ["/robots.txt", "/map.xml"])
+        self.assertEqual([result["content"] for result in second], [result["content"] for result in first])
+        self.assertTrue(all(result["cached"] for result in second))
+        self.assertEqual(len(limited), 2)
+
+    def test_site_crawl_follows_start_redirect_and_bounds_sitemaps(self):
+        index = (
+            '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            '<sitemap><loc>https://www.example.com/pages.xml.gz</loc></sitemap>'
+            '<sitemap><loc>https://cdn.other.example/map.xml</loc></sitemap>'
+            '<sitemap><loc>https://www.example.com/bomb.xml.gz</loc></sitemap></sitemapindex>'
+        )
+        pages_xml = gzip.compress(
+            b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            b'<url><loc>https://www.example.com/from-sitemap</loc></url></urlset>'
+        )
+        bomb = gzip.compress(b"<urlset>" + b" " * 2_000_000 + b"</urlset>")
+        requested = []
+
+        def handler(request):
+            requested.append(str(request.url))
+            if request.url.host == "example.com":
+                return httpx.Response(301, headers={"Location": f"https://www.example.com{request.url.path}"})
+            if request.url.host != "www.example.com":
+                return httpx.Response(404)
+            if request.url.path == "/sitemap.xml":
+                return httpx.Response(200, text=index, headers={"Content-Type": "application/xml"})
+            if request.url.path == "/pages.xml.gz":
+                return httpx.Response(200, content=pages_xml, headers={"Content-Type": "application/gzip"})
+            if request.url.path == "/bomb.xml.gz":
+                return httpx.Response(200, content=bomb, headers={"Content-Type": "application/gzip"})
+            if request.url.path == "/":
+                return httpx.Response(200, text='<a href="/about">About</a><p>Home</p>', headers={"Content-Type": "text/html"})
+            if request.url.path in ("/about", "/from-sitemap"):
+                return httpx.Response(200, text=f"<p>{request.url.path}</p>", headers={"Content-Type": "text/html"})
+            return httpx.Response(404)
+
+        extractor = WebsiteExtractor()
+        extractor.transport = httpx.MockTransport(handler)
+        extractor.max_bytes = 1_000_000
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            extractor.cache = HTTPCache(cache_dir=tmp_dir, max_age=3600)
+            first = extractor.crawl("https://example.com/", max_depth=1)
+            # The cached start page remembers where it was served from
+            second = extractor.crawl("https://example.com/", max_depth=1)
+
+        for results in (first, second):
+            self.assertEqual([result["source"] for result in results], [
+                "https://example.com/", "https://www.example.com/about", "https://www.example.com/from-sitemap",
+            ])
+            self.assertTrue(all(result["status"] == "success" for result in results))
+        self.assertFalse(any("cdn.other.example" in url for url in requested))
+        self.assertEqual(parse_sitemap(bomb, max_bytes=1_000_000), ([], []))
+
+    def test_compiled_normalizer_matches_sequential_cleaning(self):
+        settings = normalizer_settings("website", load_config())
+        normalizer = TextNormalizer(**dict(settings, strip_invisible=False))
+        self.assertEqual(len(normalizer.removals), len(settings["remove_patterns"]))
+        self.assertIsNotNone(normalizer.removal_probe)
+        corpus = [
+            "  Hello &amp; welcome\n\n\n to   the show  ",
+            "See ![logo](img.png) and [the docs](https://example.com/docs) at https://example.com or www.example.com.",
+            "Tabs\tand\u00a0non-breaking\u2003spaces, caf\u00e9 &eacute; &bogus; [unclosed link",
+        ]
+        for text in corpus:
+            with self.subTest(text=text):
+                self.assertEqual(normalizer.normalize(text), _sequential_clean(text, settings["remove_patterns"]))
+
+        self.assertEqual(TextNormalizer(unicode_form="NFKD").normalize("soft\u00adhy\u200bphen \ufb01"), "softhyphen fi")
+        self.assertEqual([p.pattern for p in compile_patterns(["a", r"(b)\1", "c"])], ["a", r"(b)\1", "c"])
+        self.assertEqual(compile_probe(["a", "c", "d"]).pattern, "(?:a)|(?:c)|(?:d)")
+        self.assertIsNone(compile_probe(["a", r"(b)\1"]))
+        youtube = TextNormalizer(remove_phrases=["[Music]"])
+        self.assertFalse(youtube.keep_segment("[MUSIC]"))
+
+    def test_remove_patterns_behave_as_sequential_passes(self):
+        cases = [
+            # Inline global flags cannot be merged into one alternation
+            (["(?i)advertisement", "x+"], "An ADVERTISEMENT xx here", "An   here"),
+            # A later pattern matches text joined by an earlier removal
+            (["foo", "ofoo?"], "xofoox", "xox"),
+            # Named groups with the same name in two patterns
+            (["(?P<word>ab)", "(?P<word>cd)"], "abxcd", "x"),
+            # Backreferences keep their group numbers
+            (["z", r"(b)\1"], "zbbc", "c"),
+        ]
+        for patterns, text, expected in cases:
+            with self.subTest(patterns=patterns):
+                normalizer = TextNormalizer(remove_patterns=patterns)
+                self.assertEqual(normalizer.normalize(text), expected)
+                sequential = text
+                for pattern in patterns:
+                    sequential = re.sub(pattern, "", sequential)
+                self.assertEqual(normalizer.normalize(text), sequential)
+        # Text the merged probe does not match skips the passes
+        normalizer = TextNormalizer(remove_patterns=["foo", "bar"])
+        normalizer.removals = [re.compile("nothing")]
+        self.assertEqual(normalizer.normalize("nothing to remove"), "nothing to remove")
+        self.assertEqual(normalizer.normalize("foo: nothing to remove"), "foo:  to remove")
+
+    def test_near_duplicate_passages_are_removed_across_sources(self):
+        syndicated = (
+            "The harbor commission voted on Tuesday to close the old ferry terminal after "
+            "inspectors found corroded pilings beneath the main pier and the waiting hall."
+        )
+        reworded = syndicated.replace("waiting hall", "ticket hall")
+        first = f"Local news roundup for the week ahead.\n\n{syndicated}\n\nThe mayor will respond at a press conference on Friday morning downtown."
+        second = f"Breaking: terminal closure.\n\n{reworded}\n\nCommuters should expect longer trips across the bay for the rest of the year."
+        third = f"{syndicated}\n\n{syndicated}"
+
+        remover = NearDuplicateRemover(threshold=0.8)
+        (kept_first, kept_second, kept_third), stats = remover.deduplicate([first, second, third])
+
+        self.assertEqual(kept_first, first)
+        self.assertNotIn("harbor commission", kept_second)
+        self.assertIn("Commuters should expect", kept_second)
+        # Every copy of a passage from an earlier source goes, repeats included
+        self.assertEqual(kept_third, "")
+        self.assertEqual(stats["removed_passages"], 3)
+        self.assertEqual(stats["removed_chars"], len(reworded) + len(syndicated) * 2 + 4)
+
     def test_pdf_extractor(self):
         """
         Test the PDFExtractor class to ensure it correctly extracts content from a PDF file.
@@ -80,6 +552,138 @@ class TestContentParser(unittest.TestCase):
             extracted_content[:500].strip(), expected_content[:500].strip()
         )
 
+    def test_extraction_cache_reuses_pdf_text(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pdf_path = os.path.join(tmp_dir, "file.pdf")
+            shutil.copy("./tests/data/pdf/file.pdf", pdf_path)
+            extractor = ContentExtractor()
+            extractor.extraction_cache = ExtractionCache(cache_dir=os.path.join(tmp_dir, "cache"))
+            content = extractor.extract_content(pdf_path)
+
+            with patch.object(extractor.pdf_extractor, "extract_content", side_effect=AssertionError("re-extracted")), \
+                    patch.object(extractor.extraction_cache, "_write") as write:
+                self.assertEqual(extractor.extract_content(pdf_path), content)
+            # The unchanged file was looked up by size and mtime, without re-hashing
+            write.assert_not_called()
+
+            # Other settings and changed content miss the cache
+            extractor.pdf_extractor.max_chars = 50
+            self.assertEqual(extractor.extract_content(pdf_path), content[:50])
+            extractor.pdf_extractor.max_chars = None
+            with open(pdf_path, "ab") as f:
+                f.write(b"\n%")
+            with patch.object(extractor.pdf_extractor, "extract_content", return_value="changed"):
+                self.assertEqual(extractor.extract_content(pdf_path), "changed")
+
+    def test_extraction_cache_walks_the_tree_only_to_prune(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = ExtractionCache(cache_dir=os.path.join(tmp_dir, "cache"), max_total_bytes=4000, compression_level=0)
+            paths = []
+            for i in range(8):
+                paths.append(os.path.join(tmp_dir, f"{i}.txt"))
+                with open(paths[-1], "w") as f:
+                    f.write(str(i))
+            walk = os.walk
+            with patch("podcastfy.content_parser.disk_cache.os.walk", side_effect=walk) as walked:
+                for path in paths[:3]:
+                    cache.put(path, "text", {}, "x" * 1000)
+                walks_under_limit = walked.call_count
+                for path in paths[3:]:
+                    cache.put(path, "text", {}, "x" * 1000)
+            kept = [path for path in paths if cache.get(path, "text", {}) is not None]
+
+        self.assertEqual(walks_under_limit, 1)
+        self.assertTrue(0 < len(kept) <= 3)
+
+    def test_iter_content_streams_located_chunks(self):
+        extractor = ContentExtractor()
+        extractor.extraction_cache = None
+        pdf_path = "./tests/data/pdf/file.pdf"
+
+        chunks = list(extractor.iter_content(pdf_path, chunk_chars=1000))
+        self.assertEqual("".join(chunk.text for chunk in chunks), extractor.extract_content(pdf_path))
+        self.assertTrue(all(len(chunk.text) <= 1000 for chunk in chunks))
+        self.assertEqual([chunk.offset for chunk in chunks[1:]], [chunk.offset + len(chunk.text) for chunk in chunks[:-1]])
+        self.assertEqual(chunks[0].location, 1)
+        self.assertEqual(chunks[-1].location, 22)
+
+        entries = [{"text": "Hello there", "start": 0.0}, {"text": "[Music]", "start": 2.0}, {"text": "General Kenobi", "start": 4.5}]
+        url = "https://youtu.be/aaaaaaaaaaa"
+        with patch.object(extractor.youtube_transcriber, "fetch_entries", return_value=entries):
+            chunks = list(extractor.iter_content(url, chunk_chars=16))
+            transcript = extractor.extract_content(url)
+        self.assertEqual([(chunk.offset, chunk.text, chunk.location) for chunk in chunks], [
+            (0, "Hello there", 0.0), (11, " General Kenobi", 4.5)
+        ])
+        self.assertEqual("".join(chunk.text for chunk in chunks), transcript)
+
+    def test_local_text_files_are_decoded_in_pieces(self):
+        extractor = ContentExtractor()
+        extractor.text_file_extractor.chunk_bytes = 7
+        extractor.text_file_extractor.cache_min_bytes = 0
+        text = "Caf\u00e9 r\u00e9sum\u00e9 \u2014 na\u00efve\u200b d\u00e9j\u00e0 vu.\n\n" * 20
+        html_text = "<html><body><script>var x;</script><p>Caf\u00e9 &amp; r\u00e9sum\u00e9</p><p>[a link](https://example.com)</p></body></html>"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            extractor.extraction_cache = ExtractionCache(cache_dir=os.path.join(tmp_dir, "cache"))
+            md_path = os.path.join(tmp_dir, "notes.md")
+            with open(md_path, "w", encoding="utf-8-sig") as f:
+                f.write(text)
+            html_path = os.path.join(tmp_dir, "page.HTML")
+            with open(html_path, "w", encoding="utf-8") as f:
+                f.write(html_text)
+
+            self.assertEqual(extractor.source_type(md_path), "text")
+            self.assertEqual(extractor.source_type(html_path), "html")
+            # Multibyte characters split across pieces decode intact; the byte order mark is dropped
+            chunks = list(extractor.iter_content(md_path, chunk_chars=100))
+            self.assertEqual(chunks[0].location, 0)
+            content = extractor.extract_content(md_path)
+            self.assertEqual(content, text.replace("\u200b", ""))
+            self.assertEqual("".join(chunk.text for chunk in chunks), content)
+
+            website = extractor.website_extractor
+            expected = parse_html(html_text, website.unwanted_tags, website.remove_patterns)
+            self.assertEqual(extractor.extract_content(html_path), expected)
+            with patch.object(TextFileExtractor, "iter_content", side_effect=AssertionError("re-extracted")):
+                self.assertEqual(extractor.extract_content(md_path), content)
+                self.assertEqual(extractor.extract_content(html_path), expected)
+
+    def test_pdf_extractor_shards_pages_in_order(self):
+        extractor = PDFExtractor()
+        extractor.pages_per_shard = 3
+        extractor.parallel_min_pages = 0
+        pdf_path = "./tests/data/pdf/file.pdf"
+
+        serial = list(extractor.iter_pages(pdf_path, workers=1))
+        self.assertEqual(list(extractor.iter_pages(pdf_path, workers=2)), serial)
+        self.assertEqual(extractor.extract_content(pdf_path, workers=2), " ".join(serial))
+        self.assertEqual(list(extractor.iter_pages(pdf_path, max_pages=4, workers=2)), serial[:4])
+        self.assertEqual(len(extractor.extract_content(pdf_path, max_chars=100, workers=2)), 100)
+
+    def test_pdf_layout_mode_drops_boilerplate_and_sections(self):
+        extractor = PDFExtractor()
+        pdf_path = "./tests/data/pdf/file.pdf"
+        plain = extractor.extract_content(pdf_path, workers=1)
+        extractor.layout = {
+            "margin_fraction": 0.08,
+            "sample_pages": 12,
+            "drop_sections": ["materials and methods", "acknowledgements", "references"],
+        }
+        content = extractor.extract_content(pdf_path, workers=1)
+
+        for boilerplate in ("2/22", "arXiv:2110.11751", "Institute of Mathematics", "2.1 Dynamic Financial Networks", "Long, W., Lu"):
+            self.assertIn(boilerplate, plain)
+            self.assertNotIn(boilerplate, content)
+        for kept in ("ABSTRACT", "1 Introduction", "3 Results and Discussion", "4 Conclusion", "Author contributions statement"):
+            self.assertIn(kept, content)
+        self.assertEqual(section_name("7. References:"), "references")
+        self.assertIn("layout", extractor.cache_settings())
+
+        # Sections are dropped across shard boundaries the same way in worker processes
+        extractor.pages_per_shard = 3
+        extractor.parallel_min_pages = 0
+        self.assertEqual(extractor.extract_content(pdf_path, workers=2), content)
+
 
 if __name__ == "__main__":
     unittest.main()
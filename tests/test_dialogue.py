@@ -0,0 +1,101 @@
+import threading
+import unittest
+from unittest.mock import patch
+from podcastfy.utils import dialogue
+from podcastfy.utils.dialogue import Dialogue, DialogueTokenizer, normalize_block
+
+
+TRANSCRIPT = """<Maria>
+*professional tone* The city sleeps.
+</Maria>
+<DetectiveSarah>
+*determined* Not tonight. *pause* Someone is lying.
+</DetectiveSarah>
+<OfficerMike>I found the records.
+<EmmaLawson>
+*cryptic* Some doors stay closed.
+</EmmaLawson>"""
+
+
+class TestDialogue(unittest.TestCase):
+	def test_parse_lines(self):
+		dialogue = Dialogue.parse(TRANSCRIPT)
+		self.assertEqual(
+			[line.speaker for line in dialogue],
+			["Maria", "DetectiveSarah", "OfficerMike", "EmmaLawson"],
+		)
+		sarah = dialogue.lines[1]
+		self.assertEqual(sarah.text, "Not tonight. Someone is lying.")
+		self.assertEqual(sarah.emotes, ("determined", "pause"))
+		self.assertTrue(TRANSCRIPT[sarah.start:sarah.end].startswith("<DetectiveSarah>"))
+		self.assertTrue(TRANSCRIPT[sarah.start:sarah.end].endswith("</DetectiveSarah>"))
+		# Unterminated block is closed by the next opening tag
+		self.assertEqual(dialogue.lines[2].text, "I found the records.")
+
+	def test_parse_is_memoized(self):
+		self.assertIs(Dialogue.parse(TRANSCRIPT), Dialogue.parse(TRANSCRIPT))
+
+	def test_incremental_matches_single_pass(self):
+		tokenizer = DialogueTokenizer()
+		lines = []
+		for i in range(0, len(TRANSCRIPT), 3):
+			lines.extend(tokenizer.feed(TRANSCRIPT[i:i + 3]))
+		lines.extend(tokenizer.close())
+		expected = Dialogue.parse(TRANSCRIPT).lines
+		self.assertEqual(
+			[(l.speaker, l.raw_text, l.start, l.end) for l in lines],
+			[(l.speaker, l.raw_text, l.start, l.end) for l in expected],
+		)
+
+	def test_each_streamed_character_is_scanned_once(self):
+		scanned = []
+		tag_pattern = dialogue.TAG_PATTERN
+
+		class CountingPattern:
+			def finditer(self, text, pos):
+				scanned.append(len(text) - pos)
+				return tag_pattern.finditer(text, pos)
+
+		body = "The rain never stops in this city. " * 200
+		stream = f"<Maria>\n{body}</Maria>"
+		tokenizer = DialogueTokenizer()
+		lines = []
+		with patch.object(dialogue, "TAG_PATTERN", CountingPattern()):
+			for i in range(0, len(stream), 7):
+				lines.extend(tokenizer.feed(stream[i:i + 7]))
+		self.assertEqual([(l.speaker, l.raw_text) for l in lines], [("Maria", f"\n{body}")])
+		self.assertLess(sum(scanned), 2 * len(stream))
+
+	def test_from_blocks_round_trip(self):
+		blocks = [("Maria", normalize_block("Hello\n\n  *sigh* Goodbye ")), ("OfficerMike", "*nods* Yes.")]
+		rendered = Dialogue.from_blocks(blocks)
+		self.assertEqual(rendered.source, "<Maria>\n*neutral* Hello\n*sigh* Goodbye\n</Maria>\n<OfficerMike>\n*nods* Yes.\n</OfficerMike>")
+		tokenizer = DialogueTokenizer()
+		reparsed_lines = tokenizer.feed(rendered.source) + tokenizer.close()
+		self.assertEqual(
+			[(l.speaker, l.raw_text, l.start, l.end) for l in rendered],
+			[(l.speaker, l.raw_text, l.start, l.end) for l in reparsed_lines],
+		)
+
+	def test_parse_cache_is_thread_safe(self):
+		transcripts = [f"<Maria>\nLine {i}\n</Maria>" for i in range(64)]
+		errors = []
+
+		def parse_all():
+			try:
+				for _ in range(20):
+					for transcript in transcripts:
+						self.assertEqual(Dialogue.parse(transcript).source, transcript)
+			except Exception as e:
+				errors.append(e)
+
+		threads = [threading.Thread(target=parse_all) for _ in range(8)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		self.assertEqual(errors, [])
+
+
+if __name__ == "__main__":
+	unittest.main()
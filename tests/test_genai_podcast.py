@@ -1,10 +1,17 @@
 import unittest
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 import tempfile
 import os
-from podcastfy.content_generator import ContentGenerator
+from langchain_core.messages import AIMessage
+from podcastfy.content_generator import ContentGenerator, DialogStream, DialogStreamParser, DEFAULT_LINES
+from podcastfy.text_to_speech import TextToSpeech
+from podcastfy.utils.dialogue import Dialogue, normalize_block
 from podcastfy.utils.config import Config
+from podcastfy.utils.context_cache import LocalContextCache
+from podcastfy.utils.image_inputs import ImageInputProcessor
+from podcastfy.story_state import StoryStateStore
+from podcastfy.utils.token_budget import TokenBudget, allocate, trim_to_tokens, count_tokens, count_message_tokens
 from podcastfy.utils.config_conversation import ConversationConfig
 
 
@@ -96,5 +103,292 @@ class TestGenAIPodcast(unittest.TestCase):
         os.unlink(temp_file.name)
 
 
+SAMPLE_DIALOG = """<Maria>
+*professional tone* The city sleeps.
+</Maria>
+<DetectiveSarah>
+*determined* Not tonight.
+Someone is lying.
+</DetectiveSarah>
+<Narrator>
+Ignore me.
+</Narrator>
+<OfficerMike>
+*nervous* I found the records.
+</OfficerMike>
+<EmmaLawson>
+*cryptic* Some doors stay closed.
+"""
+
+
+class TestDialogStream(unittest.TestCase):
+    def test_parser_emits_blocks_across_chunk_boundaries(self):
+        parser = DialogStreamParser()
+        blocks = []
+        for i in range(0, len(SAMPLE_DIALOG), 7):
+            blocks.extend(parser.feed(SAMPLE_DIALOG[i:i + 7]))
+        blocks.extend(parser.close())
+        self.assertEqual(
+            [speaker for speaker, _ in blocks],
+            ["Maria", "DetectiveSarah", "OfficerMike", "EmmaLawson"],
+        )
+        self.assertEqual(blocks[1][1], "*determined* Not tonight.\n*neutral* Someone is lying.")
+
+    def test_validate_dialog_keeps_only_tagged_text(self):
+        generator = ContentGenerator.__new__(ContentGenerator)
+        raw = "Here is your dialog:\n" + SAMPLE_DIALOG.replace("*determined* Not tonight.", "   *determined* Not tonight.  ")
+        validated = generator.validate_dialog(raw)
+        # Text outside speaker tags is dropped and block lines are stripped
+        self.assertNotIn("Here is your dialog", validated)
+        self.assertTrue(validated.startswith("<Maria>\n"))
+        self.assertIn("\n*determined* Not tonight.\n", validated)
+        self.assertEqual(validated, generator.validate_dialog(SAMPLE_DIALOG))
+
+    def test_stream_result_matches_non_streaming(self):
+        generator = ContentGenerator.__new__(ContentGenerator)
+        # Without Maria and EmmaLawson, whose fallback lines close the dialog
+        raw = SAMPLE_DIALOG.split("<EmmaLawson>")[0].replace("<Maria>", "<Narrator>").replace("</Maria>", "</Narrator>")
+        expected = generator.validate_dialog(raw)
+        expected_blocks = [(line.speaker, normalize_block(line.raw_text)) for line in Dialogue.parse(expected)]
+        self.assertEqual(
+            expected_blocks[-2:],
+            [("Maria", DEFAULT_LINES["Maria"]), ("EmmaLawson", DEFAULT_LINES["EmmaLawson"])],
+        )
+
+        chunks = [raw[i:i + 5] for i in range(0, len(raw), 5)]
+        stream = DialogStream(iter(chunks), finalize=generator.validate_dialog)
+        tts = TextToSpeech.__new__(TextToSpeech)
+        spoken = []
+        with patch.object(TextToSpeech, "convert_dialogues_to_speech", lambda self, dialogues, _: spoken.extend(dialogues)):
+            tts.convert_stream_to_speech(stream, "unused.mp3")
+        self.assertEqual(stream.result, expected)
+        self.assertEqual(spoken, tts.split_dialogues(expected))
+        self.assertEqual(list(DialogStream(iter(chunks), finalize=generator.validate_dialog)), expected_blocks)
+
+    def test_stream_yields_each_block_when_it_closes(self):
+        raw = SAMPLE_DIALOG.replace("<Maria>", "<Narrator>").replace("</Maria>", "</Narrator>")
+        consumed = []
+
+        def chunks():
+            for i in range(0, len(raw), 5):
+                consumed.append(i + 5)
+                yield raw[i:i + 5]
+
+        stream = iter(DialogStream(chunks(), finalize=lambda text: text))
+        first = next(stream)
+        self.assertEqual(first[0], "DetectiveSarah")
+        # Yielded as soon as its closing tag arrived, long before Maria's fallback is known to be needed
+        self.assertLessEqual(consumed[-1], raw.index("</DetectiveSarah>") + len("</DetectiveSarah>") + 5)
+        self.assertEqual(list(stream)[-1], ("Maria", DEFAULT_LINES["Maria"]))
+
+
+class FakeChatModel:
+    def __init__(self, content):
+        self.content = content
+
+    def invoke(self, messages):
+        return AIMessage(content=self.content)
+
+    async def ainvoke(self, messages):
+        if "FAIL" in messages[-1].content:
+            raise RuntimeError("provider error")
+        return AIMessage(content=self.content)
+
+
+class TestAsyncGeneration(unittest.TestCase):
+    def setUp(self):
+        self.generator = ContentGenerator.__new__(ContentGenerator)
+        self.generator.base_prompt = "Write a noir dialog."
+        self.generator.token_budget = TokenBudget("dialog", 200000)
+        self.generator.content_generator_config = {}
+        self.generator.image_processor = ImageInputProcessor({})
+        self.generator._context_caches = {}
+        backend = MagicMock(llm=FakeChatModel(SAMPLE_DIALOG))
+        self.patcher = patch.object(ContentGenerator, "_create_backend", return_value=backend)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_agenerate_writes_output(self):
+        import asyncio
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_path = os.path.join(tmp_dir, "dialog.txt")
+            result = asyncio.run(
+                self.generator.agenerate_qa_content("A case", output_filepath=output_path)
+            )
+            with open(output_path, "r", encoding="utf-8") as f:
+                self.assertEqual(f.read(), result)
+        self.assertEqual(result, self.generator.validate_dialog(SAMPLE_DIALOG))
+
+    def test_sync_wrapper_matches_async(self):
+        import asyncio
+        self.assertEqual(
+            self.generator.generate_qa_content("A case"),
+            asyncio.run(self.generator.agenerate_qa_content("A case")),
+        )
+
+    def test_sync_wrapper_works_inside_a_running_loop(self):
+        import asyncio
+
+        async def call_from_async_code():
+            return self.generator.generate_qa_content("A case")
+
+        self.assertEqual(asyncio.run(call_from_async_code()), self.generator.validate_dialog(SAMPLE_DIALOG))
+
+    def test_batch_registers_prefix_once_and_isolates_errors(self):
+        import asyncio
+        cache = LocalContextCache()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            results = asyncio.run(
+                self.generator.agenerate_batch(
+                    ["Case one", "FAIL", "Case three"],
+                    shared_context="The city of Ashford.",
+                    output_dir=tmp_dir,
+                    context_cache=cache,
+                )
+            )
+            self.assertTrue(os.path.exists(results[2]["output_filepath"]))
+            # A second batch into the same directory keeps the first one's transcripts
+            again = asyncio.run(
+                self.generator.agenerate_batch(["Case one"], output_dir=tmp_dir, context_cache=cache)
+            )
+            self.assertNotEqual(again[0]["output_filepath"], results[0]["output_filepath"])
+            self.assertEqual(len(os.listdir(tmp_dir)), 3)
+        self.assertEqual(cache.registrations, 2)
+        self.assertEqual([r["status"] for r in results], ["success", "error", "success"])
+        self.assertEqual(results[0]["content"], self.generator.validate_dialog(SAMPLE_DIALOG))
+        self.assertEqual(results[1]["error"], "provider error")
+
+    def test_batches_reuse_the_provider_cache_until_it_expires(self):
+        import asyncio
+        import sys
+        from podcastfy.utils.context_cache import GeminiContextCache
+
+        created = [MagicMock(), MagicMock()]
+        created[0].name, created[1].name = "cachedContents/first", "cachedContents/second"
+        caching = MagicMock()
+        caching.CachedContent.create.side_effect = created
+        google = MagicMock()
+        google.generativeai.caching = caching
+        gemini_cache = GeminiContextCache(ttl_seconds=3600, min_tokens=0)
+        self.generator.config = {}
+        modules = {"google": google, "google.generativeai": google.generativeai,
+                   "google.generativeai.caching": caching}
+        with patch.dict(sys.modules, modules), \
+                patch("podcastfy.content_generator.create_context_cache", return_value=gemini_cache) as create, \
+                patch("podcastfy.utils.context_cache.time.monotonic", return_value=1000.0) as now:
+            for _ in range(2):
+                asyncio.run(self.generator.agenerate_batch(["Case one"], shared_context="Ashford."))
+            # Close to its TTL the prefix is registered again instead of reused
+            now.return_value = 1000.0 + 3600 - 60
+            asyncio.run(self.generator.agenerate_batch(["Case one"], shared_context="Ashford."))
+            self.generator.close()
+
+        create.assert_called_once()
+        self.assertEqual(caching.CachedContent.create.call_count, 2)
+        deleted = [call.args[0] for call in caching.CachedContent.get.call_args_list]
+        self.assertEqual(deleted, ["cachedContents/second"])
+
+    def test_series_sends_story_state_instead_of_history(self):
+        import asyncio
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = StoryStateStore({"content_generator": {"series": {"state_dir": tmp_dir}}})
+            store._llm = MagicMock()
+            store._llm.ainvoke = AsyncMock(side_effect=[
+                AIMessage(content="CHARACTERS: Sarah\nOPEN THREADS: the ledger\nLAST EVENTS: episode 1"),
+                AIMessage(content="CHARACTERS: Sarah\nOPEN THREADS: the ledger\nLAST EVENTS: episode 2"),
+            ])
+            with patch.object(self.generator, "_build_messages", wraps=self.generator._build_messages) as build:
+                asyncio.run(self.generator.agenerate_series_episode(
+                    "ashford", "Episode one", background="The city of Ashford.", story_store=store
+                ))
+                backend = self.generator._create_backend(False)
+                backend.llm.content = SAMPLE_DIALOG.replace("<Maria>", "<Maria>\nPreviously on Ashford.", 1)
+                asyncio.run(self.generator.agenerate_series_episode(
+                    "ashford", "Episode two", background="The city of Ashford.", story_store=store
+                ))
+            self.assertEqual(build.call_args_list[0].args[2], "The city of Ashford.")
+            self.assertIn("LAST EVENTS: episode 1", build.call_args_list[1].args[2])
+            # The update only sees the previous summary and the newest episode
+            update_prompt = store._llm.ainvoke.call_args_list[1].args[0][-1].content
+            self.assertIn("LAST EVENTS: episode 1", update_prompt)
+            self.assertNotIn("The city of Ashford.", update_prompt)
+            state = store.load("ashford")
+        self.assertEqual(state["episode_count"], 2)
+        self.assertIn("LAST EVENTS: episode 2", state["summary"])
+
+
+class TestTokenBudget(unittest.TestCase):
+    def test_allocate_is_water_filling(self):
+        self.assertEqual(allocate([10, 100, 50], 90), [10, 40, 40])
+        self.assertEqual(allocate([10, 20], 100), [10, 20])
+
+    def test_fit_keeps_small_sources_and_trims_large(self):
+        small = "A short note."
+        large = "\n\n".join("The rain keeps falling on the city." for _ in range(100))
+        budget = TokenBudget("dialog", 120)
+        fitted = budget.fit(["System prompt."], [small, large])
+        self.assertEqual(fitted[0], small)
+        self.assertTrue(large.startswith(fitted[1]))
+        self.assertLessEqual(count_tokens("System prompt.") + sum(count_tokens(f) for f in fitted), 120)
+        self.assertEqual(fitted, budget.fit(["System prompt."], [small, large]))
+
+    def test_trim_prefers_paragraph_boundaries(self):
+        text = "First paragraph here.\n\nSecond paragraph is a bit longer than the first."
+        self.assertEqual(trim_to_tokens(text, 5), "First paragraph here.")
+        self.assertEqual(trim_to_tokens(text, 6), "First paragraph here.\n\nSecond")
+
+    def test_title_and_shot_prompts_fit_their_budgets(self):
+        import asyncio
+        from podcastfy.webhook_handler import generate_title_card, generate_scene_shots
+
+        class RecordingModel:
+            def __init__(self, content):
+                self.content = content
+                self.prompts = []
+
+            async def ainvoke(self, messages, **kwargs):
+                self.prompts.append(count_message_tokens(messages))
+                return AIMessage(content=self.content)
+
+        scene = {
+            "location": "Harbor " * 2000, "tone": "Noir", "key_elements": ["Rain"],
+            "characters": ["DetectiveSarah"], "shots": 2,
+        }
+        title_model = RecordingModel('{"title": "Cold Harbor"}')
+        title = asyncio.run(generate_title_card(0, scene, title_model, TokenBudget("titles", 400)))
+        shot_model = RecordingModel('{"description": "Fog over the docks."}')
+        shots = asyncio.run(generate_scene_shots(scene, shot_model, 0, TokenBudget("shots", 600)))
+
+        self.assertEqual(title, "Cold Harbor")
+        self.assertEqual(shots, ["Fog over the docks.", "Fog over the docks."])
+        self.assertTrue(all(tokens <= 400 for tokens in title_model.prompts))
+        self.assertTrue(all(tokens <= 600 for tokens in shot_model.prompts))
+        self.assertGreater(count_tokens(scene["location"]), 600)
+
+    def test_webhook_passes_image_paths_to_dialog_generation(self):
+        import asyncio
+        from fastapi import HTTPException
+        from podcastfy import webhook_handler
+        from podcastfy.webhook_handler import VideoRequest, generate_video
+
+        generator = MagicMock()
+        generator.agenerate_qa_content = AsyncMock(side_effect=RuntimeError("stop after dialog"))
+        request = VideoRequest(
+            input_text="A case", scene_config={"num_scenes": 1}, image_paths=["tests/data/images/Senecio.jpeg"]
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir, \
+                patch.object(webhook_handler, "ensure_directories", return_value={"transcripts": tmp_dir}), \
+                patch.object(webhook_handler, "archive_old_files"), \
+                patch.object(webhook_handler, "load_config"), \
+                patch.object(webhook_handler, "ContentGenerator", return_value=generator):
+            with self.assertRaises(HTTPException):
+                asyncio.run(generate_video(request))
+
+        kwargs = generator.agenerate_qa_content.call_args.kwargs
+        self.assertEqual(kwargs["image_file_paths"], ["tests/data/images/Senecio.jpeg"])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,75 @@
+import base64
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from PIL import Image
+from podcastfy.utils.image_inputs import ImageInputProcessor
+from podcastfy.utils.token_budget import count_message_tokens, count_tokens, image_tokens, IMAGE_TILE_TOKENS
+
+
+class TestImageInputs(unittest.TestCase):
+	def setUp(self):
+		self.tmp_dir = tempfile.TemporaryDirectory()
+		config = {
+			"content_generator": {
+				"image_inputs": {
+					"max_dimension": 256,
+					"cache_dir": os.path.join(self.tmp_dir.name, "cache"),
+				}
+			}
+		}
+		self.processor = ImageInputProcessor(config)
+		self.large_path = self._write_image("large.png", (2000, 1000), "red")
+		self.copy_path = self._write_image("copy.png", (2000, 1000), "red")
+		self.small_path = self._write_image("small.png", (100, 50), "blue")
+
+	def tearDown(self):
+		self.tmp_dir.cleanup()
+
+	def _write_image(self, name, size, color):
+		path = os.path.join(self.tmp_dir.name, name)
+		Image.new("RGBA", size, color).save(path)
+		return path
+
+	def _decode(self, part):
+		payload = part["image_url"].split(",", 1)[1]
+		return Image.open(io.BytesIO(base64.b64decode(payload)))
+
+	def test_downscales_and_deduplicates(self):
+		parts = self.processor.prepare([self.large_path, self.copy_path, self.small_path])
+		self.assertEqual(len(parts), 2)
+		self.assertTrue(parts[0]["image_url"].startswith("data:image/jpeg;base64,"))
+		self.assertEqual(self._decode(parts[0]).size, (256, 128))
+		self.assertEqual(self._decode(parts[1]).size, (100, 50))
+
+	def test_repeat_runs_reuse_cached_encoding(self):
+		first = self.processor.prepare([self.large_path])
+		with patch.object(self.processor, "encode") as encode:
+			second = self.processor.prepare([self.large_path])
+			encode.assert_not_called()
+		self.assertEqual(first, second)
+
+	def test_image_parts_count_towards_prompt_tokens(self):
+		parts = self.processor.prepare([self.large_path, self.small_path])
+		content = [{"type": "text", "text": "Describe the scene."}, *parts]
+		self.assertEqual(
+			count_message_tokens([content], self.processor.part_tokens),
+			count_tokens("Describe the scene.") + 2 * IMAGE_TILE_TOKENS
+		)
+
+	def test_large_images_are_counted_in_tiles(self):
+		self.assertEqual(image_tokens(384, 384), IMAGE_TILE_TOKENS)
+		self.assertEqual(image_tokens(768, 385), IMAGE_TILE_TOKENS)
+		self.assertEqual(image_tokens(1024, 1024), 4 * IMAGE_TILE_TOKENS)
+
+		self.processor.max_dimension = 1024
+		parts = self.processor.prepare([self.large_path])
+		self.assertEqual(self._decode(parts[0]).size, (1024, 512))
+		self.assertEqual(self.processor.part_tokens(parts[0]), 2 * IMAGE_TILE_TOKENS)
+		self.assertEqual(count_message_tokens([parts]), 4 * IMAGE_TILE_TOKENS)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,177 @@
+import asyncio
+import json
+import threading
+import time
+import unittest
+import httpx
+from langchain_core.messages import SystemMessage, HumanMessage
+from podcastfy.utils.local_llm import LocalLLMPool, to_chat_messages
+
+
+class FakeServers:
+	"""Answers /health and /v1/chat/completions for a set of fake local servers."""
+
+	def __init__(self, ready_hosts):
+		self.ready_hosts = set(ready_hosts)
+		self.completions = []
+		self.in_flight = 0
+		self.max_in_flight = 0
+
+	async def handle(self, request):
+		host = f"{request.url.host}:{request.url.port}"
+		if request.url.path == "/health":
+			return httpx.Response(200 if host in self.ready_hosts else 503)
+		self.completions.append(host)
+		self.in_flight += 1
+		self.max_in_flight = max(self.max_in_flight, self.in_flight)
+		await asyncio.sleep(0.01)
+		self.in_flight -= 1
+		body = json.loads(request.content)
+		return httpx.Response(200, json={
+			"choices": [{"message": {"content": f"{host}:{body['messages'][-1]['content']}"}}],
+			"usage": {"prompt_tokens": 5, "completion_tokens": 3, "total_tokens": 8},
+		})
+
+
+class CountingTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+	"""Tracks concurrent completions across threads, for both sync and async clients."""
+
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.in_flight = 0
+		self.max_in_flight = 0
+		self.completions = 0
+
+	def enter(self):
+		with self.lock:
+			self.in_flight += 1
+			self.completions += 1
+			self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+	def leave(self):
+		with self.lock:
+			self.in_flight -= 1
+
+	def reply(self, request):
+		if request.url.path == "/health":
+			return httpx.Response(200)
+		return httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}]})
+
+	def handle_request(self, request):
+		if request.url.path != "/health":
+			self.enter()
+			time.sleep(0.02)
+			self.leave()
+		return self.reply(request)
+
+	async def handle_async_request(self, request):
+		if request.url.path != "/health":
+			self.enter()
+			await asyncio.sleep(0.02)
+			self.leave()
+		return self.reply(request)
+
+
+class TestLocalLLMPool(unittest.TestCase):
+	def make_pool(self, servers, urls, **kwargs):
+		return LocalLLMPool(
+			urls, transport=httpx.MockTransport(servers.handle), startup_timeout=0, **kwargs
+		)
+
+	def test_round_robin_across_ready_instances(self):
+		servers = FakeServers(["a:8080", "b:8080"])
+		pool = self.make_pool(servers, ["http://a:8080", "http://b:8080", "http://c:8080"])
+		model = pool.chat_model()
+
+		async def run():
+			return [await model.ainvoke([HumanMessage(content=str(i))]) for i in range(4)]
+
+		replies = asyncio.run(run())
+		self.assertEqual(servers.completions, ["a:8080", "b:8080", "a:8080", "b:8080"])
+		self.assertEqual(replies[1].content, "b:8080:1")
+		self.assertEqual(replies[0].usage_metadata["input_tokens"], 5)
+
+	def test_slots_bound_concurrency(self):
+		servers = FakeServers(["a:8080"])
+		pool = self.make_pool(servers, ["http://a:8080"], slots_per_instance=2)
+		model = pool.chat_model()
+
+		async def run():
+			return await asyncio.gather(*(model.ainvoke([HumanMessage(content="x")]) for _ in range(6)))
+
+		asyncio.run(run())
+		self.assertEqual(len(servers.completions), 6)
+		self.assertEqual(servers.max_in_flight, 2)
+
+	def test_slots_are_shared_by_sync_calls_and_every_event_loop(self):
+		transport = CountingTransport()
+		pool = LocalLLMPool(["http://a:8080"], slots_per_instance=2, transport=transport, startup_timeout=0)
+		model = pool.chat_model()
+
+		async def run_loop():
+			await asyncio.gather(*(model.ainvoke([HumanMessage(content="x")]) for _ in range(4)))
+
+		def run_sync():
+			for _ in range(3):
+				model.invoke([HumanMessage(content="x")])
+
+		threads = [threading.Thread(target=asyncio.run, args=(run_loop(),)) for _ in range(2)]
+		threads += [threading.Thread(target=run_sync) for _ in range(2)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		pool.close()
+		self.assertEqual(transport.completions, 14)
+		self.assertEqual(transport.max_in_flight, 2)
+
+	def test_async_clients_are_closed_with_their_loop(self):
+		servers = FakeServers(["a:8080"])
+		pool = self.make_pool(servers, ["http://a:8080"])
+		model = pool.chat_model()
+		clients = []
+
+		async def run():
+			await model.ainvoke([HumanMessage(content="x")])
+			clients.append((await pool._state())["client"])
+
+		asyncio.run(run())
+		asyncio.run(run())
+		self.assertEqual(len(servers.completions), 2)
+		self.assertIsNot(clients[0], clients[1])
+		self.assertTrue(all(client.is_closed for client in clients))
+
+	def test_sync_calls_share_one_client(self):
+		def handle(request):
+			if request.url.path == "/health":
+				return httpx.Response(200)
+			return httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}]})
+
+		pool = LocalLLMPool(["http://a:8080"], transport=httpx.MockTransport(handle), startup_timeout=0)
+		client = pool._sync_client
+		model = pool.chat_model()
+		replies = [model.invoke([HumanMessage(content="x")]).content for _ in range(2)]
+		self.assertEqual(replies, ["ok", "ok"])
+		self.assertIs(pool._sync_client, client)
+		self.assertFalse(client.is_closed)
+		pool.close()
+		self.assertTrue(client.is_closed)
+
+	def test_no_ready_instance_raises(self):
+		pool = self.make_pool(FakeServers([]), ["http://a:8080"])
+		with self.assertRaises(RuntimeError):
+			asyncio.run(pool.chat_model().ainvoke([HumanMessage(content="x")]))
+
+	def test_messages_are_converted_to_text_chat(self):
+		messages = [
+			SystemMessage(content="Be terse."),
+			HumanMessage(content=[{"type": "text", "text": "Hi"}, {"type": "image_url", "image_url": "data:"}]),
+		]
+		self.assertEqual(to_chat_messages(messages), [
+			{"role": "system", "content": "Be terse."},
+			{"role": "user", "content": "Hi"},
+		])
+
+
+if __name__ == "__main__":
+	unittest.main()
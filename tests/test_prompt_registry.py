@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from podcastfy.utils.prompt_registry import PromptRegistry
+from podcastfy.utils import prompt_handler
+from podcastfy.utils.prompt_handler import PromptHandler
+
+
+class TestPromptRegistry(unittest.TestCase):
+	def setUp(self):
+		self.tmp_dir = tempfile.TemporaryDirectory()
+		self.base_path = os.path.join(self.tmp_dir.name, "prompt.txt")
+		self.custom_path = os.path.join(self.tmp_dir.name, "custom.yaml")
+		with open(self.base_path, "w", encoding="utf-8") as f:
+			f.write("You write noir dialog.\n\nKeep it tense.")
+		with open(self.custom_path, "w", encoding="utf-8") as f:
+			f.write("topic: A missing witness\n")
+		self.registry = PromptRegistry(reload_interval=0)
+
+	def tearDown(self):
+		self.tmp_dir.cleanup()
+
+	def test_reloads_only_when_file_changes(self):
+		first = self.registry.get_file(self.base_path)
+		self.assertIs(self.registry.get_file(self.base_path), first)
+
+		with open(self.base_path, "w", encoding="utf-8") as f:
+			f.write("A different prompt.")
+		os.utime(self.base_path, ns=(first.mtime[0] + 10**9, first.mtime[0] + 10**9))
+		self.assertEqual(self.registry.get_text(self.base_path), "A different prompt.")
+
+	def test_reload_interval_skips_filesystem(self):
+		registry = PromptRegistry(reload_interval=60)
+		registry.get_text(self.base_path)
+		with patch("podcastfy.utils.prompt_registry.os.stat") as stat:
+			registry.get_text(self.base_path)
+			stat.assert_not_called()
+
+	def test_merged_prompt_is_compiled_once(self):
+		with patch.object(prompt_handler, "get_prompt_registry", return_value=self.registry):
+			handler = PromptHandler(self.base_path, self.custom_path)
+			merged = handler.merge_prompts()
+			self.assertIn("TOPIC: A missing witness", merged)
+			with patch.object(PromptHandler, "_merge") as merge, \
+					patch("podcastfy.utils.prompt_handler.os.path.exists") as exists:
+				self.assertEqual(handler.merge_prompts(), merged)
+				merge.assert_not_called()
+				exists.assert_not_called()
+
+	def test_compiled_prompts_are_bounded(self):
+		registry = PromptRegistry(reload_interval=0, max_compiled=2)
+		for key in ("a", "b", "a", "c"):
+			registry.compile(key, lambda: key.upper())
+		self.assertEqual(list(registry._compiled), ["a", "c"])
+
+	def test_yaml_copies_do_not_share_state(self):
+		data = self.registry.get_yaml(self.custom_path)
+		data["topic"] = "Changed"
+		self.assertEqual(self.registry.get_yaml(self.custom_path), {"topic": "A missing witness"})
+
+	def test_yaml_is_parsed_after_a_text_load(self):
+		self.assertEqual(self.registry.get_text(self.custom_path), "topic: A missing witness\n")
+		self.assertEqual(self.registry.get_yaml(self.custom_path), {"topic": "A missing witness"})
+
+		with patch.object(prompt_handler, "get_prompt_registry", return_value=self.registry):
+			prompt_handler.load_custom_prompt(self.custom_path)
+			merged = PromptHandler(self.base_path, self.custom_path).merge_prompts()
+		self.assertIn("TOPIC: A missing witness", merged)
+
+	def test_yaml_must_be_mapping(self):
+		with open(self.custom_path, "w", encoding="utf-8") as f:
+			f.write("- just\n- a list\n")
+		with self.assertRaises(ValueError):
+			self.registry.get_yaml(self.custom_path)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,84 @@
+import asyncio
+import json
+import unittest
+from langchain_core.messages import AIMessage, HumanMessage
+from podcastfy.utils.structured_output import (
+	ParseMetrics, StructuredOutputError, SCENE_SCHEMA, agenerate_structured,
+	failing_fields, repair_json
+)
+
+SCENE = {
+	"location": "Harbor warehouse",
+	"tone": "Cold and tense",
+	"characters": ["DetectiveSarah"],
+	"key_elements": ["Fog", "Crates", "Lantern"],
+	"transitions": "Cut to black",
+}
+
+
+class QueuedLLM:
+	"""Returns queued replies and records the schema requested for each call."""
+
+	supports_json_schema = True
+
+	def __init__(self, replies):
+		self.replies = list(replies)
+		self.calls = []
+
+	async def ainvoke(self, messages, response_schema=None):
+		self.calls.append((messages, response_schema))
+		return AIMessage(content=self.replies.pop(0))
+
+
+class TestRepairJson(unittest.TestCase):
+	def test_plain_json_needs_no_repair(self):
+		self.assertEqual(repair_json('{"title": "Dead Ends"}'), ({"title": "Dead Ends"}, False))
+
+	def test_repairs_fences_prose_and_trailing_commas(self):
+		reply = 'Sure! Here it is:\n```json\n{"title": "Dead {Ends}", "tags": ["a", "b",],}\n```\nEnjoy.'
+		data, repaired = repair_json(reply)
+		self.assertTrue(repaired)
+		self.assertEqual(data, {"title": "Dead {Ends}", "tags": ["a", "b"]})
+
+	def test_unrecoverable_reply_raises(self):
+		with self.assertRaises(ValueError):
+			repair_json("No JSON here")
+
+	def test_failing_fields_checks_types_and_sizes(self):
+		scene = dict(SCENE, key_elements=["Fog"], tone="")
+		self.assertEqual(failing_fields(scene, SCENE_SCHEMA), ["tone", "key_elements"])
+
+
+class TestStructuredGeneration(unittest.TestCase):
+	def setUp(self):
+		self.metrics = ParseMetrics()
+		self.messages = [HumanMessage(content="Describe the scene.")]
+
+	def test_valid_reply_uses_one_call_with_schema(self):
+		llm = QueuedLLM([json.dumps(SCENE)])
+		data = asyncio.run(agenerate_structured(llm, self.messages, SCENE_SCHEMA, "scene", metrics=self.metrics))
+		self.assertEqual(data, SCENE)
+		self.assertEqual(llm.calls[0][1], SCENE_SCHEMA)
+		self.assertEqual(self.metrics.snapshot()["scene"]["reasks"], 0)
+
+	def test_reasks_only_for_failing_field(self):
+		broken = dict(SCENE, key_elements=["Fog"])
+		llm = QueuedLLM([json.dumps(broken) + ",", '{"key_elements": ["Fog", "Crates", "Lantern"]}'])
+		data = asyncio.run(agenerate_structured(llm, self.messages, SCENE_SCHEMA, "scene", metrics=self.metrics))
+		self.assertEqual(data, SCENE)
+		self.assertEqual(llm.calls[1][1]["required"], ["key_elements"])
+		counts = self.metrics.snapshot()["scene"]
+		self.assertEqual((counts["calls"], counts["repaired"], counts["reasks"], counts["failures"]), (1, 1, 1, 0))
+
+	def test_persistent_failure_raises_with_partial_result(self):
+		llm = QueuedLLM([json.dumps(dict(SCENE, tone="")), "still not json"])
+		with self.assertRaises(StructuredOutputError) as raised:
+			asyncio.run(agenerate_structured(llm, self.messages, SCENE_SCHEMA, "scene", metrics=self.metrics))
+		self.assertEqual(raised.exception.fields, ["tone"])
+		self.assertEqual(raised.exception.partial["location"], "Harbor warehouse")
+		self.assertEqual(self.metrics.snapshot()["scene"]["failure_rate"], 1.0)
+		self.assertIn('podcastfy_structured_output_failures_total{kind="scene"} 1', self.metrics.render_prometheus())
+
+
+if __name__ == "__main__":
+	unittest.main()